@@ -15,8 +15,8 @@ from typing import Optional, Dict, Any, List
 
 from utils.file_manager import FileManager
 from utils.network_utils import NetworkUtils
-from utils.quiz_logic import QuizManager, QuizState
-from web.app import start_quiz_session, stop_quiz_session, get_session_info
+from utils.quiz_logic import QuizState
+from web.app import quiz_manager, start_quiz_session, stop_quiz_session, get_session_info
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +37,7 @@ class QuizAdminApp:
         
         # Managers
         self.file_manager = FileManager()
-        self.quiz_manager = QuizManager()
+        self.quiz_manager = quiz_manager  # El del servidor embebido, donde viven las sesiones
         
         # Variables de estado
         self.current_session_id = None
@@ -556,7 +556,7 @@ class QuizAdminApp:
                     self.server_ip_var.set(f"IP: {local_ip}")
                     
                     # Iniciar servidor
-                    run_server(debug=False)
+                    run_server(debug=False, embedded=True)
                 except Exception as e:
                     logger.error(f"Error en thread del servidor: {e}")
                     self.root.after(0, lambda: self.handle_server_error(str(e)))
@@ -687,7 +687,8 @@ class QuizAdminApp:
             
             session = self.quiz_manager.get_session(self.current_session_id)
             if session:
-                if not session.next_question():
+                # Con el motor 'async' next_question es una corrutina: se invoca vía el gestor
+                if not self.quiz_manager.call_session(session, 'next_question'):
                     # Quiz terminado
                     self.quiz_state_var.set("Finalizado")
                     self.next_question_btn.configure(state="disabled")
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Script de benchmark de capacidad para la plataforma de quizzes.
+Simula sesiones con miles de participantes y mide ingreso, respuestas,
+puntuación y difusión de eventos sin necesidad de navegadores reales.
+También mide el rendimiento con muchas sesiones simultáneas en un proceso y
+compara los modos asíncronos del servidor SocketIO con clientes reales.
+"""
+
+import sys
+import json
+import time
+import random
+import os
+import argparse
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from utils.quiz_logic import QuizSession, QuizManager
+from utils.scheduler import TimerScheduler
+
+# Silenciar el logging de las sesiones durante las mediciones
+logging.basicConfig(level=logging.WARNING)
+
+DEFAULT_SIZES = [1000, 5000, 10000]
+DEFAULT_BUDGET_MS = 5.0
+DEFAULT_PLAYERS_PER_SESSION = 40
+DEFAULT_SERVER_CLIENTS = 100
+DEFAULT_SERVER_PORT = 5150
+
+def percentile(values, pct):
+    """Obtener el percentil `pct` (0-100) de una lista de valores."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def build_quiz(question_count):
+    """Construir un quiz sintético con preguntas de 4 opciones."""
+    return {
+        'title': 'Quiz de capacidad',
+        'question_time_limit': 3600,
+        'show_results_time': 3600,  # El benchmark avanza las preguntas manualmente
+        'questions': [
+            {
+                'question': f'Pregunta {i + 1}',
+                'options': ['A', 'B', 'C', 'D'],
+                'correct_answer': i % 4
+            }
+            for i in range(question_count)
+        ]
+    }
+
+def attach_broadcast_counter(session):
+    """
+    Registrar callbacks que serializan cada evento como lo haría SocketIO
+    al emitir a la sala, acumulando bytes y tiempo de codificación.
+    """
+    counters = {'events': 0, 'bytes': 0, 'seconds': 0.0}
+
+    def on_event(session_obj, event, data):
+        start = time.perf_counter()
+        payload = json.dumps({'event': event, 'data': data}, default=str)
+        counters['seconds'] += time.perf_counter() - start
+        counters['events'] += 1
+        counters['bytes'] += len(payload)
+
+    for event in ['participant_join', 'question_started', 'question_results',
+                  'state_change', 'leaderboard_show']:
+        session.add_event_callback(event, on_event)
+
+    return counters
+
+def run_capacity(players, questions, budget_ms):
+    """
+    Simular una sesión completa con `players` participantes.
+
+    Returns:
+        Diccionario con las métricas medidas
+    """
+    scheduler = TimerScheduler(name="BenchmarkScheduler")
+    session = QuizSession(build_quiz(questions), f"BENCH{players}",
+                          scheduler=scheduler, max_participants=players)
+    broadcast = attach_broadcast_counter(session)
+
+    # Ingreso de participantes
+    start = time.perf_counter()
+    for i in range(players):
+        session.add_participant(f"p{i}", f"Jugador {i + 1}")
+    join_seconds = time.perf_counter() - start
+
+    submit_latencies = []
+    scoring_seconds = 0.0
+
+    for question_index in range(questions):
+        session.current_question_index = question_index
+        session._call(session._start_question)
+
+        # Ingreso de respuestas (latencia individual de submit_answer)
+        for i in range(players):
+            answer = random.randint(0, 3)
+            t0 = time.perf_counter()
+            session.submit_answer(f"p{i}", answer)
+            submit_latencies.append((time.perf_counter() - t0) * 1000)
+
+        # Puntuación y difusión de resultados
+        t0 = time.perf_counter()
+        session._call(session._end_question_time)
+        scoring_seconds += time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    session.get_leaderboard()
+    leaderboard_ms = (time.perf_counter() - t0) * 1000
+
+    session.cleanup()
+    scheduler.shutdown()
+
+    p99 = percentile(submit_latencies, 99)
+    return {
+        'players': players,
+        'joins_per_second': players / join_seconds if join_seconds else 0.0,
+        'submit_p50_ms': percentile(submit_latencies, 50),
+        'submit_p99_ms': p99,
+        'scoring_ms_per_question': scoring_seconds * 1000 / questions,
+        'leaderboard_ms': leaderboard_ms,
+        'broadcast_events': broadcast['events'],
+        'broadcast_mb': broadcast['bytes'] / 1e6,
+        'broadcast_encode_ms': broadcast['seconds'] * 1000,
+        'within_budget': p99 <= budget_ms
+    }
+
+def capacity_mode(sizes, questions, budget_ms):
+    """Ejecutar el modo de capacidad y reportar el punto de quiebre."""
+    print("BENCHMARK DE CAPACIDAD")
+    print("=" * 50)
+    print(f"Preguntas por sesión: {questions} | Presupuesto p99 submit_answer: {budget_ms} ms")
+
+    breaking_point = None
+
+    for players in sizes:
+        result = run_capacity(players, questions, budget_ms)
+        status = "✓" if result['within_budget'] else "✗"
+        print(f"\n{status} {players} participantes")
+        print(f"  Ingresos/s:              {result['joins_per_second']:.0f}")
+        print(f"  submit_answer p50/p99:   {result['submit_p50_ms']:.3f} / {result['submit_p99_ms']:.3f} ms")
+        print(f"  Puntuación por pregunta: {result['scoring_ms_per_question']:.1f} ms")
+        print(f"  Leaderboard (top 10):    {result['leaderboard_ms']:.3f} ms")
+        print(f"  Difusión:                {result['broadcast_events']} eventos, "
+              f"{result['broadcast_mb']:.2f} MB, {result['broadcast_encode_ms']:.1f} ms codificando")
+
+        if not result['within_budget'] and breaking_point is None:
+            breaking_point = players
+
+    print("\n" + "=" * 50)
+    if breaking_point is None:
+        print(f"Todas las capacidades cumplen el presupuesto de {budget_ms} ms")
+    else:
+        print(f"El p99 de submit_answer supera {budget_ms} ms a partir de {breaking_point} participantes")
+
+    return 0 if breaking_point is None else 1
+
+def run_sessions(sessions, players, questions):
+    """
+    Simular `sessions` sesiones simultáneas en un mismo proceso.
+
+    Cada sesión se juega en su propio hilo y las respuestas se enrutan por el
+    índice de participantes del gestor, como en la capa web.
+
+    Returns:
+        Diccionario con las métricas medidas
+    """
+    scheduler = TimerScheduler(name="BenchmarkScheduler")
+    manager = QuizManager(scheduler=scheduler)
+    quiz = build_quiz(questions)
+    codes = [manager.create_session(quiz, max_participants=players) for _ in range(sessions)]
+
+    # Ingreso de participantes en todas las sesiones
+    start = time.perf_counter()
+    for code in codes:
+        session = manager.get_session(code)
+        for i in range(players):
+            session.add_participant(f"{code}-p{i}", f"Jugador {i + 1}")
+    join_seconds = time.perf_counter() - start
+
+    def play(code):
+        """Jugar todas las preguntas de una sesión."""
+        session = manager.get_session(code)
+        latencies = []
+        for question_index in range(questions):
+            session.current_question_index = question_index
+            session._call(session._start_question)
+
+            for i in range(players):
+                participant_id = f"{code}-p{i}"
+                t0 = time.perf_counter()
+                manager.find_participant_session(participant_id).submit_answer(
+                    participant_id, random.randint(0, 3))
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+            session._call(session._end_question_time)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        submit_latencies = [latency for latencies in pool.map(play, codes) for latency in latencies]
+    play_seconds = time.perf_counter() - start
+
+    usage = manager.get_resource_usage()
+    answers_stored = sum(item['answers_stored'] for item in usage.values())
+
+    for code in codes:
+        manager.end_session(code)
+    scheduler.shutdown()
+
+    return {
+        'sessions': sessions,
+        'players': sessions * players,
+        'joins_per_second': sessions * players / join_seconds if join_seconds else 0.0,
+        'answers_per_second': answers_stored / play_seconds if play_seconds else 0.0,
+        'questions_per_second': sessions * questions / play_seconds if play_seconds else 0.0,
+        'submit_p50_ms': percentile(submit_latencies, 50),
+        'submit_p99_ms': percentile(submit_latencies, 99),
+        'answers_stored': answers_stored,
+        'elapsed_seconds': play_seconds
+    }
+
+def sessions_mode(sessions, players, questions, budget_ms):
+    """Ejecutar el modo de sesiones simultáneas."""
+    print("BENCHMARK DE SESIONES SIMULTÁNEAS")
+    print("=" * 50)
+    print(f"{sessions} sesiones x {players} participantes | {questions} preguntas por sesión")
+
+    result = run_sessions(sessions, players, questions)
+    within_budget = result['submit_p99_ms'] <= budget_ms
+    status = "✓" if within_budget else "✗"
+
+    print(f"\n{status} {result['players']} participantes en total")
+    print(f"  Ingresos/s:              {result['joins_per_second']:.0f}")
+    print(f"  Respuestas/s:            {result['answers_per_second']:.0f} "
+          f"({result['answers_stored']} en {result['elapsed_seconds']:.2f} s)")
+    print(f"  Preguntas/s:             {result['questions_per_second']:.1f}")
+    print(f"  submit_answer p50/p99:   {result['submit_p50_ms']:.3f} / {result['submit_p99_ms']:.3f} ms")
+
+    return 0 if within_budget else 1
+
+def wait_for_server(base_url, timeout=15.0):
+    """Esperar a que el servidor responda en /api/status."""
+    import requests
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/status", timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+def process_cpu_seconds(pid):
+    """Tiempo de CPU (usuario + sistema) de un proceso, o None fuera de Linux."""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def websocket_client_available():
+    """El cliente de python-socketio necesita websocket-client para WebSocket."""
+    try:
+        import websocket  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def run_server_mode(async_mode, clients, port, transport_policy='polling'):
+    """
+    Medir un servidor real en el modo asíncrono indicado.
+    
+    Lanza `python -m web.app` en un proceso aparte, conecta `clients`
+    participantes por SocketIO y mide conexiones por segundo, la CPU del
+    servidor durante la ráfaga de uniones y la latencia con la que llega a
+    cada cliente el cambio de estado al iniciar el quiz.
+    
+    Returns:
+        Diccionario con las métricas medidas o None si el servidor no arrancó
+    """
+    import requests
+    import socketio
+    from web.async_modes import TRANSPORT_POLICIES
+    
+    transports = TRANSPORT_POLICIES[transport_policy]
+    if not websocket_client_available():
+        transports = [t for t in transports if t != 'websocket']
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, QUIZ_ASYNC_MODE=async_mode, QUIZ_TRANSPORT_POLICY=transport_policy)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'web.app', '--port', str(port), '--no-debug'],
+        cwd=str(project_root), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    sockets = []
+    
+    try:
+        if not wait_for_server(base_url):
+            return None
+        
+        quiz = dict(build_quiz(1), max_participants=clients)
+        session_id = requests.post(f"{base_url}/api/admin/start_session",
+                                   json={'quiz_data': quiz}).json()['session_id']
+        
+        received = {}
+        
+        def connect(i):
+            """Registrar y conectar un participante."""
+            participant_id = requests.post(f"{base_url}/join", json={
+                'name': f"Jugador {i + 1}", 'session_id': session_id
+            }).json()['participant_id']
+            
+            client = socketio.Client()
+            
+            @client.on('state_change')
+            def on_state_change(data):
+                received.setdefault(i, time.time())
+            
+            t0 = time.perf_counter()
+            client.connect(base_url, transports=transports)
+            client.emit('join_session', {'session_id': session_id, 'participant_id': participant_id})
+            connect_seconds = time.perf_counter() - t0
+            sockets.append(client)
+            return connect_seconds
+        
+        cpu_before = process_cpu_seconds(server.pid)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            connect_times = [t * 1000 for t in pool.map(connect, range(clients))]
+        connect_wall = time.perf_counter() - start
+        time.sleep(0.5)
+        cpu_after = process_cpu_seconds(server.pid)
+        
+        # Latencia de difusión: del inicio del quiz a la recepción en cada cliente
+        admin = socketio.Client()
+        admin.connect(base_url, transports=transports)
+        admin.emit('admin_join', {'session_id': session_id})
+        time.sleep(0.2)
+        sent_at = time.time()
+        admin.emit('admin_start_game', {'session_id': session_id})
+        
+        deadline = time.time() + 10
+        while len(received) < clients and time.time() < deadline:
+            time.sleep(0.05)
+        latencies = [(at - sent_at) * 1000 for at in received.values()]
+        sockets.append(admin)
+        
+        return {
+            'async_mode': async_mode,
+            'transport_policy': transport_policy,
+            'clients': clients,
+            'join_cpu_seconds': (cpu_after - cpu_before) if cpu_before is not None else None,
+            'connections_per_second': clients / connect_wall if connect_wall else 0.0,
+            'connect_p50_ms': percentile(connect_times, 50),
+            'broadcast_received': len(latencies),
+            'broadcast_p50_ms': percentile(latencies, 50),
+            'broadcast_p99_ms': percentile(latencies, 99)
+        }
+    finally:
+        for client in sockets:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        server.terminate()
+        server.wait()
+
+def async_modes_mode(modes, clients, port, transport_policies=('polling',)):
+    """Comparar los modos asíncronos y las políticas de transporte del servidor."""
+    from web.async_modes import SUPPORTED_ASYNC_MODES, TRANSPORT_POLICIES
+    
+    print("BENCHMARK DE MODOS ASÍNCRONOS")
+    print("=" * 50)
+    print(f"{clients} clientes SocketIO por modo")
+    
+    runs = []
+    for transport_policy in transport_policies:
+        if transport_policy not in TRANSPORT_POLICIES:
+            print(f"\n✗ {transport_policy}: política de transporte no soportada")
+            continue
+        if transport_policy == 'websocket' and not websocket_client_available():
+            print("\n- websocket: websocket-client no instalado, se omite")
+            continue
+        runs.extend((async_mode, transport_policy) for async_mode in modes)
+    
+    for async_mode, transport_policy in runs:
+        if async_mode not in SUPPORTED_ASYNC_MODES:
+            print(f"\n✗ {async_mode}: modo no soportado")
+            continue
+        if async_mode != 'threading':
+            try:
+                __import__(async_mode)
+            except ImportError:
+                print(f"\n- {async_mode}: no instalado, se omite")
+                continue
+        
+        label = f"{async_mode} / {transport_policy}"
+        result = run_server_mode(async_mode, clients, port, transport_policy)
+        if result is None:
+            print(f"\n✗ {label}: el servidor no arrancó")
+            continue
+        
+        print(f"\n✓ {label}")
+        print(f"  Conexiones/s:            {result['connections_per_second']:.0f} "
+              f"(p50 {result['connect_p50_ms']:.1f} ms)")
+        if result['join_cpu_seconds'] is not None:
+            print(f"  CPU en ráfaga de unión:  {result['join_cpu_seconds'] * 1000:.0f} ms")
+        print(f"  Difusión p50/p99:        {result['broadcast_p50_ms']:.1f} / "
+              f"{result['broadcast_p99_ms']:.1f} ms "
+              f"({result['broadcast_received']}/{result['clients']} clientes)")
+    
+    return 0
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark de la plataforma de quizzes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Cantidades de participantes a simular")
+    parser.add_argument('--questions', type=int, default=3,
+                        help="Preguntas por sesión simulada")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Presupuesto de latencia p99 para submit_answer")
+    parser.add_argument('--sessions', type=int, default=0,
+                        help="Simular N sesiones simultáneas en lugar del modo de capacidad")
+    parser.add_argument('--players', type=int, default=DEFAULT_PLAYERS_PER_SESSION,
+                        help="Participantes por sesión en el modo de sesiones simultáneas")
+    parser.add_argument('--async-modes', nargs='+', default=None,
+                        help="Comparar modos asíncronos del servidor (threading eventlet gevent)")
+    parser.add_argument('--clients', type=int, default=DEFAULT_SERVER_CLIENTS,
+                        help="Clientes SocketIO por modo asíncrono")
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVER_PORT,
+                        help="Puerto del servidor lanzado en el modo asíncrono")
+    parser.add_argument('--transports', nargs='+', default=['polling'],
+                        help="Políticas de transporte a comparar (polling websocket)")
+    args = parser.parse_args()
+    
+    if args.async_modes:
+        return async_modes_mode(args.async_modes, args.clients, args.port, args.transports)
+
+    if args.sessions:
+        return sessions_mode(args.sessions, args.players, args.questions, args.budget_ms)
+
+    return capacity_mode(args.sizes, args.questions, args.budget_ms)
+
+if __name__ == "__main__":
+    sys.exit(main())
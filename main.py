@@ -65,7 +65,14 @@ def create_config_files():
         "debug": True,
         "max_participants": 20,
         "default_question_time": 30,
-        "default_points": 100
+        "default_points": 100,
+        "session_engine": "thread",
+        "results_fanout": "personal",
+        "notify_coalesce_ms": 250,
+        "storage_backend": "json",
+        "outbound_max_pending": 64,
+        "outbound_max_age": 10,
+        "slow_client_evict": 30
     }
     
     # Configuración de red
@@ -73,7 +80,11 @@ def create_config_files():
         "host": "0.0.0.0",
         "port": 5000,
         "auto_detect_ip": True,
-        "allowed_origins": ["*"]
+        "allowed_origins": ["*"],
+        "workers": 1,
+        "message_queue": None,
+        "async_mode": "threading",
+        "transport_policy": "polling"
     }
     
     # Escribir configuraciones si no existen
@@ -119,11 +130,18 @@ def start_web_server():
     """Iniciar el servidor web en un hilo separado."""
     try:
         # Importar aquí para evitar errores de importación circular
-        from web.app import create_app
+        from web.app import run_server, server_async_mode
         
-        app = create_app()
-        logger.info("Iniciando servidor web en puerto 5000...")
-        app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+        # El servidor comparte proceso con la interfaz Tkinter, que no tolera
+        # el parcheo de eventlet/gevent: aquí siempre se usa threading
+        if server_async_mode != 'threading':
+            logger.warning(f"async_mode '{server_async_mode}' requiere ejecutar el servidor "
+                           "por separado (python -m web.app); usando threading")
+        
+        # El admin de escritorio crea las sesiones en este proceso, así que el
+        # servidor embebido no usa varios workers aunque estén configurados
+        logger.info("Iniciando servidor web...")
+        run_server(debug=False, async_mode='threading', embedded=True)
         
     except ImportError as e:
         logger.error(f"Error al importar módulo web: {e}")
@@ -16,7 +16,7 @@ class AdminInterface {
     }
     
     initializeSocket() {
-        this.socket = io('/admin');
+        this.socket = io('/admin', window.QUIZ_SOCKET_OPTIONS || {});
         
         this.socket.on('connect', () => {
             console.log('Conectado al namespace de administración');
@@ -18,7 +18,7 @@ class QuizClient {
     }
     
     initializeSocket() {
-        this.socket = io();
+        this.socket = io(window.QUIZ_SOCKET_OPTIONS || {});
         
         // Eventos de conexión
         this.socket.on('connect', () => {
@@ -92,11 +92,11 @@ QuizPlatform.createAlertsContainer = function() {
 QuizPlatform.initSocket = function() {
     console.log('🔌 Iniciando conexión Socket.IO...');
     
-    this.state.socket = io({
+    this.state.socket = io(Object.assign({
         transports: ['websocket', 'polling'],
         timeout: 10000,
         retries: this.config.socketRetryAttempts
-    });
+    }, window.QUIZ_SOCKET_OPTIONS));
     
     this.setupSocketEvents();
 };
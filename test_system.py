@@ -18,6 +18,7 @@ try:
     from utils.file_manager import FileManager
     from utils.network_utils import NetworkUtils
     from utils.quiz_logic import QuizManager
+    from utils.scheduler import TimerScheduler
 except ImportError as e:
     print(f"Error al importar módulos: {e}")
     print("Asegúrate de que todos los archivos estén en su lugar.")
@@ -108,6 +109,25 @@ def test_file_manager():
         else:
             print("✗ Error al duplicar quiz")
         
+        # Índice del catálogo: paginado y cambios hechos fuera de FileManager
+        page = fm.list_quizzes(sort_by='title', descending=False, limit=1)
+        if len(page) != 1 or fm.count_quizzes() != len(fm.list_quizzes()):
+            print("✗ Paginado del catálogo incorrecto")
+            return False
+        
+        edited = fm.load_quiz(new_quiz_id)
+        edited['title'] = "Quiz de Prueba - Editado fuera"
+        fm.save_json(fm.quizzes_path / f"{new_quiz_id}.json", edited)
+        titles = {quiz['id']: quiz['title'] for quiz in fm.list_quizzes()}
+        if titles.get(new_quiz_id) != edited['title']:
+            print("✗ El catálogo no detectó el cambio del archivo")
+            return False
+        fm.delete_quiz(new_quiz_id)
+        if new_quiz_id in {quiz['id'] for quiz in fm.list_quizzes()}:
+            print("✗ El catálogo conserva un quiz eliminado")
+            return False
+        print("✓ Catálogo de quizzes actualizado y validado")
+        
         # Probar sesiones
         print("\n--- Probando gestión de sesiones ---")
         
@@ -151,6 +171,23 @@ def test_file_manager():
         else:
             print("✗ Error al cargar configuración")
         
+        # Caché de archivos JSON: segunda lectura desde memoria, entregada como copia editable
+        hits = fm.cache.get_stats()['hits']
+        cached_config = fm.load_config("server")
+        if fm.cache.get_stats()['hits'] != hits + 1:
+            print("✗ La configuración no se sirvió desde la caché")
+            return False
+        cached_config["server_port"] = 1
+        if fm.load_config("server").get("server_port") != 5000:
+            print("✗ Editar la copia devuelta modificó la caché")
+            return False
+        loaded_quiz = fm.load_quiz(quiz_id)
+        loaded_quiz['questions'].append(dict(loaded_quiz['questions'][0]))
+        if not isinstance(loaded_quiz['questions'], list) or len(fm.load_quiz(quiz_id)['questions']) != 2:
+            print("✗ El quiz cargado no es una copia editable independiente")
+            return False
+        print("✓ Caché de archivos JSON con copias editables")
+        
         # Probar historial
         print("\n--- Probando gestión de historial ---")
         
@@ -247,6 +284,1043 @@ def test_quiz_manager():
         traceback.print_exc()
         return False
 
+def test_scheduler():
+    """Probar el planificador de temporizadores compartido."""
+    print("\n=== PRUEBAS DEL PLANIFICADOR ===")
+    
+    try:
+        import threading
+        
+        scheduler = TimerScheduler(name="TestScheduler")
+        fired = []
+        done = threading.Event()
+        
+        # Programar muchos temporizadores en un único hilo
+        for i in range(200):
+            scheduler.schedule(0.01, fired.append, i)
+        cancelled = scheduler.schedule(0.01, fired.append, 'cancelado')
+        cancelled.cancel()
+        
+        # Reprogramar un temporizador para que se ejecute al final
+        late = scheduler.schedule(0.01, done.set)
+        late.reschedule(0.05)
+        
+        if not done.wait(2):
+            print("✗ El temporizador reprogramado no se ejecutó")
+            return False
+        
+        if len(fired) != 200 or 'cancelado' in fired:
+            print(f"✗ Ejecuciones inesperadas: {len(fired)}")
+            return False
+        print("✓ Temporizadores ejecutados, cancelados y reprogramados correctamente")
+        
+        scheduler.shutdown()
+        print("✓ Todas las pruebas del planificador completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas del planificador: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_mailbox():
+    """Probar el buzón de comandos de las sesiones."""
+    print("\n=== PRUEBAS DEL BUZÓN DE COMANDOS ===")
+    
+    try:
+        import threading
+        from utils.quiz_logic import QuizSession, QuizState
+        
+        quiz = {'id': 'buzon', 'title': 'Buzón', 'question_time_limit': 30,
+                'questions': [{'question': '¿1+1?', 'options': ['1', '2'], 'correct_answer': 1}]}
+        scheduler = TimerScheduler(name="TestMailboxScheduler")
+        session = QuizSession(quiz, 'BUZON1', scheduler=scheduler)
+        for i in range(3):
+            session.add_participant(f"p{i}", f"Jugador {i}")
+        
+        # Con el buzón ocupado, los comandos se acumulan y se ejecutan en orden
+        executed = []
+        session._drain_lock.acquire()
+        for i in range(5):
+            session._post(executed.append, i)
+        session._drain_lock.release()
+        session._drain()
+        if executed != [0, 1, 2, 3, 4]:
+            print(f"✗ Orden de comandos incorrecto: {executed}")
+            return False
+        print("✓ Comandos ejecutados en el orden en que se encolaron")
+        
+        # Respuestas consecutivas: un lote y una sola comprobación de fin de pregunta
+        session._call(session._start_first_question)
+        checks = []
+        check_all_answered = session._check_all_answered
+        session._check_all_answered = lambda: checks.append(1) or check_all_answered()
+        
+        session._drain_lock.acquire()
+        results = {}
+        threads = [threading.Thread(target=lambda pid=f"p{i}": results.update({pid: session.submit_answer(pid, 1)}))
+                   for i in range(3)]
+        for thread in threads:
+            thread.start()
+        while len(session._mailbox) < 3:
+            threading.Event().wait(0.01)
+        session._drain_lock.release()
+        session._drain()
+        for thread in threads:
+            thread.join(2)
+        
+        if len(results) != 3 or not all(results.values()) or len(checks) != 1:
+            print(f"✗ Lote de respuestas incorrecto: {results}, comprobaciones={len(checks)}")
+            return False
+        print("✓ Respuestas consecutivas procesadas en un lote")
+        
+        # Una expiración reemplazada por otra fase se descarta
+        stale_seq = session.phase_seq
+        fired = []
+        session._call(session._schedule_phase, 30, fired.append, 'nueva')
+        session._call(session._expire_phase, stale_seq, fired.append, 'vieja')
+        if fired:
+            print(f"✗ Se ejecutó una expiración obsoleta: {fired}")
+            return False
+        print("✓ Expiraciones con phase_seq obsoleto descartadas")
+        
+        # El planificador solo encola: el buzón se procesa fuera de su hilo
+        done = threading.Event()
+        threads_seen = []
+        session._call(session._schedule_phase, 0.01,
+                      lambda: threads_seen.append(threading.current_thread().name) or done.set())
+        if not done.wait(2) or threads_seen[0] == "TestMailboxScheduler":
+            print(f"✗ La expiración se procesó en el hilo del planificador: {threads_seen}")
+            return False
+        if session.state != QuizState.COLLECTING:
+            print(f"✗ Estado inesperado: {session.state}")
+            return False
+        print("✓ Expiraciones procesadas fuera del hilo del planificador")
+        
+        session.cleanup()
+        scheduler.shutdown()
+        print("✓ Todas las pruebas del buzón completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas del buzón: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_async_session():
+    """Probar la sesión asíncrona desde un event loop en marcha."""
+    print("\n=== PRUEBAS DE LA SESIÓN ASÍNCRONA ===")
+    
+    try:
+        import asyncio
+        import threading
+        from utils.quiz_logic import QuizState
+        
+        # Loop en modo debug: detecta operaciones hechas desde otro hilo
+        loop = asyncio.new_event_loop()
+        loop.set_debug(True)
+        loop_errors = []
+        loop.set_exception_handler(lambda _, context: loop_errors.append(context.get('message')))
+        threading.Thread(target=loop.run_forever, daemon=True, name="TestQuizLoop").start()
+        
+        quiz = {'id': 'async', 'title': 'Async', 'question_time_limit': 30,
+                'questions': [{'question': '¿1+1?', 'options': ['1', '2'], 'correct_answer': 1}]}
+        quiz_manager = QuizManager(engine='async', loop=loop)
+        session_id = quiz_manager.create_session(quiz)
+        session = quiz_manager.get_session(session_id)
+        session.add_participant('p0', 'Jugador 0')
+        
+        # Con el buzón ocupado por otro hilo, la corrutina espera sin bloquear el loop
+        session._drain_lock.acquire()
+        start = asyncio.run_coroutine_threadsafe(session.start_quiz(), loop)
+        while not session._mailbox:
+            threading.Event().wait(0.01)
+        try:
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(2)
+        finally:
+            session._drain_lock.release()
+        print("✓ El loop sigue atendiendo mientras espera al buzón")
+        
+        # Otro hilo agrega participantes y procesa el inicio pendiente fuera del loop
+        joiner = threading.Thread(target=lambda: [session.add_participant(f"p{i}", f"Jugador {i}")
+                                                  for i in range(1, 50)])
+        joiner.start()
+        
+        async def drive():
+            advanced = await session.next_question()
+            answered = await session.submit_answer('p0', 1)
+            await session.pause_quiz()
+            paused = session.state
+            await session.resume_quiz()
+            return advanced, answered, paused
+        
+        started = start.result(5)
+        advanced, answered, paused = asyncio.run_coroutine_threadsafe(drive(), loop).result(10)
+        joiner.join(5)
+        if not (started and advanced and answered) or paused != QuizState.PAUSED:
+            print(f"✗ Flujo asíncrono incorrecto: {started}, {advanced}, {answered}, {paused}")
+            return False
+        if session.state != QuizState.COLLECTING or session.phase_task is None:
+            print(f"✗ Estado tras reanudar incorrecto: {session.state}")
+            return False
+        if len(session.participants) != 50:
+            print(f"✗ Participantes agregados: {len(session.participants)}")
+            return False
+        print("✓ Corrutinas y participantes concurrentes en la misma sesión")
+        
+        # Desde código síncrono (admin de escritorio) se avanza a través del gestor
+        if quiz_manager.call_session(session, 'next_question') is not False or session.state != QuizState.FINISHED:
+            print(f"✗ Avance síncrono de la sesión asíncrona: {session.state}")
+            return False
+        print("✓ Avance de pregunta síncrono mediante el gestor")
+        
+        quiz_manager.end_session(session_id)
+        loop.call_soon_threadsafe(loop.stop)
+        if loop_errors:
+            print(f"✗ Errores en el event loop: {loop_errors}")
+            return False
+        print("✓ Plazos programados en el loop de forma segura entre hilos")
+        
+        print("✓ Todas las pruebas de la sesión asíncrona completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de la sesión asíncrona: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_leaderboard():
+    """Probar posiciones y desempates del ranking incremental."""
+    print("\n=== PRUEBAS DE RANKING ===")
+    
+    try:
+        import random
+        from utils.leaderboard import LeaderboardIndex, REBUILD_RATIO
+        
+        board = LeaderboardIndex()
+        for pid in ('a', 'b', 'c', 'd'):
+            board.add(pid)
+        board.update('c', 100)
+        board.update('a', 100)
+        board.update('d', 50)
+        # Empate en 100: primero quien llegó antes (a), aunque puntuó después
+        if board.top(4) != [('a', 100), ('c', 100), ('d', 50), ('b', 0)]:
+            print(f"✗ Orden con empates incorrecto: {board.top(4)}")
+            return False
+        if [board.rank(pid) for pid in ('a', 'c', 'd', 'b')] != [1, 2, 3, 4] or board.rank('x') is not None:
+            print("✗ Posiciones incorrectas tras actualizar")
+            return False
+        board.remove('a')
+        board.add('a', 100)  # Reconexión: conserva su orden de llegada
+        if board.top(2) != [('a', 100), ('c', 100)] or board.rank('a') != 1:
+            print(f"✗ Desempate tras volver al ranking: {board.top(2)}")
+            return False
+        print("✓ Posiciones y desempate por orden de llegada")
+        
+        # Lotes pequeños (mover claves) y grandes (reordenar) frente a un orden de referencia
+        rng = random.Random(7)
+        players = [f"p{i}" for i in range(REBUILD_RATIO * 8)]
+        board = LeaderboardIndex()
+        scores = {}
+        for pid in players:
+            board.add(pid)
+            scores[pid] = 0
+        for changed in (2, len(players) // 2, 3, len(players)):
+            batch = [(pid, scores[pid] + rng.choice((0, 100, 200)))
+                     for pid in rng.sample(players, changed)]
+            board.update_many(batch)
+            scores.update(batch)
+            expected = sorted(players, key=lambda pid: (-scores[pid], players.index(pid)))
+            if [pid for pid, _ in board.top(len(players))] != expected:
+                print(f"✗ Orden incorrecto tras actualizar {changed} participantes")
+                return False
+            if any(board.rank(pid) != position for position, pid in enumerate(expected, 1)):
+                print(f"✗ Posiciones incorrectas tras actualizar {changed} participantes")
+                return False
+        print("✓ Actualizaciones por lotes coinciden con el orden de referencia")
+        
+        print("✓ Todas las pruebas de ranking completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de ranking: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_answer_store():
+    """Probar que las columnas de respuestas reconstruyen el historial anterior."""
+    print("\n=== PRUEBAS DE COLUMNAS DE RESPUESTAS ===")
+    
+    try:
+        from utils.participants import AnswerStore, np
+        
+        store = AnswerStore()
+        players = [store.add_participant() for _ in range(3)]
+        # Historial por participante con el formato de diccionarios anterior
+        expected = {index: [] for index in players}
+        
+        def record(question, index, answer, correct, points, response_time):
+            expected[index].append({'question_index': question, 'answer': answer, 'correct': correct,
+                                    'points': points, 'response_time': response_time})
+        
+        # Fila a fila, con respuestas que no son índices de opción
+        for row in ((0, 0, 1, True, 150, 2.5), (0, 1, 'texto', False, 0, 4.0),
+                    (0, 2, -3, False, 0, 7.25), (1, 1, [0, 2], False, 0, 1.0)):
+            store.append(*row)
+            record(*row)
+        
+        # Una pregunta completa en lote (listas y, si está NumPy, arrays)
+        batches = [(2, [0, 1, 2], [0, None, 3], [True, False, False], [120, 0, 0], [3.0, 9.5, 0.5])]
+        if np is not None:
+            batches.append((3, np.array([2, 0]), np.array([1, 0]), np.array([True, False]),
+                            np.array([200, 0]), np.array([1.5, 6.0])))
+        for question, indexes, answers, correct, points, times in batches:
+            store.extend(question, indexes, answers, correct, points, times)
+            for row in zip(indexes, answers, correct, points, times):
+                record(question, *(value.item() if hasattr(value, 'item') else value for value in row))
+        
+        for index in players:
+            rows = store.rows_for_participant(index)
+            if rows != expected[index]:
+                print(f"✗ Historial reconstruido distinto para {index}: {rows}")
+                return False
+            if (store.scores[index], store.answer_counts[index], store.correct_counts[index]) != (
+                    sum(a['points'] for a in expected[index]), len(expected[index]),
+                    sum(1 for a in expected[index] if a['correct'])):
+                print(f"✗ Totales incorrectos para {index}")
+                return False
+        print("✓ Historial y totales iguales al formato de diccionarios")
+        
+        print("✓ Todas las pruebas de columnas de respuestas completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de columnas de respuestas: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_pause_resume():
+    """Probar el tiempo restante con pausa y tiempos límite por pregunta."""
+    print("\n=== PRUEBAS DE PAUSA Y REANUDACIÓN ===")
+    
+    try:
+        import time
+        from utils.quiz_logic import QuizSession, QuizState
+        
+        quiz = {'id': 'pausa', 'title': 'Pausa', 'question_time_limit': 30,
+                'questions': [{'question': '¿1+1?', 'options': ['1', '2'], 'correct_answer': 1, 'time_limit': 20},
+                              {'question': '¿2+2?', 'options': ['4', '5'], 'correct_answer': 0, 'time_limit': 45},
+                              {'question': '¿3+3?', 'options': ['6', '7'], 'correct_answer': 0}]}
+        scheduler = TimerScheduler(name="TestPauseScheduler")
+        session = QuizSession(quiz, 'PAUSA', scheduler=scheduler)
+        session.add_participant('p0', "Jugador 0")
+        
+        if [entry.time_limit for entry in session.schedule.entries] != [20, 45, 30]:
+            print(f"✗ Cronograma sin tiempos por pregunta: {session.schedule.entries}")
+            return False
+        session._call(session._start_first_question)
+        if not 19.5 < session.get_remaining_time() <= 20:
+            print(f"✗ Tiempo restante inicial: {session.get_remaining_time()}")
+            return False
+        if [q['time_limit'] for q in session.get_upcoming_questions(2)] != [45, 30]:
+            print("✗ Próximas preguntas sin su tiempo límite")
+            return False
+        print("✓ Tiempo límite propio de cada pregunta")
+        
+        time.sleep(0.2)
+        session.pause_quiz()
+        paused = session.get_remaining_time()
+        start_time = session.question_start_time
+        time.sleep(0.3)
+        if session.state != QuizState.PAUSED or session.get_remaining_time() != paused or not 19 < paused < 20:
+            print(f"✗ El tiempo corre durante la pausa: {paused} -> {session.get_remaining_time()}")
+            return False
+        
+        session.resume_quiz()
+        remaining = session.get_remaining_time()
+        if session.state != QuizState.COLLECTING or not paused - 0.1 < remaining <= paused:
+            print(f"✗ Tiempo restante tras reanudar: {paused} -> {remaining}")
+            return False
+        if not 0.25 < session.question_start_time - start_time < 1.0:
+            print("✗ La pausa cuenta en el tiempo de respuesta")
+            return False
+        print("✓ La pausa conserva el tiempo restante y desplaza el plazo")
+        
+        # La pregunta siguiente usa su propio límite, no el de la anterior
+        session.current_question_index = 1
+        session._call(session._start_question)
+        session.pause_quiz()
+        if not 44.5 < session.get_remaining_time() <= 45:
+            print(f"✗ Tiempo restante de la segunda pregunta: {session.get_remaining_time()}")
+            return False
+        print("✓ Pausa en una pregunta con otro tiempo límite")
+        
+        session.cleanup()
+        scheduler.shutdown()
+        print("✓ Todas las pruebas de pausa y reanudación completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de pausa y reanudación: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_session_indexes():
+    """Probar que finalizar una sesión libera sus participantes y sockets."""
+    print("\n=== PRUEBAS DE ÍNDICES DEL GESTOR ===")
+    
+    try:
+        quiz = {'id': 'indices', 'title': 'Índices', 'question_time_limit': 30,
+                'questions': [{'question': '¿1+1?', 'options': ['1', '2'], 'correct_answer': 1}]}
+        scheduler = TimerScheduler(name="TestIndexScheduler")
+        ended = []
+        manager = QuizManager(scheduler=scheduler, on_session_end=ended.append)
+        
+        sessions = {code: manager.get_session(manager.create_session(quiz, code))
+                    for code in ('SALA01', 'SALA02')}
+        for code, players in (('SALA01', ('a0', 'a1', 'a2')), ('SALA02', ('b0',))):
+            for pid in players:
+                sessions[code].add_participant(pid, pid)
+                sid = f"sid-{pid}"
+                sessions[code].set_participant_socket(pid, sid)
+                manager.bind_socket(sid, pid)
+        # a2 se desconectó y b0 (de la otra sala) reconectó con el mismo socket
+        manager.unbind_socket(sessions['SALA02'].set_participant_socket('b0', 'sid-a2'))
+        manager.bind_socket('sid-a2', 'b0')
+        
+        # El cierre del socket anterior ya no desconecta a quien se reconectó
+        if sessions['SALA02'].release_participant_socket('b0', 'sid-b0'):
+            print("✗ Un socket antiguo desconectó al participante")
+            return False
+        manager.unbind_socket('sid-a1')
+        if (not sessions['SALA01'].release_participant_socket('a1', 'sid-a1')
+                or sessions['SALA01'].get_participants_info()[1]['status'] != 'disconnected'):
+            print("✗ Cerrar el socket actual no desconectó al participante")
+            return False
+        
+        if manager.find_participant_session('a1') is not sessions['SALA01']:
+            print("✗ Participante no indexado al unirse")
+            return False
+        
+        manager.end_session('SALA01')
+        if any(pid in manager.participant_sessions for pid in ('a0', 'a1', 'a2')):
+            print(f"✗ Participantes de la sesión finalizada siguen indexados: {manager.participant_sessions}")
+            return False
+        if manager.socket_participants != {'sid-a2': 'b0'}:
+            print(f"✗ Sockets tras finalizar la sesión: {manager.socket_participants}")
+            return False
+        if manager.participant_sessions != {'b0': 'SALA02'} or len(ended) != 1:
+            print("✗ La otra sesión perdió sus índices")
+            return False
+        print("✓ Participantes y sockets de la sesión finalizada liberados")
+        
+        manager.end_session('SALA02')
+        if manager.participant_sessions or manager.socket_participants or manager.active_sessions:
+            print("✗ Quedaron índices tras finalizar todas las sesiones")
+            return False
+        print("✓ Índices vacíos sin sesiones activas")
+        
+        scheduler.shutdown()
+        print("✓ Todas las pruebas de índices del gestor completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de índices del gestor: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_participant_status():
+    """Probar los contadores de estado de los participantes."""
+    print("\n=== PRUEBAS DE ESTADO DE PARTICIPANTES ===")
+    
+    try:
+        from utils.quiz_logic import QuizSession, ParticipantStatus
+        
+        quiz = {'id': 'estado', 'title': 'Estado', 'question_time_limit': 30,
+                'questions': [{'question': '¿1+1?', 'options': ['1', '2'], 'correct_answer': 1}]}
+        scheduler = TimerScheduler(name="TestStatusScheduler")
+        session = QuizSession(quiz, 'ESTADO', scheduler=scheduler)
+        for i in range(3):
+            session.add_participant(f"p{i}", f"Jugador {i}")
+        
+        session._call(session._start_first_question)
+        session.remove_participant('p1')
+        counts = session.status_counts
+        if (counts[ParticipantStatus.WAITING], counts[ParticipantStatus.DISCONNECTED]) != (2, 1):
+            print(f"✗ Contadores tras desconexión: {counts}")
+            return False
+        if 'p1' in session.leaderboard:
+            print("✗ Un participante desconectado sigue en el ranking")
+            return False
+        print("✓ Desconexión descontada y fuera del ranking")
+        
+        # Un desconectado que responde vuelve a estar activo y al ranking
+        session.submit_answer('p1', 1)
+        session.submit_answer('p0', 0)
+        expected = {ParticipantStatus.CONNECTED: 0, ParticipantStatus.DISCONNECTED: 0,
+                    ParticipantStatus.ANSWERED: 2, ParticipantStatus.WAITING: 1}
+        if session.status_counts != expected:
+            print(f"✗ Contadores tras responder: {session.status_counts}")
+            return False
+        if 'p1' not in session.leaderboard or len(session.leaderboard) != 3:
+            print("✗ El participante que volvió no está en el ranking")
+            return False
+        if session.get_resource_usage()['connected'] != 3:
+            print("✗ Conteo de conectados incorrecto")
+            return False
+        print("✓ Contadores y ranking al volver de una desconexión")
+        
+        # Si el único que faltaba por responder se desconecta, la pregunta termina antes
+        session.remove_participant('p2')
+        if session.phase_timer is None or session.phase_timer.remaining() > 1.5:
+            print("✗ La desconexión del último pendiente no adelantó el fin de la pregunta")
+            return False
+        print("✓ Fin anticipado al desconectarse el último pendiente")
+        
+        session.cleanup()
+        scheduler.shutdown()
+        print("✓ Todas las pruebas de estado de participantes completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de estado de participantes: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_vectorized_scoring():
+    """Probar que la puntuación con NumPy coincide con la de Python puro."""
+    print("\n=== PRUEBAS DE PUNTUACIÓN VECTORIZADA ===")
+    
+    try:
+        import utils.quiz_logic as quiz_logic
+        from utils.quiz_logic import QuizSession
+        
+        if quiz_logic.np is None:
+            print("- NumPy no está instalado: se omite la comparación")
+            return True
+        
+        quiz = {'id': 'vector', 'title': 'Vector', 'question_time_limit': 20, 'max_speed_bonus': 50,
+                'questions': [
+                    {'question': 'A', 'options': ['1', '2', '3', '4'], 'correct_answer': 2},
+                    {'question': 'B', 'options': ['1', '2', '3'], 'correct_answer': 0,
+                     'time_limit': 10, 'points': 250},
+                    {'question': 'C', 'options': ['1', '2'], 'correct_answer': 1}
+                ]}
+        participants = 200
+        scheduler = TimerScheduler(name="TestScoringScheduler")
+        sessions = {}
+        for vectorized in (True, False):
+            session = QuizSession(quiz, f"VEC{int(vectorized)}", scheduler=scheduler,
+                                  max_participants=participants)
+            for i in range(participants):
+                session.add_participant(f"p{i}", f"Jugador {i}")
+            sessions[vectorized] = session
+        
+        vectorized_calls = []
+        score_vectorized = sessions[True]._score_answers_vectorized
+        sessions[True]._score_answers_vectorized = lambda *args: vectorized_calls.append(1) or score_vectorized(*args)
+        
+        for question_index in range(3):
+            results = {}
+            for vectorized, session in sessions.items():
+                if question_index == 0:
+                    session._call(session._start_first_question)
+                else:
+                    session._call(session._next_question)
+                
+                # Respuestas variadas, incluidas tardías (fuera del límite) e instantáneas
+                time_limit = session.compiled.time_limits[question_index]
+                options = session.compiled.option_counts[question_index]
+                for i in range(participants):
+                    answer = (i * 7 + question_index) % options
+                    if question_index == 2 and i == 5:
+                        answer = 'otra'  # Respuesta no codificable: fuerza Python puro
+                    elif question_index == 2 and i == 6:
+                        answer = 2 ** 31 - 1  # Fuera de las opciones: no se codifica
+                    response_time = (i % 25) * time_limit / 20
+                    session._call(session._accept_answer, f"p{i}", answer,
+                                  session.question_start_time + response_time)
+                
+                minimum = quiz_logic.VECTORIZE_MIN_ANSWERS
+                quiz_logic.VECTORIZE_MIN_ANSWERS = minimum if vectorized else 10 ** 9
+                try:
+                    results[vectorized] = session._call(session._calculate_question_results)
+                finally:
+                    quiz_logic.VECTORIZE_MIN_ANSWERS = minimum
+            
+            if results[True] != results[False]:
+                print(f"✗ Resultados distintos en la pregunta {question_index + 1}")
+                return False
+        
+        if sessions[True]._uncoded_answers != 2:
+            print("✗ Una respuesta fuera de las opciones se codificó como opción")
+            return False
+        if len(vectorized_calls) != 2:
+            print(f"✗ Preguntas puntuadas con NumPy: {len(vectorized_calls)} (esperadas 2)")
+            return False
+        print("✓ Aciertos, puntos, bonus y distribución idénticos en ambos caminos")
+        
+        vector_session, python_session = sessions[True], sessions[False]
+        if vector_session.get_leaderboard(participants) != python_session.get_leaderboard(participants):
+            print("✗ Rankings distintos")
+            return False
+        for i in range(participants):
+            pid = f"p{i}"
+            if vector_session.get_participant_answers(pid) != python_session.get_participant_answers(pid):
+                print(f"✗ Historial distinto para {pid}")
+                return False
+        print("✓ Totales, ranking e historial idénticos")
+        
+        # Bonus: respuesta inmediata suma el máximo; una tardía solo los puntos base
+        first = vector_session.get_participant_answers('p50')[1]  # B: opción 0 en t=0
+        late = vector_session.get_participant_answers('p22')[0]   # A: opción 2 en t=22 > 20
+        if (first['points'], late['points']) != (300, 100):
+            print(f"✗ Bonus por velocidad incorrecto: {first['points']}, {late['points']}")
+            return False
+        print("✓ Bonus por velocidad con límites por pregunta y respuestas tardías")
+        
+        for session in sessions.values():
+            session.cleanup()
+        scheduler.shutdown()
+        print("✓ Todas las pruebas de puntuación vectorizada completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de puntuación vectorizada: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_state_stream():
+    """Probar el estado versionado de las sesiones."""
+    print("\n=== PRUEBAS DEL ESTADO VERSIONADO ===")
+    
+    try:
+        from utils.state_stream import SessionStateLog
+        
+        log = SessionStateLog(history=3, state='waiting', question_index=-1)
+        
+        if log.record(state='waiting') is not None:
+            print("✗ Se registró un delta sin cambios")
+            return False
+        
+        log.record(state='question', question_index=0)
+        log.record(state='collecting')
+        delta = log.record(state='results')
+        if delta != {'state': 'results', 'seq': 3}:
+            print(f"✗ Delta inesperado: {delta}")
+            return False
+        print("✓ Deltas con solo los campos modificados")
+        
+        changes = log.changes_since(1)
+        if changes != {'state': 'results', 'seq': 3} or log.changes_since(3) != {'seq': 3}:
+            print(f"✗ Cambios combinados incorrectos: {changes}")
+            return False
+        print("✓ Reanudación desde una secuencia conocida")
+        
+        log.record(question_index=1)
+        if log.changes_since(0) is not None or log.changes_since(99) is not None:
+            print("✗ Secuencias fuera del historial deberían requerir estado completo")
+            return False
+        print("✓ Estado completo requerido fuera del historial")
+        
+        print("✓ Todas las pruebas del estado versionado completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas del estado versionado: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_backpressure():
+    """Probar la cola de salida acotada por socket."""
+    print("\n=== PRUEBAS DE CONTROL DE SALIDA ===")
+    
+    try:
+        import queue
+        from types import SimpleNamespace
+        from engineio import packet as eio_packet
+        from web.broadcast import OutboundBackpressure
+        
+        sent = []
+        engine_queue = queue.Queue()
+        scheduled = []
+        disconnected = []
+        server = SimpleNamespace(
+            eio=SimpleNamespace(sockets={'e1': SimpleNamespace(queue=engine_queue)},
+                                disconnect=disconnected.append),
+            _send_eio_packet=lambda eio_sid, pkt: sent.append(pkt.data)
+        )
+        scheduler = SimpleNamespace(schedule=lambda delay, callback: scheduled.append(callback))
+        control = OutboundBackpressure(server, max_queued=2, max_pending=3,
+                                       scheduler=scheduler).install()
+        
+        def emit(event, value):
+            server._send_eio_packet('e1', eio_packet.Packet(
+                eio_packet.MESSAGE, f'2["{event}",{value}]'))
+        
+        emit('question_started', 1)
+        if len(sent) != 1:
+            print("✗ Con la cola vacía el evento debería enviarse directamente")
+            return False
+        print("✓ Envío directo sin retraso")
+        
+        engine_queue.put(1)
+        engine_queue.put(2)  # Cliente lento: la cola de Engine.IO está llena
+        emit('state_change', 1)
+        emit('state_change', 2)
+        emit('answer_submitted', 1)
+        emit('answer_submitted', 2)
+        emit('answer_submitted', 3)
+        stats = control.get_stats()
+        if len(sent) != 1 or stats['coalesced'] != 1 or stats['dropped'] != 1:
+            print(f"✗ Retención incorrecta: {stats}")
+            return False
+        print("✓ Eventos reemplazados y descartados en la cola del socket")
+        
+        engine_queue.get()
+        engine_queue.get()
+        scheduled.pop()()
+        if (sent[1:] != ['2["answer_submitted",1]', '2["answer_submitted",2]']
+                or control.get_stats()['events_pending'] != 1):
+            print(f"✗ Envío de retenidos incorrecto: {sent}")
+            return False
+        print("✓ Retenidos enviados cuando el cliente vacía su cola")
+        
+        # Un envío concurrente mientras se escriben los retenidos no se adelanta
+        send = control._send
+        def racing_send(eio_sid, pkt):
+            if pkt.data == '2["answer_submitted",3]':
+                emit('answer_submitted', 4)
+            send(eio_sid, pkt)
+        control._send = racing_send
+        scheduled.pop()()
+        control._send = send
+        while scheduled:
+            scheduled.pop()()
+        if (sent[-2:] != ['2["answer_submitted",3]', '2["answer_submitted",4]']
+                or control.get_stats()['sockets_backlogged'] != 0):
+            print(f"✗ Orden de envío alterado: {sent[-2:]}")
+            return False
+        print("✓ Orden por socket conservado con envíos concurrentes")
+        
+        # Los eventos con estado no se descartan: con la cola llena se desconecta
+        engine_queue.put(1)
+        engine_queue.put(2)
+        for index in range(4):
+            emit('question_results', index)
+        if disconnected != ['e1'] or control.get_stats()['sockets_backlogged'] != 0:
+            print(f"✗ Eventos con estado descartados en silencio: {control.get_stats()}")
+            return False
+        print("✓ Cliente desconectado en lugar de perder eventos con estado")
+        
+        print("✓ Todas las pruebas de control de salida completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de control de salida: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def _append_history_worker(history_path, worker, count):
+    """Agregar registros al historial desde otro proceso (para test_history_log)."""
+    from utils.history_log import HistoryLog
+    log = HistoryLog(Path(history_path))
+    for i in range(count):
+        log.append('2026-10', {'id': f"w{worker}-{i}", 'worker': worker})
+
+def test_notifications():
+    """Probar el envío en lote de las notificaciones de la sesión."""
+    print("\n=== PRUEBAS DE NOTIFICACIONES ===")
+    
+    import web.app as app_module
+    original = (app_module.socketio, app_module.quiz_manager)
+    try:
+        from types import SimpleNamespace
+        from web.broadcast import EventCoalescer
+        
+        scheduled = []
+        batches = []
+        scheduler = SimpleNamespace(schedule=lambda delay, fn, *args: scheduled.append((fn, args)))
+        notifier = EventCoalescer(lambda *batch: batches.append(batch), 250, scheduler=scheduler)
+        for name in ('Ana', 'Luis', 'Eva'):
+            notifier.add('s1', 'join', {'name': name})
+        notifier.add('s1', 'answer', {'participant_id': 'p1'})
+        for fn, args in scheduled:
+            fn(*args)
+        if len(scheduled) != 2 or [len(items) for _, _, items in batches] != [3, 1]:
+            print(f"✗ Lotes incorrectos: {batches}")
+            return False
+        print("✓ Eventos de una ventana agrupados por tipo")
+        
+        emitted = []
+        app_module.socketio = SimpleNamespace(
+            emit=lambda event, data, room=None: emitted.append((event, room)))
+        app_module.quiz_manager = SimpleNamespace(
+            get_session=lambda session_id: SimpleNamespace(participants={'p1': None, 'p2': None}))
+        app_module.flush_notifications('s1', 'join', [{'name': 'Ana'}, {'name': 'Luis'}])
+        app_module.flush_notifications('s1', 'answer', [{'participant_id': 'p1'}])
+        expected = [
+            ('participant_joined', 's1'),
+            ('admin_participants_joined', 'admin_s1'),
+            ('admin_participant_joined', 'admin_s1'),
+            ('admin_participant_joined', 'admin_s1'),
+            ('participants_answered', 'admin_s1'),
+            ('participant_answered', 'admin_s1'),
+        ]
+        if emitted != expected:
+            print(f"✗ Eventos emitidos inesperados: {emitted}")
+            return False
+        print("✓ Eventos originales de administración conservados junto a los lotes")
+        
+        print("✓ Todas las pruebas de notificaciones completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de notificaciones: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        app_module.socketio, app_module.quiz_manager = original
+
+def test_history_log():
+    """Probar el historial JSONL con índice de desplazamientos."""
+    print("\n=== PRUEBAS DEL HISTORIAL ===")
+    
+    try:
+        import tempfile
+        import multiprocessing
+        from utils.history_log import HistoryLog
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            history_path = Path(temp_dir)
+            log = HistoryLog(history_path)
+            for month, count in (('2026-08', 3), ('2026-09', 2), ('2026-10', 2)):
+                for i in range(count):
+                    log.append(month, {'id': f"{month}-{i}"})
+            
+            latest = [record['id'] for record in log.read_latest(4)]
+            if latest != ['2026-10-1', '2026-10-0', '2026-09-1', '2026-09-0']:
+                print(f"✗ Registros más recientes incorrectos: {latest}")
+                return False
+            print("✓ Últimos N registros recorriendo varios meses")
+            
+            # Índice ausente o truncado: se reconstruye desde el log
+            (history_path / '2026-09.idx').unlink()
+            with open(history_path / '2026-10.idx', 'r+b') as index:
+                index.truncate(8)
+            with open(history_path / '2026-08.idx', 'r+b') as index:
+                index.truncate(13)
+            for reader in (log, HistoryLog(history_path)):
+                latest = [record['id'] for record in reader.read_latest(7)]
+                if latest != ['2026-10-1', '2026-10-0', '2026-09-1', '2026-09-0',
+                              '2026-08-2', '2026-08-1', '2026-08-0']:
+                    print(f"✗ Índice no reconstruido: {latest}")
+                    return False
+            print("✓ Índices ausentes o truncados reconstruidos")
+            
+            # Varios procesos agregando al mismo mes
+            processes = [multiprocessing.Process(target=_append_history_worker,
+                                                 args=(temp_dir, worker, 100))
+                         for worker in range(2)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(30)
+            log.append('2026-10', {'id': 'final'})
+            
+            records = log.read_month('2026-10')
+            index_entries = (history_path / '2026-10.idx').stat().st_size // 8
+            latest = log.read_latest(203)
+            if (len(records) != 203 or index_entries != 203 or len(latest) != 203
+                    or latest[0]['id'] != 'final' or latest[-1]['id'] != '2026-10-0'):
+                print(f"✗ Agregados concurrentes inconsistentes: {len(records)} registros, "
+                      f"{index_entries} entradas")
+                return False
+            print("✓ Agregados desde varios procesos con índice consistente")
+        
+        print("✓ Todas las pruebas del historial completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas del historial: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_storage():
+    """Probar el backend SQLite y la migración desde archivos JSON."""
+    print("\n=== PRUEBAS DE ALMACENAMIENTO ===")
+    
+    try:
+        import tempfile
+        from utils.file_manager import FileManager
+        from utils.json_cache import JSONFileCache
+        from utils.storage import JSONFileStorage, SQLiteStorage, StorageBackend, migrate_storage
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fm = FileManager(temp_dir, cache=JSONFileCache())
+            quiz = {
+                "title": "Quiz SQLite",
+                "questions": [{"question": "¿1 + 1?", "options": ["1", "2"], "correct_answer": 1}]
+            }
+            quiz_id = fm.save_quiz(dict(quiz))
+            fm.save_history_record({"event_type": "quiz_completed", "quiz_id": quiz_id})
+            fm.save_history_record({"event_type": "quiz_completed", "quiz_id": "otro"})
+            session_id = fm.save_session({"quiz_id": quiz_id, "status": "finished"})
+            if fm.load_session(session_id) is None:
+                print("✗ Sesión pendiente de escritura no visible")
+                return False
+            if not fm.flush(timeout=5) or not (fm.sessions_path / f"{session_id}.json").exists():
+                print("✗ La cola de escritura no se vació")
+                return False
+            print("✓ Sesiones e historial escritos en segundo plano")
+
+            # Un registro guardado después de cerrar no queda perdido tras el fin de cola
+            fm.writer.close()
+            fm.save_history_record({"event_type": "quiz_completed", "quiz_id": "otro"})
+            if not fm.writer.flush(timeout=1) or len(fm.load_history_records(10)) != 3:
+                print("✗ Registro guardado tras cerrar la persistencia no escrito")
+                return False
+            print("✓ Registros guardados tras cerrar escritos de inmediato")
+
+            class PartialStorage(StorageBackend):
+                def save_quiz(self, quiz_data):
+                    pass
+            try:
+                PartialStorage()
+                print("✗ Un backend incompleto se pudo instanciar")
+                return False
+            except TypeError:
+                print("✓ Backend incompleto rechazado al instanciarse")
+            
+            sqlite = SQLiteStorage(Path(temp_dir) / 'quiz.db')
+            counts = migrate_storage(JSONFileStorage(fm.data_path, fm.cache), sqlite)
+            if counts != {'quizzes': 1, 'sessions': 1, 'history': 3}:
+                print(f"✗ Migración incompleta: {counts}")
+                return False
+            print("✓ Migración de archivos JSON a SQLite")
+            
+            fm_sqlite = FileManager(temp_dir, cache=fm.cache, storage=sqlite)
+            listed = fm_sqlite.list_quizzes(limit=10)
+            if [q['id'] for q in listed] != [quiz_id] or listed[0]['question_count'] != 1:
+                print(f"✗ Listado SQLite incorrecto: {listed}")
+                return False
+            
+            fm_sqlite.save_quiz(dict(quiz, title="Otro quiz"))
+            history = fm_sqlite.load_history_records(10, quiz_id=quiz_id)
+            if fm_sqlite.count_quizzes() != 2 or len(history) != 1:
+                print("✗ Consultas SQLite incorrectas")
+                return False
+            print("✓ Quizzes e historial consultados en SQLite")
+            
+            if not fm_sqlite.delete_quiz(quiz_id) or fm_sqlite.load_quiz(quiz_id) is not None:
+                print("✗ Eliminación SQLite incorrecta")
+                return False
+            sqlite.close()
+        
+        print("✓ Todas las pruebas de almacenamiento completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de almacenamiento: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_cluster_config():
+    """Probar el reparto de sesiones entre workers."""
+    print("\n=== PRUEBAS DE WORKERS ===")
+    
+    try:
+        from web.cluster import ClusterConfig
+        
+        cluster = ClusterConfig(workers=3, worker_id=1, port=5000)
+        codes = [f"COD{i:03d}" for i in range(60)]
+        owners = {code: cluster.owner_of(code) for code in codes}
+        if set(owners.values()) != {0, 1, 2} or any(cluster.owner_of(code.lower()) != owner
+                                                     for code, owner in owners.items()):
+            print("✗ Reparto de sesiones inestable entre workers")
+            return False
+        
+        foreign = next(code for code, owner in owners.items() if owner == 2)
+        if cluster.owner_base_url(foreign, 'quiz.local') != 'http://quiz.local:5002':
+            print("✗ URL del worker propietario incorrecta")
+            return False
+        print("✓ Cada sesión fijada a un worker propietario")
+        
+        # Bus local: solo quien conoce el secreto publica y recibe, en JSON
+        import queue
+        import secrets
+        import socket
+        import threading
+        import time
+        import types
+        from web.cluster import LocalBusBroker, LocalBusManager, _recv_frame, _send_frame
+        
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            bus_port = probe.getsockname()[1]
+        secret = secrets.token_bytes(32)
+        broker = LocalBusBroker(secret, '127.0.0.1', bus_port)
+        broker.start()
+        url = f'local://127.0.0.1:{bus_port}'
+        
+        listener = LocalBusManager(url, secret=secret)
+        listener.server = types.SimpleNamespace(async_mode='threading', sleep=time.sleep)
+        received = queue.Queue()
+        threading.Thread(target=lambda: [received.put(m) for m in listener._listen()], daemon=True).start()
+        
+        intruder = socket.create_connection(('127.0.0.1', bus_port))
+        _recv_frame(intruder)
+        _send_frame(intruder, b'x' * 32)
+        intruder.settimeout(5)
+        rejected = _recv_frame(intruder) is None
+        intruder.close()
+        
+        deadline = time.time() + 5
+        while len(broker._clients) < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        message = {'method': 'emit', 'event': 'evento', 'data': {'valor': 1}, 'namespace': '/',
+                   'room': 'sala', 'skip_sid': None, 'callback': None, 'host_id': 'otro'}
+        LocalBusManager(url, secret=secret)._publish(message)
+        try:
+            delivered = received.get(timeout=5)
+        except queue.Empty:
+            delivered = None
+        broker.stop()
+        if not rejected or delivered != message:
+            print(f"✗ Bus local sin autenticación o sin entrega JSON: {rejected}, {delivered}")
+            return False
+        print("✓ Bus local autenticado con mensajes JSON firmados")
+        
+        # El servidor embebido del admin de escritorio atiende todo en un proceso
+        cluster.disable()
+        if cluster.enabled or not all(cluster.owns(code) for code in codes) or cluster.socketio_options():
+            print("✗ El modo de un solo proceso no se aplicó")
+            return False
+        print("✓ Modo de un solo proceso para el servidor embebido")
+        
+        print("✓ Todas las pruebas de workers completadas exitosamente")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error en pruebas de workers: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_file_structure():
     """Verificar la estructura de archivos del proyecto."""
     print("\n=== VERIFICACIÓN DE ESTRUCTURA DE ARCHIVOS ===")
@@ -358,7 +1432,22 @@ def main():
         ("Archivos JSON", test_json_files),
         ("FileManager", test_file_manager),
         ("NetworkUtils", test_network_utils),
-        ("QuizManager", test_quiz_manager)
+        ("QuizManager", test_quiz_manager),
+        ("Planificador", test_scheduler),
+        ("Buzón de comandos", test_mailbox),
+        ("Sesión asíncrona", test_async_session),
+        ("Ranking", test_leaderboard),
+        ("Columnas de respuestas", test_answer_store),
+        ("Pausa y reanudación", test_pause_resume),
+        ("Índices del gestor", test_session_indexes),
+        ("Estado de participantes", test_participant_status),
+        ("Puntuación vectorizada", test_vectorized_scoring),
+        ("Estado versionado", test_state_stream),
+        ("Control de salida", test_backpressure),
+        ("Notificaciones", test_notifications),
+        ("Historial", test_history_log),
+        ("Almacenamiento", test_storage),
+        ("Workers", test_cluster_config)
     ]
     
     results = []
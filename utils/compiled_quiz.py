@@ -0,0 +1,120 @@
+"""
+Compilación de quizzes para las sesiones en vivo.
+Convierte los datos JSON de un quiz en una estructura indexada e inmutable
+(claves de respuesta, tiempos, puntos y payloads para participantes) que se
+construye una sola vez al crear la sesión.
+"""
+
+from typing import Any, Dict, NamedTuple, Tuple
+
+class CompiledQuestion(NamedTuple):
+    """Pregunta compilada."""
+    index: int
+    answer_key: Any
+    time_limit: float
+    points: int
+    payload: Dict[str, Any]  # Datos para participantes (sin respuesta correcta); no modificar
+
+class CompiledQuiz(NamedTuple):
+    """Quiz compilado con columnas por pregunta para acceso directo por índice."""
+    title: str
+    questions: Tuple[CompiledQuestion, ...]
+    answer_keys: Tuple[Any, ...]
+    time_limits: Tuple[float, ...]
+    points: Tuple[int, ...]
+    option_counts: Tuple[int, ...]
+    payloads: Tuple[Dict[str, Any], ...]
+
+    @property
+    def question_count(self) -> int:
+        """Número de preguntas del quiz."""
+        return len(self.questions)
+
+def compile_quiz(quiz_data: Dict[str, Any]) -> CompiledQuiz:
+    """
+    Compilar un quiz.
+
+    Los valores 'time_limit' y 'points' de cada pregunta tienen prioridad sobre
+    'question_time_limit' y 'points_for_correct' del quiz.
+
+    Args:
+        quiz_data: Datos del quiz
+
+    Returns:
+        Quiz compilado
+    """
+    default_time_limit = quiz_data.get('question_time_limit', 30)
+    default_points = quiz_data.get('points_for_correct', 100)
+
+    questions = []
+    for index, question in enumerate(quiz_data.get('questions', [])):
+        questions.append(CompiledQuestion(
+            index=index,
+            answer_key=question.get('correct_answer'),
+            time_limit=question.get('time_limit', default_time_limit),
+            points=question.get('points', default_points),
+            payload={
+                'question_index': index,
+                'question': question.get('question', ''),
+                'options': list(question.get('options', []))
+            }
+        ))
+
+    questions = tuple(questions)
+    return CompiledQuiz(
+        title=quiz_data.get('title', 'Quiz sin título'),
+        questions=questions,
+        answer_keys=tuple(q.answer_key for q in questions),
+        time_limits=tuple(q.time_limit for q in questions),
+        points=tuple(q.points for q in questions),
+        option_counts=tuple(len(q.payload['options']) for q in questions),
+        payloads=tuple(q.payload for q in questions)
+    )
+
+class ScheduledQuestion(NamedTuple):
+    """Entrada del cronograma de una pregunta (segundos desde el inicio del quiz)."""
+    index: int
+    start_offset: float
+    deadline_offset: float
+    time_limit: float
+    results_time: float
+    leaderboard_time: float  # 0 si tras esta pregunta no se muestra el ranking
+
+class QuizSchedule(NamedTuple):
+    """Cronograma precalculado de una sesión."""
+    countdown: int
+    entries: Tuple[ScheduledQuestion, ...]
+    total_duration: float
+
+def build_schedule(compiled: CompiledQuiz, countdown: int, results_time: float,
+                   leaderboard_time: float, leaderboard_every: int) -> QuizSchedule:
+    """
+    Precalcular el cronograma de una sesión asumiendo que cada pregunta dura su límite.
+
+    Args:
+        compiled: Quiz compilado
+        countdown: Segundos de cuenta regresiva antes de la primera pregunta
+        results_time: Segundos mostrando los resultados de cada pregunta
+        leaderboard_time: Segundos mostrando el ranking
+        leaderboard_every: Mostrar el ranking cada N preguntas
+
+    Returns:
+        Cronograma de la sesión
+    """
+    entries = []
+    offset = float(countdown)
+
+    for question in compiled.questions:
+        show_leaderboard = (question.index + 1) % leaderboard_every == 0
+        entry = ScheduledQuestion(
+            index=question.index,
+            start_offset=offset,
+            deadline_offset=offset + question.time_limit,
+            time_limit=question.time_limit,
+            results_time=results_time,
+            leaderboard_time=leaderboard_time if show_leaderboard else 0
+        )
+        entries.append(entry)
+        offset = entry.deadline_offset + entry.results_time + entry.leaderboard_time
+
+    return QuizSchedule(countdown=countdown, entries=tuple(entries), total_duration=offset)
@@ -1,6 +1,9 @@
 """
 Utilidades para el manejo de archivos del sistema de quizzes.
-Gestiona el almacenamiento basado en archivos JSON.
+Gestiona la configuración en archivos JSON y delega quizzes, sesiones e
+historial en el backend de almacenamiento configurado ('storage_backend' en
+app_config.json: 'json' o 'sqlite'). La caché y los backends conservan los
+valores congelados; los cargadores públicos devuelven copias editables.
 """
 
 import json
@@ -11,17 +14,24 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 import logging
 
+from utils.json_cache import JSONFileCache, FrozenDict, thaw, get_default_cache
+from utils.storage import StorageBackend, create_storage, DEFAULT_STORAGE_BACKEND
+from utils.persistence import READ_FLUSH_TIMEOUT, WriteBehindWriter
+
 logger = logging.getLogger(__name__)
 
 class FileManager:
     """Gestor de archivos para la plataforma de quizzes."""
     
-    def __init__(self, base_path: Optional[str] = None):
+    def __init__(self, base_path: Optional[str] = None, cache: Optional[JSONFileCache] = None,
+                 storage: Optional[StorageBackend] = None):
         """
         Inicializar el gestor de archivos.
         
         Args:
             base_path: Ruta base del proyecto. Si no se especifica, usa la carpeta del archivo principal.
+            cache: Caché de archivos JSON (por defecto, la compartida del proceso)
+            storage: Backend de almacenamiento (por defecto, el de app_config.json)
         """
         if base_path is None:
             # Obtener la ruta del proyecto (3 niveles arriba desde utils/file_manager.py)
@@ -35,8 +45,20 @@ class FileManager:
         self.history_path = self.data_path / 'history'
         self.config_path = self.data_path / 'config'
         
+        # Guarda los archivos congelados; los cargadores devuelven copias editables
+        self.cache = cache or get_default_cache()
+        
         # Crear directorios si no existen
         self._ensure_directories()
+        
+        # Quizzes, sesiones e historial
+        if storage is None:
+            backend = self.load_config('app_config').get('storage_backend', DEFAULT_STORAGE_BACKEND)
+            storage = create_storage(backend, self.data_path, self.cache)
+        self.storage = storage
+        
+        # Sesiones e historial se escriben en segundo plano
+        self.writer = WriteBehindWriter(self.storage)
     
     def _ensure_directories(self):
         """Asegurar que todos los directorios necesarios existen."""
@@ -64,7 +86,7 @@ class FileManager:
     
     def save_quiz(self, quiz_data: Dict[str, Any]) -> str:
         """
-        Guardar un quiz en el sistema de archivos.
+        Guardar un quiz en el almacenamiento.
         
         Args:
             quiz_data: Datos del quiz a guardar
@@ -72,6 +94,10 @@ class FileManager:
         Returns:
             ID del quiz guardado
         """
+        # Datos congelados (p. ej. recorridos en una migración): se guarda una copia editable
+        if isinstance(quiz_data, FrozenDict):
+            quiz_data = thaw(quiz_data)
+        
         # Asignar ID si no existe
         if 'id' not in quiz_data:
             quiz_data['id'] = self._generate_id()
@@ -83,12 +109,8 @@ class FileManager:
         # Validar estructura básica
         self._validate_quiz_structure(quiz_data)
         
-        # Guardar archivo
-        quiz_file = self.quizzes_path / f"{quiz_data['id']}.json"
-        
         try:
-            with open(quiz_file, 'w', encoding='utf-8') as f:
-                json.dump(quiz_data, f, indent=4, ensure_ascii=False)
+            self.storage.save_quiz(quiz_data)
             
             logger.info(f"Quiz guardado: {quiz_data['id']} - {quiz_data['title']}")
             return quiz_data['id']
@@ -105,61 +127,45 @@ class FileManager:
             quiz_id: ID del quiz a cargar
             
         Returns:
-            Datos del quiz o None si no existe
+            Copia editable de los datos del quiz o None si no existe
         """
-        quiz_file = self.quizzes_path / f"{quiz_id}.json"
-        
-        if not quiz_file.exists():
-            logger.warning(f"Quiz no encontrado: {quiz_id}")
-            return None
-        
         try:
-            with open(quiz_file, 'r', encoding='utf-8') as f:
-                quiz_data = json.load(f)
+            quiz_data = self.storage.load_quiz(quiz_id)
+            
+            if quiz_data is None:
+                logger.warning(f"Quiz no encontrado: {quiz_id}")
+                return None
             
             logger.debug(f"Quiz cargado: {quiz_id}")
-            return quiz_data
+            return thaw(quiz_data)
             
         except Exception as e:
             logger.error(f"Error al cargar quiz {quiz_id}: {e}")
             return None
     
-    def list_quizzes(self) -> List[Dict[str, Any]]:
+    def list_quizzes(self, sort_by: str = 'updated_at', descending: bool = True,
+                     offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Listar todos los quizzes disponibles.
+        Listar los quizzes disponibles sin leer su contenido.
         
+        Args:
+            sort_by: Campo de ordenación ('updated_at', 'created_at', 'title', 'question_count')
+            descending: Orden descendente (por defecto, más reciente primero)
+            offset: Número de quizzes a omitir
+            limit: Número máximo de quizzes (None = todos)
+            
         Returns:
             Lista de metadatos de quizzes
         """
-        quizzes = []
-        
-        for quiz_file in self.quizzes_path.glob("*.json"):
-            try:
-                with open(quiz_file, 'r', encoding='utf-8') as f:
-                    quiz_data = json.load(f)
-                
-                # Extraer solo metadatos básicos
-                quiz_metadata = {
-                    'id': quiz_data['id'],
-                    'title': quiz_data['title'],
-                    'description': quiz_data.get('description', ''),
-                    'question_count': len(quiz_data.get('questions', [])),
-                    'created_at': quiz_data.get('created_at'),
-                    'updated_at': quiz_data.get('updated_at')
-                }
-                
-                quizzes.append(quiz_metadata)
-                
-            except Exception as e:
-                logger.error(f"Error al leer quiz {quiz_file}: {e}")
-                continue
-        
-        # Ordenar por fecha de actualización (más reciente primero)
-        quizzes.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+        quizzes = self.storage.list_quizzes(sort_by, descending, offset, limit)
         
         logger.info(f"Encontrados {len(quizzes)} quizzes")
         return quizzes
     
+    def count_quizzes(self) -> int:
+        """Número total de quizzes (para paginar el listado)."""
+        return self.storage.count_quizzes()
+    
     def delete_quiz(self, quiz_id: str) -> bool:
         """
         Eliminar un quiz del sistema.
@@ -170,14 +176,11 @@ class FileManager:
         Returns:
             True si se eliminó correctamente, False en caso contrario
         """
-        quiz_file = self.quizzes_path / f"{quiz_id}.json"
-        
-        if not quiz_file.exists():
-            logger.warning(f"Quiz no encontrado para eliminar: {quiz_id}")
-            return False
-        
         try:
-            quiz_file.unlink()
+            if not self.storage.delete_quiz(quiz_id):
+                logger.warning(f"Quiz no encontrado para eliminar: {quiz_id}")
+                return False
+            
             logger.info(f"Quiz eliminado: {quiz_id}")
             return True
             
@@ -245,6 +248,8 @@ class FileManager:
         """
         Guardar una sesión de quiz.
         
+        La escritura se hace en segundo plano; flush() espera a que termine.
+        
         Args:
             session_data: Datos de la sesión
             
@@ -257,11 +262,8 @@ class FileManager:
         session_data['created_at'] = session_data.get('created_at', self._get_timestamp())
         session_data['updated_at'] = self._get_timestamp()
         
-        session_file = self.sessions_path / f"{session_data['id']}.json"
-        
         try:
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=4, ensure_ascii=False)
+            self.writer.submit('session', session_data)
             
             logger.info(f"Sesión guardada: {session_data['id']}")
             return session_data['id']
@@ -278,16 +280,14 @@ class FileManager:
             session_id: ID de la sesión
             
         Returns:
-            Datos de la sesión o None si no existe
+            Copia editable de los datos de la sesión o None si no existe
         """
-        session_file = self.sessions_path / f"{session_id}.json"
-        
-        if not session_file.exists():
-            return None
-        
         try:
-            with open(session_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            # Una versión aún no escrita es la más reciente
+            session_data = self.writer.pending_session(session_id)
+            if session_data is None:
+                session_data = self.storage.load_session(session_id)
+            return thaw(session_data) if session_data is not None else None
         except Exception as e:
             logger.error(f"Error al cargar sesión {session_id}: {e}")
             return None
@@ -298,6 +298,8 @@ class FileManager:
         """
         Guardar un registro en el historial.
         
+        La escritura se hace en segundo plano; flush() espera a que termine.
+        
         Args:
             history_data: Datos del registro de historial
             
@@ -309,16 +311,8 @@ class FileManager:
         
         history_data['timestamp'] = self._get_timestamp()
         
-        # Organizar por fecha (año-mes)
-        date_str = datetime.now().strftime("%Y-%m")
-        date_dir = self.history_path / date_str
-        date_dir.mkdir(exist_ok=True)
-        
-        history_file = date_dir / f"{history_data['id']}.json"
-        
         try:
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump(history_data, f, indent=4, ensure_ascii=False)
+            self.writer.submit('history', history_data)
             
             logger.info(f"Registro de historial guardado: {history_data['id']}")
             return history_data['id']
@@ -327,41 +321,46 @@ class FileManager:
             logger.error(f"Error al guardar historial {history_data['id']}: {e}")
             raise
     
-    def load_history_records(self, limit: int = 50) -> List[Dict[str, Any]]:
+    def load_history_records(self, limit: int = 50, quiz_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Cargar registros del historial.
         
         Args:
             limit: Número máximo de registros a cargar
+            quiz_id: Solo registros de este quiz (opcional)
             
         Returns:
-            Lista de registros de historial
+            Lista de registros de historial (del más reciente al más antiguo)
         """
-        records = []
-        
-        # Buscar en todas las carpetas de fecha
-        for date_dir in sorted(self.history_path.iterdir(), reverse=True):
-            if not date_dir.is_dir():
-                continue
-            
-            for history_file in sorted(date_dir.glob("*.json"), reverse=True):
-                if len(records) >= limit:
-                    break
-                
-                try:
-                    with open(history_file, 'r', encoding='utf-8') as f:
-                        record = json.load(f)
-                    records.append(record)
-                except Exception as e:
-                    logger.error(f"Error al leer historial {history_file}: {e}")
-                    continue
-            
-            if len(records) >= limit:
-                break
+        try:
+            # Incluir los registros que todavía están en la cola de escritura
+            if not self.writer.flush(READ_FLUSH_TIMEOUT):
+                logger.warning("Historial leído con escrituras todavía pendientes")
+            records = self.storage.load_history(limit, quiz_id)
+        except Exception as e:
+            logger.error(f"Error al leer historial: {e}")
+            records = []
         
         logger.info(f"Cargados {len(records)} registros de historial")
         return records
     
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que se escriban las sesiones e historial pendientes.
+        
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+            
+        Returns:
+            True si no quedó nada pendiente
+        """
+        return self.writer.flush(timeout)
+    
+    def close(self):
+        """Escribir lo pendiente y liberar el almacenamiento (al cerrar la aplicación)."""
+        self.writer.close()
+        self.storage.close()
+    
     # ===== GESTIÓN DE CONFIGURACIÓN =====
     
     def load_config(self, config_name: str) -> Dict[str, Any]:
@@ -372,7 +371,7 @@ class FileManager:
             config_name: Nombre del archivo de configuración (sin extensión)
             
         Returns:
-            Diccionario de configuración
+            Copia editable del diccionario de configuración
         """
         config_file = self.config_path / f"{config_name}.json"
         
@@ -381,8 +380,7 @@ class FileManager:
             return {}
         
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return thaw(self.cache.load(config_file))
         except Exception as e:
             logger.error(f"Error al cargar configuración {config_name}: {e}")
             return {}
@@ -401,6 +399,7 @@ class FileManager:
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=4, ensure_ascii=False)
             
+            self.cache.invalidate(config_file)
             logger.info(f"Configuración guardada: {config_name}")
             
         except Exception as e:
@@ -412,7 +411,7 @@ class FileManager:
         Cargar la configuración de red desde el archivo network_config.json.
         
         Returns:
-            Diccionario con la configuración de red
+            Diccionario con la configuración de red (copia editable)
         """
         try:
             config_file = self.config_path / 'network_config.json'
@@ -451,11 +450,10 @@ class FileManager:
             file_path: Ruta al archivo JSON
             
         Returns:
-            Diccionario con los datos del archivo
+            Copia editable de los datos del archivo
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return thaw(self.cache.load(file_path))
         except Exception as e:
             logger.error(f"Error al cargar archivo JSON {file_path}: {e}")
             raise
@@ -475,6 +473,7 @@ class FileManager:
             # Guardar datos
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
+            self.cache.invalidate(file_path)
         except Exception as e:
             logger.error(f"Error al guardar archivo JSON {file_path}: {e}")
             raise
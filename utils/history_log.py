@@ -0,0 +1,296 @@
+"""
+Historial en archivos de líneas JSON (JSONL), uno por mes.
+Cada registro se agrega al final de data/history/AAAA-MM.jsonl con una sola
+escritura, y un índice paralelo (AAAA-MM.idx) guarda el desplazamiento de
+inicio de cada línea como entero de 8 bytes. Para leer los N registros más
+recientes basta con leer los últimos N desplazamientos del índice y un único
+tramo final del log, sin listar ni abrir un archivo por registro.
+
+Varios procesos (workers del servidor, escritor en segundo plano) pueden
+compartir la carpeta: cada agregado o lectura toma un bloqueo de archivo
+(.history.lock) además del lock del proceso.
+"""
+
+import os
+import re
+import json
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+LOG_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx'
+
+# Desplazamiento de inicio de cada registro en el log
+_OFFSET = struct.Struct('<Q')
+
+# Carpetas del formato anterior (un archivo JSON por registro)
+_LEGACY_DIR = re.compile(r'^\d{4}-\d{2}$')
+
+# Archivo de bloqueo compartido por los procesos que usan la carpeta
+LOCK_FILE = '.history.lock'
+
+class HistoryLog:
+    """Historial de solo agregado con índice de desplazamientos por mes."""
+
+    def __init__(self, history_path: Path):
+        """
+        Inicializar historial.
+
+        Args:
+            history_path: Carpeta del historial
+        """
+        self.history_path = Path(history_path)
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._validated: Dict[str, Tuple[int, int]] = {}  # {mes: (tamaño log, tamaño índice) comprobados}
+        self._migrate_legacy()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusión entre hilos de este proceso y entre procesos (bloqueo de archivo)."""
+        with self._lock:
+            if self._lock_file is None:
+                self._lock_file = open(self.history_path / LOCK_FILE, 'a+b')
+            fd = self._lock_file.fileno()
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                self._lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    self._lock_file.seek(0)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def _paths(self, month: str):
+        """Rutas del log y del índice de un mes."""
+        return (self.history_path / f"{month}{LOG_SUFFIX}",
+                self.history_path / f"{month}{INDEX_SUFFIX}")
+
+    def append(self, month: str, record: Dict[str, Any]):
+        """
+        Agregar un registro al log de un mes.
+
+        Args:
+            month: Mes en formato AAAA-MM
+            record: Registro serializable a JSON
+        """
+        self.append_many(month, [record])
+
+    def append_many(self, month: str, records: List[Dict[str, Any]], sync: bool = False):
+        """
+        Agregar varios registros al log de un mes con una sola escritura.
+
+        Args:
+            month: Mes en formato AAAA-MM
+            records: Registros serializables a JSON
+            sync: Forzar a disco (fsync) el log y el índice antes de volver
+        """
+        lines = self._encode(records)
+        with self._locked():
+            self._append_locked(month, lines, sync)
+
+    @staticmethod
+    def _encode(records: List[Dict[str, Any]]) -> List[bytes]:
+        """Serializar registros como líneas JSON."""
+        return [(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+                for record in records]
+
+    def _append_locked(self, month: str, lines: List[bytes], sync: bool):
+        """Agregar líneas ya serializadas al log y al índice de un mes (requiere el lock)."""
+        log_file, index_file = self._paths(month)
+
+        self._ensure_index(month)
+        with open(log_file, 'ab') as log:
+            offset = log.seek(0, os.SEEK_END)
+            log.write(b''.join(lines))
+            if sync:
+                log.flush()
+                os.fsync(log.fileno())
+
+        offsets = bytearray()
+        for line in lines:
+            offsets += _OFFSET.pack(offset)
+            offset += len(line)
+        with open(index_file, 'ab') as index:
+            index.write(offsets)
+            if sync:
+                index.flush()
+                os.fsync(index.fileno())
+        self._validated[month] = (offset, index_file.stat().st_size)
+
+    def months(self) -> List[str]:
+        """Meses con historial, del más reciente al más antiguo."""
+        return sorted((name[:-len(LOG_SUFFIX)] for name in os.listdir(self.history_path)
+                       if name.endswith(LOG_SUFFIX)), reverse=True)
+
+    def read_latest(self, limit: int,
+                    predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Leer los registros más recientes.
+
+        Args:
+            limit: Número máximo de registros
+            predicate: Filtro opcional; con filtro se recorre cada mes completo
+
+        Returns:
+            Registros del más reciente al más antiguo
+        """
+        records: List[Dict[str, Any]] = []
+        for month in self.months():
+            if len(records) >= limit:
+                break
+            if predicate is None:
+                records.extend(self._read_month_tail(month, limit - len(records)))
+            else:
+                matches = [record for record in self._read_month_tail(month)
+                           if predicate(record)]
+                records.extend(matches[:limit - len(records)])
+        return records
+
+    def read_month(self, month: str) -> List[Dict[str, Any]]:
+        """Leer todos los registros de un mes, del más antiguo al más reciente."""
+        records = self._read_month_tail(month)
+        records.reverse()
+        return records
+
+    def _read_month_tail(self, month: str, count: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Leer los últimos `count` registros de un mes (del más reciente al más antiguo)."""
+        log_file, index_file = self._paths(month)
+
+        with self._locked():
+            self._ensure_index(month)
+            with open(index_file, 'rb') as index:
+                total = index.seek(0, os.SEEK_END) // _OFFSET.size
+                count = total if count is None else min(count, total)
+                if not count:
+                    return []
+                index.seek((total - count) * _OFFSET.size)
+                start = _OFFSET.unpack(index.read(_OFFSET.size))[0]
+
+            with open(log_file, 'rb') as log:
+                log.seek(start)
+                tail = log.read()
+
+        records = []
+        for line in reversed(tail.splitlines()):
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                logger.error(f"Registro de historial dañado en {log_file.name}: {e}")
+        return records
+
+    def _ensure_index(self, month: str):
+        """
+        Comprobar el índice de un mes y reconstruirlo si no coincide con el log (requiere el lock).
+
+        Si los tamaños del log y del índice no cambiaron desde la última
+        comprobación o escritura de este proceso no se vuelve a leer nada;
+        si otro proceso agregó registros, se comprueba de nuevo la última entrada.
+        """
+        log_file, index_file = self._paths(month)
+        try:
+            signature = (log_file.stat().st_size, self._file_size(index_file))
+        except FileNotFoundError:
+            return  # Mes sin log todavía
+
+        if self._validated.get(month) == signature:
+            return
+        if not self._index_matches(log_file, index_file):
+            logger.warning(f"Reconstruyendo índice del historial {log_file.name}")
+            self._rebuild_index(log_file, index_file)
+            signature = (log_file.stat().st_size, self._file_size(index_file))
+        self._validated[month] = signature
+
+    @staticmethod
+    def _file_size(path: Path) -> Optional[int]:
+        """Tamaño de un archivo (None si no existe)."""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _index_matches(log_file: Path, index_file: Path) -> bool:
+        """El índice es válido si su última entrada apunta a la última línea del log."""
+        log_size = log_file.stat().st_size
+        try:
+            index_size = index_file.stat().st_size
+        except FileNotFoundError:
+            return log_size == 0
+        if index_size % _OFFSET.size:
+            return False
+        if index_size == 0:
+            return log_size == 0
+
+        with open(index_file, 'rb') as index:
+            index.seek(index_size - _OFFSET.size)
+            last = _OFFSET.unpack(index.read(_OFFSET.size))[0]
+        if last >= log_size:
+            return False
+        with open(log_file, 'rb') as log:
+            log.seek(last)
+            tail = log.read()
+        return tail.endswith(b'\n') and tail.count(b'\n') == 1
+
+    @staticmethod
+    def _rebuild_index(log_file: Path, index_file: Path):
+        """Regenerar el índice recorriendo el log una vez."""
+        offsets = bytearray()
+        offset = 0
+        with open(log_file, 'rb') as log:
+            for line in log:
+                if line.endswith(b'\n'):
+                    offsets += _OFFSET.pack(offset)
+                offset += len(line)
+            if offset and not line.endswith(b'\n'):
+                # Última escritura interrumpida: se completa la línea para
+                # que el siguiente registro empiece en una línea nueva
+                with open(log_file, 'ab') as append:
+                    append.write(b'\n')
+        with open(index_file, 'wb') as index:
+            index.write(offsets)
+
+    def _migrate_legacy(self):
+        """Pasar las carpetas AAAA-MM del formato anterior al log de su mes."""
+        legacy_dirs = sorted(entry for entry in self.history_path.iterdir()
+                             if entry.is_dir() and _LEGACY_DIR.match(entry.name))
+        for date_dir in legacy_dirs:
+            # Otro proceso pudo migrarla mientras tanto
+            with self._locked():
+                if date_dir.is_dir():
+                    self._migrate_month(date_dir)
+
+    def _migrate_month(self, date_dir: Path):
+        """Migrar una carpeta del formato anterior (requiere el lock)."""
+        records = []
+        for history_file in date_dir.glob("*.json"):
+            try:
+                with open(history_file, 'r', encoding='utf-8') as f:
+                    records.append(json.load(f))
+            except Exception as e:
+                logger.error(f"Error al leer historial {history_file}: {e}")
+
+        records.sort(key=lambda record: record.get('timestamp', ''))
+        if records:
+            self._append_locked(date_dir.name, self._encode(records), sync=True)
+
+        # Se conserva la carpeta original, renombrada para no migrarla otra vez
+        date_dir.rename(date_dir.with_name(f"{date_dir.name}.legacy"))
+        logger.info(f"Historial {date_dir.name} migrado: {len(records)} registros")
@@ -0,0 +1,150 @@
+"""
+Caché en memoria de archivos JSON validada por fecha de modificación.
+Los cargadores de FileManager consultan esta caché en lugar de releer y
+parsear el archivo en cada llamada; una entrada se invalida en cuanto cambia
+el tamaño o el mtime del archivo. La caché guarda y devuelve los valores
+congelados (FrozenDict y tuplas) para que nadie modifique el objeto
+compartido; los cargadores públicos de FileManager entregan una copia mutable
+con thaw(), con los mismos tipos (dict y list) que json.load.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Archivos que se conservan en memoria como máximo
+DEFAULT_MAX_ENTRIES = 256
+
+class FrozenDict(dict):
+    """
+    Diccionario de solo lectura.
+
+    Sigue siendo un dict (se serializa a JSON y admite get, in, items...),
+    pero cualquier modificación lanza TypeError. copy() devuelve un dict
+    mutable del primer nivel y thaw() una copia mutable completa.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Datos en caché de solo lectura: usar thaw() para obtener una copia editable")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self) -> Dict[str, Any]:
+        """Copia mutable del primer nivel (los valores anidados siguen congelados)."""
+        return dict(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+def freeze(value: Any) -> Any:
+    """Convertir un valor JSON en su versión inmutable."""
+    if isinstance(value, dict):
+        if isinstance(value, FrozenDict):
+            return value
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Obtener una copia mutable (dicts y listas) de un valor congelado."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+class JSONFileCache:
+    """Caché LRU de archivos JSON con invalidación por (mtime, tamaño)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Inicializar caché.
+
+        Args:
+            max_entries: Número máximo de archivos en memoria
+        """
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # {ruta: (mtime, tamaño, valor)}
+        self._lock = threading.Lock()
+
+    def load(self, file_path: Union[str, Path]) -> Any:
+        """
+        Cargar un archivo JSON, desde memoria si no cambió.
+
+        Args:
+            file_path: Ruta al archivo JSON
+
+        Returns:
+            Contenido del archivo congelado
+
+        Raises:
+            OSError: Si el archivo no existe o no se puede leer
+            ValueError: Si el contenido no es JSON válido
+        """
+        key = os.fspath(file_path)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[:2] == signature:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[2]
+                self.stats['invalidations'] += 1
+            self.stats['misses'] += 1
+
+        with open(key, 'r', encoding='utf-8') as f:
+            value = freeze(json.load(f))
+
+        with self._lock:
+            self._entries[key] = signature + (value,)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return value
+
+    def invalidate(self, file_path: Union[str, Path]):
+        """Descartar un archivo (p. ej. tras escribirlo o eliminarlo)."""
+        with self._lock:
+            self._entries.pop(os.fspath(file_path), None)
+
+    def clear(self):
+        """Vaciar la caché."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener contadores de aciertos, fallos, invalidaciones y desalojos."""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), max_entries=self.max_entries)
+
+_default_cache: Optional[JSONFileCache] = None
+_default_lock = threading.Lock()
+
+def get_default_cache() -> JSONFileCache:
+    """Obtener la caché compartida del proceso."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = JSONFileCache()
+        return _default_cache
@@ -0,0 +1,132 @@
+"""
+Índice de ranking incremental para las sesiones de quiz.
+Mantiene a los participantes ordenados por puntuación para que las consultas
+de ranking no tengan que reconstruir y ordenar toda la lista en cada llamada.
+"""
+
+import bisect
+import itertools
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Con más de 1/REBUILD_RATIO de participantes cambiados se reordena todo el índice
+REBUILD_RATIO = 16
+
+class LeaderboardIndex:
+    """
+    Ranking ordenado por puntuación (descendente) y orden de llegada.
+    Un participante que sale y vuelve (reconexión) conserva su orden de llegada.
+
+    Las claves se guardan en una lista ordenada: la posición de un participante
+    se obtiene por búsqueda binaria (O(log n)) y el top-k es un corte O(k).
+    """
+
+    def __init__(self):
+        """Inicializar índice vacío."""
+        self._keys: List[Tuple[int, int, str]] = []  # (-score, orden, participant_id)
+        self._entries: Dict[str, Tuple[int, int, str]] = {}
+        self._join_order: Dict[str, int] = {}  # Se conserva al salir para desempatar al volver
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, participant_id: str) -> bool:
+        return participant_id in self._entries
+
+    def add(self, participant_id: str, score: int = 0):
+        """
+        Agregar participante al ranking.
+
+        Args:
+            participant_id: ID del participante
+            score: Puntuación inicial
+        """
+        with self._lock:
+            if participant_id in self._entries:
+                return
+            order = self._join_order.get(participant_id)
+            if order is None:
+                order = self._join_order[participant_id] = next(self._order)
+            key = (-score, order, participant_id)
+            self._entries[participant_id] = key
+            bisect.insort(self._keys, key)
+
+    def remove(self, participant_id: str):
+        """Quitar participante del ranking (no falla si no está)."""
+        with self._lock:
+            key = self._entries.pop(participant_id, None)
+            if key is not None:
+                del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def update(self, participant_id: str, score: int):
+        """
+        Actualizar la puntuación de un participante.
+
+        Args:
+            participant_id: ID del participante
+            score: Nueva puntuación total
+        """
+        with self._lock:
+            key = self._entries.get(participant_id)
+            if key is None or key[0] == -score:
+                return
+            del self._keys[bisect.bisect_left(self._keys, key)]
+            new_key = (-score, key[1], participant_id)
+            self._entries[participant_id] = new_key
+            bisect.insort(self._keys, new_key)
+
+    def update_many(self, scores: Iterable[Tuple[str, int]]):
+        """
+        Actualizar varias puntuaciones de una vez (todas las de una pregunta).
+
+        Con pocos cambios se mueve cada clave; con muchos se reordena la lista
+        completa, que ya está casi ordenada.
+
+        Args:
+            scores: Pares (participant_id, puntuación total)
+        """
+        with self._lock:
+            changed = []
+            for participant_id, score in scores:
+                key = self._entries.get(participant_id)
+                if key is None or key[0] == -score:
+                    continue
+                new_key = (-score, key[1], participant_id)
+                self._entries[participant_id] = new_key
+                changed.append((key, new_key))
+
+            if len(changed) * REBUILD_RATIO < len(self._keys):
+                for key, new_key in changed:
+                    del self._keys[bisect.bisect_left(self._keys, key)]
+                    bisect.insort(self._keys, new_key)
+            elif changed:
+                self._keys = sorted(self._entries.values())
+
+    def rank(self, participant_id: str) -> Optional[int]:
+        """
+        Obtener la posición (1 = primero) de un participante.
+
+        Returns:
+            Posición en el ranking o None si no está en el índice
+        """
+        with self._lock:
+            key = self._entries.get(participant_id)
+            if key is None:
+                return None
+            return bisect.bisect_left(self._keys, key) + 1
+
+    def top(self, limit: int) -> List[Tuple[str, int]]:
+        """
+        Obtener los primeros participantes del ranking.
+
+        Args:
+            limit: Número máximo de participantes
+
+        Returns:
+            Lista de tuplas (participant_id, score) en orden de ranking
+        """
+        with self._lock:
+            return [(participant_id, -neg_score)
+                    for neg_score, _, participant_id in self._keys[:max(0, limit)]]
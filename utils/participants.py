@@ -0,0 +1,233 @@
+"""
+Estructuras compactas para participantes y respuestas de una sesión de quiz.
+Los participantes usan registros con __slots__ y las respuestas se guardan en
+columnas (arrays) por sesión en lugar de listas de diccionarios por jugador.
+Los totales de cada participante (puntuación, respuestas y aciertos) también
+son columnas del AnswerStore, de modo que un lote de respuestas se acumula de
+una sola vez.
+"""
+
+from array import array
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él las columnas se llenan fila a fila
+    np = None
+
+# Código de columna para respuestas que no son un índice de opción
+UNCODED_ANSWER = -1
+
+def answer_code(answer: Any, option_count: Optional[int] = None) -> int:
+    """
+    Código de una respuesta en la columna de respuestas.
+
+    Args:
+        answer: Respuesta recibida
+        option_count: Opciones de la pregunta; si se indica, solo 0..option_count-1
+                      son índices de opción (el código acota la distribución)
+
+    Returns:
+        Índice de opción o UNCODED_ANSWER
+    """
+    limit = 2 ** 31 if option_count is None else option_count
+    if type(answer) is int and 0 <= answer < limit:
+        return answer
+    return UNCODED_ANSWER
+
+class Participant:
+    """Registro de un participante de la sesión."""
+
+    __slots__ = ('index', 'id', 'name', 'status', 'join_time', 'last_seen',
+                 'socket_id', 'score_seq', 'extra', '_totals')
+
+    def __init__(self, index: int, participant_id: str, name: str, status: Enum,
+                 join_time: float, totals: 'AnswerStore', extra: Optional[Dict[str, Any]] = None):
+        """
+        Inicializar registro de participante.
+
+        Args:
+            index: Posición del participante en la sesión (fila en las columnas)
+            participant_id: ID único del participante
+            name: Nombre visible
+            status: Estado inicial
+            join_time: Momento de ingreso (epoch)
+            totals: AnswerStore de la sesión, que guarda sus totales en la fila `index`
+            extra: Datos adicionales opcionales
+        """
+        self.index = index
+        self.id = participant_id
+        self.name = name
+        self.status = status
+        self.join_time = join_time
+        self.last_seen = join_time
+        self.socket_id = None
+        self.score_seq = 0  # Secuencia de estado en la que cambió su puntuación
+        self.extra = extra
+        self._totals = totals
+
+    @property
+    def score(self) -> int:
+        """Puntuación acumulada."""
+        return self._totals.scores[self.index]
+
+    @property
+    def answers_count(self) -> int:
+        """Preguntas respondidas."""
+        return self._totals.answer_counts[self.index]
+
+    @property
+    def correct_answers(self) -> int:
+        """Respuestas correctas."""
+        return self._totals.correct_counts[self.index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Vista serializable del participante (para admin y eventos)."""
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status.value,
+            'score': self.score,
+            'answers_count': self.answers_count,
+            'correct_answers': self.correct_answers,
+            'join_time': self.join_time,
+            'last_seen': self.last_seen,
+            'socket_id': self.socket_id
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+class AnswerStore:
+    """
+    Historial de respuestas de una sesión organizado por columnas.
+
+    Cada respuesta es una fila; las respuestas que no son un índice de opción
+    (enteros no negativos) se guardan aparte y su columna vale UNCODED_ANSWER.
+    Los totales por participante son columnas indexadas por Participant.index.
+    """
+
+    def __init__(self):
+        """Inicializar columnas vacías."""
+        self.question_index = array('i')
+        self.participant_index = array('i')
+        self.answer = array('i')
+        self.correct = array('b')
+        self.points = array('i')
+        self.response_time = array('d')
+        self._raw_answers: Dict[int, Any] = {}  # {fila: respuesta no codificable}
+
+        # Totales por participante
+        self.scores = array('q')
+        self.answer_counts = array('i')
+        self.correct_counts = array('i')
+        self._rows_by_participant: List[array] = []  # Filas de cada participante
+
+    def __len__(self) -> int:
+        return len(self.question_index)
+
+    def add_participant(self) -> int:
+        """
+        Reservar la fila de totales de un participante nuevo.
+
+        Returns:
+            Índice del participante en las columnas de totales
+        """
+        self.scores.append(0)
+        self.answer_counts.append(0)
+        self.correct_counts.append(0)
+        self._rows_by_participant.append(array('i'))
+        return len(self.scores) - 1
+
+    def append(self, question_index: int, participant_index: int, answer: Any,
+               correct: bool, points: int, response_time: float):
+        """Agregar una respuesta al historial y a los totales del participante."""
+        row = len(self.answer)
+        code = answer_code(answer)
+        if code == UNCODED_ANSWER:
+            self._raw_answers[row] = answer
+        self.answer.append(code)
+        self._rows_by_participant[participant_index].append(row)
+
+        self.question_index.append(question_index)
+        self.participant_index.append(participant_index)
+        self.correct.append(1 if correct else 0)
+        self.points.append(points)
+        self.response_time.append(response_time)
+
+        self.answer_counts[participant_index] += 1
+        if correct:
+            self.correct_counts[participant_index] += 1
+        self.scores[participant_index] += points
+
+    def extend(self, question_index: int, participant_indexes: Sequence[int], answers: Sequence[Any],
+               correct: Sequence[bool], points: Sequence[int], response_times: Sequence[float]):
+        """
+        Agregar las respuestas de una pregunta (un participante responde una vez).
+
+        Con arrays de NumPy (respuestas ya codificadas) las columnas y los
+        totales se actualizan en bloque; con listas se agregan fila a fila.
+
+        Args:
+            question_index: Pregunta respondida
+            participant_indexes: Índice de cada participante
+            answers: Respuestas (códigos de opción si se pasan arrays)
+            correct: Corrección de cada respuesta
+            points: Puntos de cada respuesta
+            response_times: Tiempo de respuesta de cada una
+        """
+        if np is None or not isinstance(points, np.ndarray):
+            for row in zip(participant_indexes, answers, correct, points, response_times):
+                self.append(question_index, *row)
+            return
+
+        count = len(points)
+        first_row = len(self.answer)
+        participant_indexes = np.asarray(participant_indexes, dtype=np.intp)
+        for row, participant_index in enumerate(participant_indexes.tolist(), first_row):
+            self._rows_by_participant[participant_index].append(row)
+        self.question_index.frombytes(np.full(count, question_index, dtype=np.int32).tobytes())
+        self.participant_index.frombytes(participant_indexes.astype(np.int32).tobytes())
+        self.answer.frombytes(np.asarray(answers, dtype=np.int32).tobytes())
+        self.correct.frombytes(np.asarray(correct, dtype=np.int8).tobytes())
+        self.points.frombytes(np.asarray(points, dtype=np.int32).tobytes())
+        self.response_time.frombytes(np.asarray(response_times, dtype=np.float64).tobytes())
+
+        # Vistas sobre las columnas de totales; se liberan antes de volver
+        # porque un array con vistas exportadas no puede crecer
+        scores = np.frombuffer(self.scores, dtype=np.int64)
+        answer_counts = np.frombuffer(self.answer_counts, dtype=np.int32)
+        correct_counts = np.frombuffer(self.correct_counts, dtype=np.int32)
+        scores[participant_indexes] += points
+        answer_counts[participant_indexes] += 1
+        correct_counts[participant_indexes] += np.asarray(correct, dtype=np.int32)
+        del scores, answer_counts, correct_counts
+
+    def get_answer(self, row: int) -> Any:
+        """Obtener la respuesta original de una fila."""
+        code = self.answer[row]
+        return self._raw_answers.get(row) if code == UNCODED_ANSWER else code
+
+    def rows_for_participant(self, participant_index: int) -> List[Dict[str, Any]]:
+        """
+        Reconstruir el historial de respuestas de un participante.
+
+        Solo recorre las filas del participante, no todo el historial.
+
+        Args:
+            participant_index: Índice del participante en la sesión
+
+        Returns:
+            Lista de respuestas en el formato de historial
+        """
+        return [
+            {
+                'question_index': self.question_index[row],
+                'answer': self.get_answer(row),
+                'correct': bool(self.correct[row]),
+                'points': self.points[row],
+                'response_time': self.response_time[row]
+            }
+            for row in self._rows_by_participant[participant_index]
+        ]
@@ -0,0 +1,182 @@
+"""
+Persistencia diferida (write-behind) de sesiones e historial.
+Guardar una sesión o un registro de historial solo encola una copia
+congelada del registro; un hilo de fondo agrupa los pendientes y los escribe
+en lotes en el backend de almacenamiento, de modo que el flujo del quiz (los
+manejadores de SocketIO y los temporizadores) no espera al disco.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from utils.json_cache import freeze
+
+logger = logging.getLogger(__name__)
+
+# Registros pendientes como máximo; con la cola llena, quien guarda espera
+DEFAULT_MAX_PENDING = 1000
+
+# Registros escritos como máximo en cada lote
+DEFAULT_BATCH_SIZE = 100
+
+# Espera máxima de las lecturas que deben incluir lo encolado (historial)
+READ_FLUSH_TIMEOUT = 5.0
+
+class WriteBehindWriter:
+    """Cola acotada de escrituras con un hilo escritor por lotes."""
+
+    def __init__(self, storage, max_pending: int = DEFAULT_MAX_PENDING,
+                 batch_size: int = DEFAULT_BATCH_SIZE, name: str = "WriteBehindWriter"):
+        """
+        Inicializar escritor.
+
+        Args:
+            storage: Backend de almacenamiento (con write_batch)
+            max_pending: Tamaño máximo de la cola
+            batch_size: Registros por lote
+            name: Nombre del hilo escritor
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self.name = name
+        self.stats = {'submitted': 0, 'written': 0, 'batches': 0, 'failed': 0, 'waited': 0}
+        self._queue: 'queue.Queue[Tuple[str, Dict[str, Any]]]' = queue.Queue(maxsize=max_pending)
+        self._pending_sessions: Dict[str, Dict[str, Any]] = {}  # {id: última versión sin escribir}
+        self._done = threading.Condition()
+        self._submit_lock = threading.Lock()  # Comprobación de cierre y encolado juntos
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _ensure_running(self):
+        """Arrancar el hilo escritor con el primer registro."""
+        with self._done:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def submit(self, kind: str, record: Dict[str, Any]):
+        """
+        Encolar un registro para escribirlo en segundo plano.
+
+        Con el escritor ya cerrado el registro se escribe en el hilo que llama.
+
+        Args:
+            kind: 'session' o 'history'
+            record: Registro completo (con ID); se guarda una copia congelada
+        """
+        record = freeze(record)
+        with self._submit_lock:
+            with self._done:
+                self.stats['submitted'] += 1
+                if kind == 'session' and not self._closed:
+                    self._pending_sessions[record['id']] = record
+
+            if not self._closed:
+                self._ensure_running()
+                try:
+                    self._queue.put_nowait((kind, record))
+                except queue.Full:
+                    # Disco más lento que el ritmo de escrituras: se espera para no
+                    # perder registros ni crecer sin límite en memoria (el hilo
+                    # escritor vacía la cola sin tomar este lock)
+                    with self._done:
+                        self.stats['waited'] += 1
+                    self._queue.put((kind, record))
+                return
+
+        # Escritor cerrado (salida de la aplicación): nada puede encolarse
+        # detrás del fin de cola, así que se escribe en este hilo
+        self._write([(kind, record)])
+
+    def pending_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Versión de una sesión que todavía no se escribió (None si no hay)."""
+        with self._done:
+            return self._pending_sessions.get(session_id)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que se escriba todo lo encolado hasta ahora.
+
+        Returns:
+            True si se escribió todo antes del plazo
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._done:
+            target = self.stats['submitted']
+            while self.stats['written'] + self.stats['failed'] < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Escribir los pendientes y detener el hilo (al cerrar la aplicación)."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Quedaron escrituras pendientes al cerrar la persistencia")
+
+    def _run(self):
+        """Bucle del hilo escritor."""
+        while True:
+            item = self._queue.get()
+            stop = item is None
+            batch: List[Tuple[str, Dict[str, Any]]] = [] if stop else [item]
+
+            # Agrupar lo que ya esté encolado
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Escribir un lote en el backend."""
+        sessions: Dict[str, Dict[str, Any]] = {}
+        history: List[Dict[str, Any]] = []
+        for kind, record in batch:
+            if kind == 'session':
+                sessions[record['id']] = record  # Solo la última versión de cada sesión
+            else:
+                history.append(record)
+
+        try:
+            self.storage.write_batch(list(sessions.values()), history)
+            failed = False
+        except Exception as e:
+            logger.error(f"Error al escribir lote de persistencia ({len(batch)} registros): {e}")
+            failed = True
+
+        with self._done:
+            self.stats['failed' if failed else 'written'] += len(batch)
+            self.stats['batches'] += 1
+            for session_id, record in sessions.items():
+                if self._pending_sessions.get(session_id) is record:
+                    del self._pending_sessions[session_id]
+            self._done.notify_all()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener contadores de registros encolados, escritos y fallidos."""
+        with self._done:
+            return dict(self.stats, queued=self._queue.qsize())
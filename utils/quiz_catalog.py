@@ -0,0 +1,183 @@
+"""
+Índice persistente del catálogo de quizzes.
+Guarda los metadatos de cada quiz (título, descripción, número de preguntas,
+fechas) junto con el tamaño y la fecha de modificación de su archivo, de modo
+que listar el catálogo no requiere abrir ni parsear los quizzes: solo se
+vuelven a leer los archivos que cambiaron fuera de FileManager.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato del índice; si cambia, el índice se reconstruye
+CATALOG_VERSION = 1
+
+# Campos por los que se puede ordenar el listado
+SORT_FIELDS = ('updated_at', 'created_at', 'title', 'question_count')
+
+class QuizCatalog:
+    """Índice de metadatos de los quizzes validado por tamaño y mtime."""
+
+    def __init__(self, quizzes_path: Path, index_file: Path):
+        """
+        Inicializar catálogo.
+
+        Args:
+            quizzes_path: Carpeta con los archivos de quizzes
+            index_file: Archivo del índice (fuera de la carpeta de quizzes)
+        """
+        self.quizzes_path = Path(quizzes_path)
+        self.index_file = Path(index_file)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None  # {archivo: entrada}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def metadata(quiz_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extraer los metadatos que se muestran en el listado."""
+        return {
+            'id': quiz_data['id'],
+            'title': quiz_data['title'],
+            'description': quiz_data.get('description', ''),
+            'question_count': len(quiz_data.get('questions', [])),
+            'created_at': quiz_data.get('created_at'),
+            'updated_at': quiz_data.get('updated_at')
+        }
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Cargar el índice en memoria (una sola lectura del archivo)."""
+        if self._entries is None:
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index.get('version') != CATALOG_VERSION:
+                    raise ValueError(f"versión {index.get('version')}")
+                self._entries = index['entries']
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Índice de quizzes no válido ({e}), se reconstruirá")
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        """Escribir el índice de forma atómica."""
+        temp_file = self.index_file.with_suffix('.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': CATALOG_VERSION, 'entries': self._entries}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_file, self.index_file)
+        except OSError as e:
+            logger.error(f"Error al guardar índice de quizzes: {e}")
+
+    def _read_entry(self, quiz_file: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Leer los metadatos de un archivo de quiz."""
+        try:
+            with open(quiz_file, 'r', encoding='utf-8') as f:
+                quiz_data = json.load(f)
+            entry = self.metadata(quiz_data)
+        except Exception as e:
+            logger.error(f"Error al leer quiz {quiz_file}: {e}")
+            return None
+        entry['mtime'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        return entry
+
+    def update(self, quiz_data: Dict[str, Any]):
+        """Registrar un quiz recién guardado por FileManager."""
+        quiz_file = self.quizzes_path / f"{quiz_data['id']}.json"
+        with self._lock:
+            entries = self._load()
+            try:
+                stat = quiz_file.stat()
+            except OSError:
+                return
+            entries[quiz_file.name] = dict(self.metadata(quiz_data),
+                                           mtime=stat.st_mtime_ns, size=stat.st_size)
+            self._save()
+
+    def remove(self, quiz_id: str):
+        """Quitar un quiz eliminado del índice."""
+        with self._lock:
+            if self._load().pop(f"{quiz_id}.json", None) is not None:
+                self._save()
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Validar el índice contra la carpeta de quizzes.
+
+        Solo consulta tamaño y mtime de cada archivo; los que son nuevos o
+        cambiaron se vuelven a leer y los que ya no existen se descartan.
+
+        Returns:
+            Entradas vigentes del índice
+        """
+        with self._lock:
+            entries = self._load()
+            changed = False
+            seen = set()
+
+            with os.scandir(self.quizzes_path) as scan:
+                for item in scan:
+                    if not item.name.endswith('.json') or not item.is_file():
+                        continue
+                    seen.add(item.name)
+                    stat = item.stat()
+                    entry = entries.get(item.name)
+                    if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                        continue
+
+                    entry = self._read_entry(Path(item.path), stat)
+                    if entry is None:
+                        changed = entries.pop(item.name, None) is not None or changed
+                        continue
+                    entries[item.name] = entry
+                    changed = True
+
+            for name in [name for name in entries if name not in seen]:
+                del entries[name]
+                changed = True
+
+            if changed:
+                self._save()
+            return entries
+
+    def list(self, sort_by: str = 'updated_at', descending: bool = True,
+             offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Listar metadatos de quizzes ordenados y paginados.
+
+        Args:
+            sort_by: Campo de ordenación (ver SORT_FIELDS)
+            descending: Orden descendente
+            offset: Número de quizzes a omitir
+            limit: Número máximo de quizzes (None = todos)
+
+        Returns:
+            Lista de metadatos de quizzes
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Campo de ordenación no válido: {sort_by}")
+
+        entries = self.refresh()
+        quizzes = [{key: value for key, value in entry.items() if key not in ('mtime', 'size')}
+                   for entry in entries.values()]
+
+        if sort_by == 'title':
+            quizzes.sort(key=lambda x: (x.get('title') or '').lower(), reverse=descending)
+        else:
+            quizzes.sort(key=lambda x: x.get(sort_by) or (0 if sort_by == 'question_count' else ''),
+                         reverse=descending)
+
+        end = None if limit is None else offset + limit
+        return quizzes[offset:end]
+
+    def count(self) -> int:
+        """Número de quizzes del catálogo."""
+        return len(self.refresh())
@@ -5,15 +5,55 @@ Gestiona las reglas de juego, puntuación y flujo de las sesiones.
 
 import time
 import threading
+import asyncio
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 import random
 import string
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from enum import Enum
 import logging
 
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se puntúa en Python puro
+    np = None
+
+from utils.compiled_quiz import CompiledQuiz, QuizSchedule, build_schedule, compile_quiz
+from utils.leaderboard import LeaderboardIndex
+from utils.participants import Participant, AnswerStore, answer_code, UNCODED_ANSWER
+from utils.scheduler import TimerScheduler, TimerHandle, get_default_scheduler
+from utils.state_stream import SessionStateLog
+
 logger = logging.getLogger(__name__)
 
+# Número mínimo de respuestas para usar la puntuación vectorizada con NumPy
+VECTORIZE_MIN_ANSWERS = 64
+
+# Capacidad por defecto de una sesión si no se configura otra
+DEFAULT_MAX_PARTICIPANTS = 50
+
+# Cuenta regresiva inicial y frecuencia del ranking intermedio
+COUNTDOWN_SECONDS = 3
+LEADERBOARD_EVERY = 3
+
+# Hilos que procesan los buzones despertados por un temporizador
+MAILBOX_WORKERS = 4
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+def get_default_executor() -> ThreadPoolExecutor:
+    """Obtener el pool compartido que procesa los buzones de las sesiones."""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(max_workers=MAILBOX_WORKERS,
+                                                   thread_name_prefix="QuizMailbox")
+        return _default_executor
+
 class QuizState(Enum):
     """Estados posibles de un quiz."""
     WAITING = "waiting"          # Esperando participantes
@@ -35,15 +75,26 @@ class ParticipantStatus(Enum):
 class QuizSession:
     """Gestiona una sesión de quiz en vivo."""
     
-    def __init__(self, quiz_data: Dict[str, Any], session_id: str):
+    def __init__(self, quiz_data: Dict[str, Any], session_id: str,
+                 scheduler: Optional[TimerScheduler] = None,
+                 max_participants: Optional[int] = None,
+                 compiled_quiz: Optional[CompiledQuiz] = None,
+                 executor: Optional[Executor] = None):
         """
         Inicializar sesión de quiz.
         
         Args:
             quiz_data: Datos del quiz
             session_id: ID único de la sesión
+            scheduler: Planificador de temporizadores (por defecto el compartido del proceso)
+            max_participants: Capacidad de la sesión; si no se indica se usa
+                              'max_participants' del quiz o DEFAULT_MAX_PARTICIPANTS
+            compiled_quiz: Quiz ya compilado (si no se indica se compila aquí)
+            executor: Pool que procesa el buzón tras una expiración (por
+                      defecto el compartido del proceso)
         """
         self.quiz_data = quiz_data
+        self.compiled = compiled_quiz or compile_quiz(quiz_data)
         self.session_id = session_id
         self.state = QuizState.WAITING
         
@@ -51,36 +102,71 @@ class QuizSession:
         self.current_question_index = -1
         self.question_start_time = None
         self.question_end_time = None
+        self.question_deadline = None  # Momento (epoch) en que vence la pregunta actual
+        
+        # Estado versionado para clientes (deltas con número de secuencia)
+        self.state_log = SessionStateLog(
+            state=self.state.value,
+            question_index=-1,
+            deadline=None,
+            scored_question=-1,
+            total_questions=self.compiled.question_count
+        )
         
         # Participantes
-        self.participants = {}  # {participant_id: ParticipantData}
-        self.max_participants = 50
+        self.participants: Dict[str, Participant] = {}  # {participant_id: Participant}
+        self.answer_store = AnswerStore()  # Historial de respuestas por columnas
+        self.max_participants = int(
+            max_participants or quiz_data.get('max_participants') or DEFAULT_MAX_PARTICIPANTS
+        )
+        self.leaderboard = LeaderboardIndex()  # Ranking de participantes conectados
+        self.status_counts = {status: 0 for status in ParticipantStatus}  # {status: n}
         
         # Respuestas de la pregunta actual
         self.current_answers = {}  # {participant_id: answer_data}
+        self._reset_answer_columns()
         
         # Configuración
         self.settings = {
             'question_time_limit': quiz_data.get('question_time_limit', 30),
             'show_results_time': quiz_data.get('show_results_time', 5),
+            'show_leaderboard_time': quiz_data.get('show_leaderboard_time', 5),
             'allow_late_join': quiz_data.get('allow_late_join', True),
             'points_for_correct': quiz_data.get('points_for_correct', 100),
             'speed_bonus_enabled': quiz_data.get('speed_bonus_enabled', True),
             'max_speed_bonus': quiz_data.get('max_speed_bonus', 50)
         }
         
+        # Cronograma precalculado (tiempos por pregunta, resultados y ranking)
+        self.schedule: QuizSchedule = build_schedule(
+            self.compiled,
+            countdown=COUNTDOWN_SECONDS,
+            results_time=self.settings['show_results_time'],
+            leaderboard_time=self.settings['show_leaderboard_time'],
+            leaderboard_every=LEADERBOARD_EVERY
+        )
+        
         # Callbacks para eventos
         self.event_callbacks = {}
         
-        # Control de threading
-        self.timer_thread = None
-        self.timer_lock = threading.Lock()
+        # Control de temporizadores (un único plazo activo por fase)
+        self.scheduler = scheduler or get_default_scheduler()
+        self.phase_timer: Optional[TimerHandle] = None
+        self.phase_seq = 0  # Invalida expiraciones de fases ya reemplazadas
+        self.paused_remaining = None
+        self.paused_at = None
+        
+        # Buzón de comandos: todas las mutaciones se procesan en orden, de una en una
+        self._mailbox = deque()  # [(tipo, comando, args, kwargs, future)]
+        self._drain_lock = threading.Lock()
+        self._drain_owner = None
+        self.executor = executor or get_default_executor()
         
         # Estadísticas
         self.stats = {
             'start_time': None,
             'end_time': None,
-            'total_questions': len(quiz_data.get('questions', [])),
+            'total_questions': self.compiled.question_count,
             'questions_completed': 0,
             'participants_joined': 0,
             'total_answers': 0
@@ -109,6 +195,105 @@ class QuizSession:
                 except Exception as e:
                     logger.error(f"Error en callback {event}: {e}")
     
+    # ===== BUZÓN DE COMANDOS =====
+    
+    def _call(self, command: Callable, *args, **kwargs) -> Any:
+        """
+        Encolar un comando en el buzón y esperar su resultado.
+        
+        Si el hilo actual ya está procesando el buzón (por ejemplo, un callback
+        de evento que invoca la API pública) el comando se ejecuta en línea.
+        """
+        if self._drain_owner == threading.get_ident():
+            return command(*args, **kwargs)
+        
+        future = self._enqueue('command', command, args, kwargs)
+        self._drain()
+        return future.result()
+    
+    def _enqueue(self, kind: str, command: Optional[Callable], args: tuple,
+                 kwargs: Optional[Dict[str, Any]] = None) -> Future:
+        """Encolar un mensaje en el buzón sin procesarlo y devolver el futuro de su resultado."""
+        future = Future()
+        self._mailbox.append((kind, command, args, kwargs or {}, future))
+        return future
+    
+    def _post(self, command: Callable, *args):
+        """
+        Encolar un comando sin esperar su resultado (expiraciones de temporizador).
+        
+        Solo encola: el buzón se procesa en el pool de la sesión, de modo que
+        el hilo del planificador (compartido por todas las sesiones) no
+        puntúa ni emite eventos.
+        """
+        self._mailbox.append(('command', command, args, {}, None))
+        self.executor.submit(self._drain)
+    
+    def _drain(self):
+        """
+        Procesar el buzón si ningún otro hilo lo está haciendo.
+        
+        El hilo que obtiene el lock procesa todos los mensajes pendientes,
+        incluidos los encolados por otros hilos mientras tanto.
+        """
+        while self._mailbox:
+            if not self._drain_lock.acquire(blocking=False):
+                return
+            
+            self._drain_owner = threading.get_ident()
+            try:
+                self._process_mailbox()
+            finally:
+                self._drain_owner = None
+                self._drain_lock.release()
+    
+    def _process_mailbox(self):
+        """Ejecutar en orden los mensajes del buzón, agrupando respuestas consecutivas."""
+        mailbox = self._mailbox
+        
+        while mailbox:
+            kind, command, args, kwargs, future = mailbox.popleft()
+            
+            if kind == 'answer':
+                batch = [(args, future)]
+                while mailbox and mailbox[0][0] == 'answer':
+                    _, _, next_args, _, next_future = mailbox.popleft()
+                    batch.append((next_args, next_future))
+                self._process_answer_batch(batch)
+                continue
+            
+            try:
+                result = command(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Error procesando comando {getattr(command, '__name__', command)}: {e}",
+                             exc_info=True)
+                if future:
+                    future.set_exception(e)
+                continue
+            
+            if future:
+                future.set_result(result)
+    
+    def _process_answer_batch(self, batch: List[Tuple[tuple, Optional[Future]]]):
+        """Registrar un lote de respuestas y comprobar una sola vez si todos respondieron."""
+        accepted = False
+        
+        for args, future in batch:
+            try:
+                result = self._accept_answer(*args)
+            except Exception as e:
+                logger.error(f"Error procesando respuesta: {e}", exc_info=True)
+                future.set_exception(e)
+                continue
+            
+            accepted = accepted or result
+            future.set_result(result)
+        
+        if accepted:
+            self._check_all_answered()
+    
+    # ===== API PÚBLICA =====
+    
     def add_participant(self, participant_id: str, name: str, **kwargs) -> bool:
         """
         Agregar participante a la sesión.
@@ -121,6 +306,10 @@ class QuizSession:
         Returns:
             True si se agregó correctamente, False en caso contrario
         """
+        return self._call(self._add_participant, participant_id, name, **kwargs)
+    
+    def _add_participant(self, participant_id: str, name: str, **kwargs) -> bool:
+        """Agregar participante (ejecutado desde el buzón)."""
         try:
             # Asegurar que participant_id es una cadena válida
             if not participant_id or not isinstance(participant_id, str):
@@ -156,24 +345,24 @@ class QuizSession:
             return False
         
         try:
-            # Crear datos del participante
-            participant_data = {
-                'id': participant_id,
-                'name': name,
-                'status': ParticipantStatus.CONNECTED,
-                'score': 0,
-                'answers': [],  # Historial de respuestas
-                'join_time': time.time(),
-                'last_seen': time.time()
-            }
-            
-            # Agregar datos adicionales si los hay, pero con validación
-            for key, value in kwargs.items():
-                if key and isinstance(key, str):
-                    participant_data[key] = value
+            # Datos adicionales si los hay, pero con validación
+            extra = {key: value for key, value in kwargs.items() if key and isinstance(key, str)}
+            
+            # Crear registro del participante
+            participant = Participant(
+                index=self.answer_store.add_participant(),
+                participant_id=participant_id,
+                name=name,
+                status=ParticipantStatus.CONNECTED,
+                join_time=time.time(),
+                totals=self.answer_store,
+                extra=extra or None
+            )
             
             # Guardar participante en la sesión
-            self.participants[participant_id] = participant_data
+            self.participants[participant_id] = participant
+            self.status_counts[ParticipantStatus.CONNECTED] += 1
+            self.leaderboard.add(participant_id, participant.score)
             
             # Actualizar estadísticas
             if 'participants_joined' in self.stats:
@@ -185,7 +374,7 @@ class QuizSession:
             
             # Emitir evento
             try:
-                self._emit_event('participant_join', participant_data)
+                self._emit_event('participant_join', participant.to_dict())
             except Exception as e:
                 logger.error(f"Error al emitir evento participant_join: {e}")
                 # No fallar solo por error en emisión de evento
@@ -200,12 +389,20 @@ class QuizSession:
     
     def remove_participant(self, participant_id: str):
         """Remover participante de la sesión."""
+        self._call(self._remove_participant, participant_id)
+    
+    def _remove_participant(self, participant_id: str):
+        """Remover participante (ejecutado desde el buzón)."""
         if participant_id in self.participants:
-            participant_data = self.participants[participant_id]
-            participant_data['status'] = ParticipantStatus.DISCONNECTED
+            participant = self.participants[participant_id]
+            self._set_participant_status(participant, ParticipantStatus.DISCONNECTED)
             
-            logger.info(f"Participante desconectado: {participant_data['name']}")
-            self._emit_event('participant_leave', participant_data)
+            logger.info(f"Participante desconectado: {participant.name}")
+            self._emit_event('participant_leave', participant.to_dict())
+            
+            # Quizá solo faltaba su respuesta
+            if self.state == QuizState.COLLECTING:
+                self._check_all_answered()
     
     def start_quiz(self) -> bool:
         """
@@ -214,6 +411,10 @@ class QuizSession:
         Returns:
             True si se inició correctamente, False en caso contrario
         """
+        return self._call(self._start_quiz)
+    
+    def _start_quiz(self) -> bool:
+        """Iniciar el quiz (ejecutado desde el buzón)."""
         if self.state != QuizState.WAITING:
             logger.warning(f"No se puede iniciar quiz en estado: {self.state}")
             return False
@@ -226,7 +427,7 @@ class QuizSession:
         self._change_state(QuizState.STARTING)
         
         # Iniciar countdown y primera pregunta
-        self._start_countdown(3, self._start_first_question)
+        self._start_countdown(self.schedule.countdown, self._start_first_question)
         
         logger.info(f"Quiz iniciado con {len(self.participants)} participantes")
         return True
@@ -238,13 +439,16 @@ class QuizSession:
         Returns:
             True si hay siguiente pregunta, False si el quiz terminó
         """
+        return self._call(self._next_question)
+    
+    def _next_question(self) -> bool:
+        """Avanzar a la siguiente pregunta (ejecutado desde el buzón)."""
         if self.state == QuizState.FINISHED:
             return False
         
         self.current_question_index += 1
-        questions = self.quiz_data.get('questions', [])
         
-        if self.current_question_index >= len(questions):
+        if self.current_question_index >= self.compiled.question_count:
             self._finish_quiz()
             return False
         
@@ -262,6 +466,31 @@ class QuizSession:
         Returns:
             True si se procesó correctamente, False en caso contrario
         """
+        if self._drain_owner == threading.get_ident():
+            return self._submit_answer(participant_id, answer)
+        
+        # Las respuestas consecutivas del buzón se procesan como un lote
+        future = self._enqueue('answer', None, (participant_id, answer))
+        self._drain()
+        return future.result()
+    
+    def _submit_answer(self, participant_id: str, answer: Any) -> bool:
+        """Registrar una respuesta individual y comprobar si todos respondieron."""
+        accepted = self._accept_answer(participant_id, answer)
+        if accepted:
+            self._check_all_answered()
+        return accepted
+    
+    def _accept_answer(self, participant_id: str, answer: Any,
+                       answer_time: Optional[float] = None) -> bool:
+        """
+        Validar y registrar una respuesta (ejecutado desde el buzón).
+        
+        Args:
+            participant_id: ID del participante
+            answer: Respuesta seleccionada
+            answer_time: Momento de la respuesta (epoch); por defecto, ahora
+        """
         if self.state not in [QuizState.QUESTION, QuizState.COLLECTING]:
             logger.warning(f"No se aceptan respuestas en estado: {self.state}")
             return False
@@ -275,7 +504,8 @@ class QuizSession:
             return False
         
         # Registrar respuesta
-        answer_time = time.time()
+        if answer_time is None:
+            answer_time = time.time()
         answer_data = {
             'participant_id': participant_id,
             'answer': answer,
@@ -284,42 +514,93 @@ class QuizSession:
         }
         
         self.current_answers[participant_id] = answer_data
-        self.participants[participant_id]['status'] = ParticipantStatus.ANSWERED
+        participant = self.participants[participant_id]
+        
+        # Columnas de la pregunta para puntuar el lote sin recorrer los diccionarios
+        code = answer_code(answer, self.compiled.option_counts[self.current_question_index])
+        self._answer_participants.append(participant)
+        self._answer_rows.append(participant.index)
+        self._answer_codes.append(code)
+        self._answer_times.append(answer_data['response_time'])
+        if code == UNCODED_ANSWER:
+            self._uncoded_answers += 1
+        
+        self._set_participant_status(participant, ParticipantStatus.ANSWERED)
         self.stats['total_answers'] += 1
         
         logger.debug(f"Respuesta recibida de {participant_id}: {answer}")
         self._emit_event('answer_received', answer_data)
-        
+        return True
+    
+    def _check_all_answered(self):
+        """Adelantar el fin de la pregunta si ya no quedan participantes por responder."""
         # Si todos los participantes conectados respondieron, finalizar la pregunta antes
-        all_answered = True
-        for p_id, participant in self.participants.items():
-            if participant['status'] == ParticipantStatus.WAITING:
-                all_answered = False
-                break
+        all_answered = self.status_counts[ParticipantStatus.WAITING] == 0
         
         # Finalizar pregunta si todos han respondido y hay al menos una respuesta
         if all_answered and len(self.current_answers) > 0:
-            remaining_time = self.settings.get('question_time_limit', 30) - (time.time() - self.question_start_time)
+            remaining_time = self.question_deadline - time.time()
             if remaining_time > 2:  # Deja al menos 2 segundos de margen
                 logger.info("Finalizando pregunta anticipadamente - todos han respondido")
-                # Cancelar timer actual
-                with self.timer_lock:
-                    if self.timer_thread:
-                        self.timer_thread.cancel()
-                # Finalizar con pequeño retraso para permitir animaciones
-                threading.Timer(1.5, self._end_question).start()
+                # Adelantar el plazo actual con pequeño retraso para permitir animaciones
+                self._schedule_phase(1.5, self._end_question_time)
+    
+    def _set_participant_status(self, participant: Participant, status: ParticipantStatus):
+        """Cambiar el estado de un participante manteniendo los contadores y el ranking."""
+        previous = participant.status
+        self.status_counts[previous] -= 1
+        self.status_counts[status] += 1
+        participant.status = status
+        
+        # El ranking solo incluye a los participantes conectados
+        if status == ParticipantStatus.DISCONNECTED:
+            self.leaderboard.remove(participant.id)
+        elif previous == ParticipantStatus.DISCONNECTED:
+            self.leaderboard.add(participant.id, participant.score)
+    
+    def _schedule_phase(self, delay: float, callback: Callable, *args):
+        """Programar el plazo de la fase actual, reemplazando el anterior."""
+        if self.phase_timer:
+            self.phase_timer.cancel()
+        self.phase_seq += 1
+        # La expiración se entrega como mensaje al buzón, no se ejecuta en el planificador
+        self.phase_timer = self.scheduler.schedule(delay, self._post, self._expire_phase,
+                                                   self.phase_seq, callback, *args)
+    
+    def _expire_phase(self, phase_seq: int, callback: Callable, *args):
+        """Ejecutar la expiración de una fase si no fue reemplazada mientras esperaba."""
+        if phase_seq != self.phase_seq:
+            return
+        self.phase_timer = None
+        callback(*args)
+    
+    def _cancel_phase_timer(self) -> float:
+        """
+        Cancelar el plazo de la fase actual.
         
-        return True
+        Returns:
+            Segundos que le quedaban al plazo cancelado
+        """
+        self.phase_seq += 1
+        remaining = 0.0
+        if self.phase_timer:
+            remaining = self.phase_timer.remaining()
+            self.phase_timer.cancel()
+            self.phase_timer = None
+        return remaining
     
     def _start_countdown(self, seconds: int, callback: Callable):
         """Iniciar countdown con callback al finalizar."""
-        def countdown():
-            for i in range(seconds, 0, -1):
-                self._emit_event('countdown_tick', i)
-                time.sleep(1)
+        self._countdown_tick(seconds, callback)
+    
+    def _countdown_tick(self, remaining: int, callback: Callable):
+        """Emitir un tick del countdown y programar el siguiente."""
+        if remaining <= 0:
             callback()
+            return
         
-        threading.Thread(target=countdown, daemon=True).start()
+        self._emit_event('countdown_tick', remaining)
+        self._schedule_phase(1, self._countdown_tick, remaining - 1, callback)
     
     def _start_first_question(self):
         """Iniciar la primera pregunta."""
@@ -328,46 +609,54 @@ class QuizSession:
     
     def _start_question(self):
         """Iniciar una nueva pregunta."""
-        if self.current_question_index >= len(self.quiz_data['questions']):
+        if self.current_question_index >= self.compiled.question_count:
             # No hay más preguntas, terminar quiz
             self._finish_quiz()
             return False
         
         # Cambiar estado
-        self._change_state(QuizState.QUESTION)
+        entry = self.schedule.entries[self.current_question_index]
         self.question_start_time = time.time()
+        self.question_deadline = self.question_start_time + entry.time_limit
+        self._change_state(QuizState.QUESTION,
+                           question_index=self.current_question_index,
+                           deadline=self.question_deadline)
         
         # Obtener pregunta actual
         current_question = self.quiz_data['questions'][self.current_question_index]
         
         # Preparar para recibir respuestas
         self.current_answers = {}
+        self._reset_answer_columns()
         
         # Actualizar estado de los participantes a "esperando respuesta"
-        for participant_id in self.participants:
-            if self.participants[participant_id]['status'] != ParticipantStatus.DISCONNECTED:
-                self.participants[participant_id]['status'] = ParticipantStatus.WAITING
+        for participant in self.participants.values():
+            if participant.status != ParticipantStatus.DISCONNECTED:
+                participant.status = ParticipantStatus.WAITING
+        
+        disconnected = self.status_counts[ParticipantStatus.DISCONNECTED]
+        self.status_counts = {status: 0 for status in ParticipantStatus}
+        self.status_counts[ParticipantStatus.DISCONNECTED] = disconnected
+        self.status_counts[ParticipantStatus.WAITING] = len(self.participants) - disconnected
         
         # Obtener tiempo límite de la pregunta
-        time_limit = self.settings.get('question_time_limit', 30)
+        time_limit = entry.time_limit
         
-        # Notificar que se ha iniciado una pregunta
+        # Notificar que se ha iniciado una pregunta (payload ya preparado para participantes)
         question_data = {
             'question_index': self.current_question_index,
             'question': current_question,
+            'payload': self.compiled.payloads[self.current_question_index],
             'time_limit': time_limit
         }
         self._emit_event('question_started', question_data)
-        logger.info(f"Iniciando pregunta {self.current_question_index + 1} de {len(self.quiz_data['questions'])}")
+        logger.info(f"Iniciando pregunta {self.current_question_index + 1} de {self.compiled.question_count}")
         
         # Cambiar estado para recolectar respuestas
         self._change_state(QuizState.COLLECTING)
         
-        # Iniciar temporizador para finalizar pregunta
-        with self.timer_lock:
-            self.timer_thread = threading.Timer(time_limit, self._end_question)
-            self.timer_thread.daemon = True
-            self.timer_thread.start()
+        # Programar fin de la pregunta
+        self._schedule_phase(time_limit, self._end_question_time)
         
         return True
     
@@ -382,90 +671,154 @@ class QuizSession:
         results = self._calculate_question_results()
         
         # Mostrar resultados
-        self._change_state(QuizState.RESULTS)
+        self._change_state(QuizState.RESULTS, scored_question=self.current_question_index)
         self._emit_event('question_results', results)
         
         # Programar siguiente pregunta o leaderboard
         self.stats['questions_completed'] += 1
         
-        def show_next():
-            time.sleep(self.settings['show_results_time'])
-            
-            # Mostrar leaderboard ocasionalmente
-            if (self.current_question_index + 1) % 3 == 0:
-                self._show_leaderboard()
-            else:
-                self.next_question()
-        
-        threading.Thread(target=show_next, daemon=True).start()
+        entry = self.schedule.entries[self.current_question_index]
+        self._schedule_phase(entry.results_time, self._show_next)
+    
+    def _show_next(self):
+        """Avanzar tras mostrar resultados de la pregunta."""
+        # Mostrar leaderboard ocasionalmente
+        if self.schedule.entries[self.current_question_index].leaderboard_time > 0:
+            self._show_leaderboard()
+        else:
+            self._next_question()
+    
+    def _reset_answer_columns(self):
+        """Vaciar las columnas de respuestas de la pregunta actual."""
+        self._answer_participants: List[Participant] = []
+        self._answer_rows = array('i')  # Participant.index
+        self._answer_codes = array('i')  # Código de opción o UNCODED_ANSWER
+        self._answer_times = array('d')  # Tiempo de respuesta
+        self._uncoded_answers = 0
     
     def _calculate_question_results(self) -> Dict[str, Any]:
         """Calcular resultados de la pregunta actual."""
-        current_question = self.quiz_data['questions'][self.current_question_index]
-        correct_answer = current_question['correct_answer']
-        
-        results = {
-            'question_index': self.current_question_index,
+        question_index = self.current_question_index
+        correct_answer = self.compiled.answer_keys[question_index]
+        answers = list(self.current_answers.values())
+        participants = self._answer_participants
+        
+        # Puntuar y acumular todas las respuestas de una vez (en bloque con NumPy)
+        if (np is not None and len(answers) >= VECTORIZE_MIN_ANSWERS
+                and type(correct_answer) is int and not self._uncoded_answers):
+            codes = np.frombuffer(self._answer_codes, dtype=np.int32).copy()
+            response_times = np.frombuffer(self._answer_times, dtype=np.float64).copy()
+            correct, earned, distribution = self._score_answers_vectorized(codes, response_times,
+                                                                           correct_answer)
+            self.answer_store.extend(question_index,
+                                     np.frombuffer(self._answer_rows, dtype=np.int32).copy(),
+                                     codes, correct, earned, response_times)
+            scored = np.flatnonzero(earned).tolist()
+            correct_flags, points = correct.tolist(), earned.tolist()
+        else:
+            correct_flags, points, distribution = self._score_answers(answers, correct_answer)
+            self.answer_store.extend(question_index, self._answer_rows,
+                                     [answer_data['answer'] for answer_data in answers],
+                                     correct_flags, points, self._answer_times)
+            scored = [row for row, points_earned in enumerate(points) if points_earned]
+        
+        # Solo quienes sumaron puntos cambian de posición en el ranking;
+        # queda registrado en la transición a RESULTS que sigue al cálculo
+        score_seq = self.state_log.seq + 1
+        for row in scored:
+            participants[row].score_seq = score_seq
+        self.leaderboard.update_many([(participants[row].id, participants[row].score) for row in scored])
+        
+        correct_responses = sum(correct_flags)
+        return {
+            'question_index': question_index,
             'correct_answer': correct_answer,
             'total_participants': len(self.participants),
-            'total_responses': len(self.current_answers),
-            'correct_responses': 0,
-            'incorrect_responses': 0,
-            'answer_distribution': {},
-            'participant_results': []
+            'total_responses': len(answers),
+            'correct_responses': correct_responses,
+            'incorrect_responses': len(answers) - correct_responses,
+            'answer_distribution': distribution,
+            'participant_results': [
+                {
+                    'participant_id': participant.id,
+                    'name': participant.name,
+                    'answer': answer_data['answer'],
+                    'correct': is_correct,
+                    'points': points_earned,
+                    'response_time': answer_data['response_time']
+                }
+                for participant, answer_data, is_correct, points_earned
+                in zip(participants, answers, correct_flags, points)
+            ]
         }
+    
+    def _score_answers(self, answers: List[Dict[str, Any]],
+                       correct_answer: Any) -> Tuple[List[bool], List[int], Dict[Any, int]]:
+        """
+        Calcular corrección, puntos y distribución de un lote de respuestas.
         
-        # Analizar respuestas
-        for answer_data in self.current_answers.values():
-            participant_id = answer_data['participant_id']
-            participant = self.participants[participant_id]
-            answer = answer_data['answer']
-            response_time = answer_data['response_time']
+        Args:
+            answers: Respuestas de la pregunta actual
+            correct_answer: Respuesta correcta
             
+        Returns:
+            Tupla (aciertos, puntos, distribución) alineada con `answers`
+        """
+        points_for_correct = self.compiled.points[self.current_question_index]
+        speed_bonus_enabled = self.settings['speed_bonus_enabled']
+        max_time = self.compiled.time_limits[self.current_question_index]
+        max_speed_bonus = self.settings['max_speed_bonus']
+        
+        correct_flags = []
+        points = []
+        distribution = {}
+        
+        for answer_data in answers:
+            answer = answer_data['answer']
             is_correct = answer == correct_answer
             points_earned = 0
             
             if is_correct:
-                results['correct_responses'] += 1
-                points_earned = self.settings['points_for_correct']
+                points_earned = points_for_correct
                 
                 # Bonus por velocidad
-                if self.settings['speed_bonus_enabled']:
-                    max_time = self.settings['question_time_limit']
-                    time_factor = max(0, (max_time - response_time) / max_time)
-                    speed_bonus = int(self.settings['max_speed_bonus'] * time_factor)
-                    points_earned += speed_bonus
-            else:
-                results['incorrect_responses'] += 1
-            
-            # Actualizar puntuación del participante
-            participant['score'] += points_earned
-            
-            # Agregar a historial de respuestas
-            participant['answers'].append({
-                'question_index': self.current_question_index,
-                'answer': answer,
-                'correct': is_correct,
-                'points': points_earned,
-                'response_time': response_time
-            })
+                if speed_bonus_enabled:
+                    time_factor = max(0, (max_time - answer_data['response_time']) / max_time)
+                    points_earned += int(max_speed_bonus * time_factor)
             
-            # Agregar a resultados de la pregunta
-            results['participant_results'].append({
-                'participant_id': participant_id,
-                'name': participant['name'],
-                'answer': answer,
-                'correct': is_correct,
-                'points': points_earned,
-                'response_time': response_time
-            })
+            correct_flags.append(is_correct)
+            points.append(points_earned)
+            distribution[answer] = distribution.get(answer, 0) + 1
+        
+        return correct_flags, points, distribution
+    
+    def _score_answers_vectorized(self, codes: 'np.ndarray', response_times: 'np.ndarray',
+                                  correct_answer: int) -> Tuple['np.ndarray', 'np.ndarray', Dict[int, int]]:
+        """
+        Versión NumPy de _score_answers sobre respuestas codificadas como índice de opción.
+        
+        Args:
+            codes: Opción elegida en cada respuesta (0..opciones-1)
+            response_times: Tiempo de cada respuesta
+            correct_answer: Opción correcta
             
-            # Actualizar distribución de respuestas
-            if answer not in results['answer_distribution']:
-                results['answer_distribution'][answer] = 0
-            results['answer_distribution'][answer] += 1
+        Returns:
+            Tupla (aciertos, puntos, distribución) con aciertos y puntos como arrays
+        """
+        correct = codes == correct_answer
+        points = np.where(correct, self.compiled.points[self.current_question_index], 0).astype(np.int64)
+        
+        # Bonus por velocidad (mismas operaciones que la versión en Python puro)
+        if self.settings['speed_bonus_enabled']:
+            max_time = self.compiled.time_limits[self.current_question_index]
+            time_factor = np.maximum(0, (max_time - response_times) / max_time)
+            speed_bonus = (self.settings['max_speed_bonus'] * time_factor).astype(np.int64)
+            points += np.where(correct, speed_bonus, 0)
         
-        return results
+        counts = np.bincount(codes, minlength=self.compiled.option_counts[self.current_question_index])
+        distribution = {int(code): int(counts[code]) for code in np.flatnonzero(counts)}
+        
+        return correct, points, distribution
     
     def _show_leaderboard(self):
         """Mostrar leaderboard temporal."""
@@ -475,24 +828,27 @@ class QuizSession:
         self._emit_event('leaderboard_show', leaderboard)
         
         # Continuar después de unos segundos
-        def continue_quiz():
-            time.sleep(5)
-            self.next_question()
-        
-        threading.Thread(target=continue_quiz, daemon=True).start()
+        entry = self.schedule.entries[self.current_question_index]
+        self._schedule_phase(entry.leaderboard_time, self._next_question)
     
     def _finish_quiz(self):
         """Finalizar el quiz."""
         self._change_state(QuizState.FINISHED)
         self.stats['end_time'] = time.time()
         
-        final_results = self.get_final_results()
+        final_results = self._get_final_results()
         self._emit_event('quiz_finished', final_results)
         
         logger.info(f"Quiz finalizado: {self.session_id}")
     
-    def _change_state(self, new_state: QuizState):
-        """Cambiar estado del quiz."""
+    def _change_state(self, new_state: QuizState, **changes):
+        """
+        Cambiar estado del quiz.
+        
+        Args:
+            new_state: Nuevo estado
+            **changes: Otros campos del estado versionado que cambian a la vez
+        """
         old_state = self.state
         self.state = new_state
         
@@ -501,6 +857,44 @@ class QuizSession:
             'old_state': old_state,
             'new_state': new_state
         })
+        
+        delta = self.state_log.record(state=new_state.value, **changes)
+        if delta:
+            self._emit_event('state_delta', self._render_state(delta))
+    
+    def _render_state(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convertir el plazo absoluto del estado en segundos restantes para el cliente."""
+        if 'deadline' in data or 'state' in data:
+            data.pop('deadline', None)
+            data['remaining_time'] = round(self.get_remaining_time(), 2)
+        return data
+    
+    def get_state_sync(self, participant_id: Optional[str] = None,
+                       since_seq: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Obtener lo necesario para sincronizar a un cliente.
+        
+        Args:
+            participant_id: ID del participante (para incluir su puntuación)
+            since_seq: Última secuencia recibida por el cliente
+            
+        Returns:
+            Cambios desde `since_seq` ('full': False) o el estado completo
+            ('full': True) si la secuencia no está disponible
+        """
+        changes = self.state_log.changes_since(since_seq) if since_seq is not None else None
+        if changes is None:
+            sync = dict(self.state_log.snapshot(), full=True)
+        else:
+            sync = dict(changes, full=False)
+        sync = self._render_state(sync)
+        
+        participant = self.participants.get(participant_id) if participant_id else None
+        if participant and (sync['full'] or participant.score_seq > since_seq):
+            sync['score'] = participant.score
+            sync['rank'] = self.leaderboard.rank(participant_id)
+        
+        return sync
     
     def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -512,31 +906,171 @@ class QuizSession:
         Returns:
             Lista ordenada de participantes por puntuación
         """
-        participants = [
-            {
-                'rank': 0,  # Se asignará después
-                'participant_id': p['id'],
-                'name': p['name'],
-                'score': p['score'],
-                'answers_count': len(p['answers']),
-                'correct_answers': sum(1 for a in p['answers'] if a['correct'])
-            }
-            for p in self.participants.values()
-            if p['status'] != ParticipantStatus.DISCONNECTED
-        ]
+        leaderboard = []
+        
+        # El índice ya está ordenado: solo se materializan los primeros `limit`
+        for rank, (participant_id, score) in enumerate(self.leaderboard.top(limit), start=1):
+            p = self.participants[participant_id]
+            leaderboard.append({
+                'rank': rank,
+                'participant_id': participant_id,
+                'name': p.name,
+                'score': score,
+                'answers_count': p.answers_count,
+                'correct_answers': p.correct_answers
+            })
+        
+        return leaderboard
+    
+    def get_remaining_time(self) -> float:
+        """
+        Obtener los segundos que quedan de la pregunta actual según el cronograma.
+        
+        Returns:
+            Segundos restantes (0 si no hay pregunta en curso)
+        """
+        if self.state == QuizState.PAUSED and self.paused_remaining is not None:
+            return self.paused_remaining
+        if self.state not in [QuizState.QUESTION, QuizState.COLLECTING] or self.question_deadline is None:
+            return 0.0
+        return max(0.0, self.question_deadline - time.time())
+    
+    def get_upcoming_questions(self, count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Obtener las próximas preguntas con su hora estimada de inicio, para
+        que los clientes puedan precargarlas.
         
-        # Ordenar por puntuación (descendente)
-        participants.sort(key=lambda x: x['score'], reverse=True)
+        Args:
+            count: Número de preguntas a devolver
+            
+        Returns:
+            Lista de payloads (sin respuesta correcta) con 'time_limit' y 'starts_at'
+        """
+        entries = self.schedule.entries
+        current = self.current_question_index
+        
+        # Referencia: vencimiento de la pregunta actual o inicio planificado del quiz
+        if 0 <= current < len(entries) and self.question_deadline is not None:
+            reference_time = self.question_deadline
+            reference_offset = entries[current].deadline_offset
+        elif self.stats['start_time'] is not None:
+            reference_time = self.stats['start_time']
+            reference_offset = 0.0
+        else:
+            reference_time = time.time()
+            reference_offset = 0.0
+        
+        upcoming = []
+        for entry in entries[current + 1:current + 1 + max(0, count)]:
+            upcoming.append(dict(
+                self.compiled.payloads[entry.index],
+                time_limit=entry.time_limit,
+                starts_at=reference_time + entry.start_offset - reference_offset
+            ))
+        return upcoming
+    
+    def get_participants_info(self) -> List[Dict[str, Any]]:
+        """Obtener la vista serializable de todos los participantes."""
+        return self._call(self._get_participants_info)
+    
+    def _get_participants_info(self) -> List[Dict[str, Any]]:
+        """Vista de los participantes (ejecutado desde el buzón)."""
+        return [participant.to_dict() for participant in self.participants.values()]
+    
+    def set_participant_socket(self, participant_id: str, sid: str) -> Optional[str]:
+        """
+        Asociar el socket con el que se conectó un participante.
         
-        # Asignar rankings
-        for i, participant in enumerate(participants[:limit]):
-            participant['rank'] = i + 1
+        Args:
+            participant_id: ID del participante
+            sid: Socket actual del participante
+            
+        Returns:
+            Socket anterior que queda libre (None si no había otro)
+        """
+        return self._call(self._set_participant_socket, participant_id, sid)
+    
+    def _set_participant_socket(self, participant_id: str, sid: str) -> Optional[str]:
+        """Asociar el socket de un participante (ejecutado desde el buzón)."""
+        participant = self.participants.get(participant_id)
+        if participant is None:
+            return None
+        previous = participant.socket_id
+        participant.socket_id = sid
+        return previous if previous != sid else None
+    
+    def release_participant_socket(self, participant_id: str, sid: str) -> bool:
+        """
+        Liberar un socket cerrado; si era el actual del participante, este pasa a desconectado.
         
-        return participants[:limit]
+        Args:
+            participant_id: ID del participante
+            sid: Socket que se cerró
+            
+        Returns:
+            True si era el socket actual del participante
+        """
+        return self._call(self._release_participant_socket, participant_id, sid)
+    
+    def _release_participant_socket(self, participant_id: str, sid: str) -> bool:
+        """Liberar el socket de un participante (ejecutado desde el buzón)."""
+        participant = self.participants.get(participant_id)
+        if participant is None or participant.socket_id != sid:
+            return False  # Ya se reconectó con otro socket
+        participant.socket_id = None
+        self._remove_participant(participant_id)
+        return True
+    
+    def get_participant_answers(self, participant_id: str) -> List[Dict[str, Any]]:
+        """
+        Obtener el historial de respuestas de un participante.
+        
+        Args:
+            participant_id: ID del participante
+            
+        Returns:
+            Lista de respuestas (vacía si el participante no existe)
+        """
+        return self._call(self._get_participant_answers, participant_id)
+    
+    def _get_participant_answers(self, participant_id: str) -> List[Dict[str, Any]]:
+        """Historial de respuestas de un participante (ejecutado desde el buzón)."""
+        participant = self.participants.get(participant_id)
+        if participant is None:
+            return []
+        return self.answer_store.rows_for_participant(participant.index)
+    
+    def get_participant_rank(self, participant_id: str) -> Optional[int]:
+        """
+        Obtener la posición actual de un participante en el ranking.
+        
+        Args:
+            participant_id: ID del participante
+            
+        Returns:
+            Posición (1 = primero) o None si no está en el ranking
+        """
+        return self.leaderboard.rank(participant_id)
+    
+    def get_resource_usage(self) -> Dict[str, Any]:
+        """Obtener el consumo de recursos de la sesión (para hospedar varias por proceso)."""
+        return {
+            'participants': len(self.participants),
+            'connected': len(self.participants) - self.status_counts[ParticipantStatus.DISCONNECTED],
+            'max_participants': self.max_participants,
+            'answers_stored': len(self.answer_store),
+            'pending_answers': len(self.current_answers),
+            'mailbox_depth': len(self._mailbox),
+            'state_seq': self.state_log.seq
+        }
     
     def get_final_results(self) -> Dict[str, Any]:
         """Obtener resultados finales del quiz."""
-        leaderboard = self.get_leaderboard(limit=len(self.participants))
+        return self._call(self._get_final_results)
+    
+    def _get_final_results(self) -> Dict[str, Any]:
+        """Resultados finales (ejecutado desde el buzón)."""
+        leaderboard = self.get_leaderboard(limit=len(self.leaderboard))
         
         duration = 0
         if self.stats['start_time'] and self.stats['end_time']:
@@ -544,6 +1078,7 @@ class QuizSession:
         
         return {
             'session_id': self.session_id,
+            'quiz_id': self.quiz_data.get('id'),
             'quiz_title': self.quiz_data.get('title', 'Quiz sin título'),
             'leaderboard': leaderboard,
             'stats': {
@@ -556,50 +1091,187 @@ class QuizSession:
     
     def pause_quiz(self):
         """Pausar el quiz."""
+        self._call(self._pause_quiz)
+    
+    def _pause_quiz(self):
+        """Pausar el quiz (ejecutado desde el buzón)."""
         if self.state in [QuizState.QUESTION, QuizState.COLLECTING]:
-            # Cancelar timer actual
-            with self.timer_lock:
-                if self.timer_thread:
-                    self.timer_thread.cancel()
+            # Cancelar timer actual conservando el tiempo restante
+            self.paused_remaining = self._cancel_phase_timer()
+            self.paused_at = time.time()
             
             self._change_state(QuizState.PAUSED)
             logger.info("Quiz pausado")
     
     def resume_quiz(self):
         """Reanudar el quiz."""
+        self._call(self._resume_quiz)
+    
+    def _resume_quiz(self):
+        """Reanudar el quiz (ejecutado desde el buzón)."""
         if self.state == QuizState.PAUSED:
-            # Reanudar desde donde se pausó
-            self._change_state(QuizState.COLLECTING)
+            # Retomar el plazo con el tiempo que quedaba al pausar
+            remaining_time = self.paused_remaining
+            if remaining_time is None:
+                remaining_time = self.schedule.entries[self.current_question_index].time_limit // 2
+            self.paused_remaining = None
+            
+            # Desplazar la pregunta para que la pausa no cuente en tiempos de respuesta
+            now = time.time()
+            if self.paused_at is not None:
+                self.question_start_time += now - self.paused_at
+                self.paused_at = None
+            self.question_deadline = now + remaining_time
             
-            # Recalcular tiempo restante (simplificado)
-            remaining_time = self.settings['question_time_limit'] // 2
+            # Reanudar desde donde se pausó
+            self._change_state(QuizState.COLLECTING, deadline=self.question_deadline)
             
-            with self.timer_lock:
-                self.timer_thread = threading.Timer(
-                    remaining_time,
-                    self._end_question_time
-                )
-                self.timer_thread.start()
+            self._schedule_phase(remaining_time, self._end_question_time)
             
             logger.info("Quiz reanudado")
     
     def cleanup(self):
         """Limpiar recursos de la sesión."""
-        with self.timer_lock:
-            if self.timer_thread:
-                self.timer_thread.cancel()
+        self._call(self._cleanup)
+    
+    def _cleanup(self):
+        """Limpiar recursos (ejecutado desde el buzón)."""
+        self._cancel_phase_timer()
         
         self.event_callbacks.clear()
         logger.info(f"Sesión limpiada: {self.session_id}")
 
 
+class AsyncQuizSession(QuizSession):
+    """
+    Sesión de quiz dirigida por un event loop de asyncio.
+    
+    Expone start_quiz, submit_answer, next_question, pause_quiz y resume_quiz
+    como corrutinas; los plazos de cada fase son tareas del loop en lugar de
+    temporizadores, de modo que un único loop puede atender miles de sesiones.
+    Las corrutinas no procesan el buzón en el loop: encolan el comando y
+    esperan su futuro mientras el pool de la sesión lo ejecuta.
+    """
+    
+    def __init__(self, quiz_data: Dict[str, Any], session_id: str,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 max_participants: Optional[int] = None,
+                 compiled_quiz: Optional[CompiledQuiz] = None,
+                 executor: Optional[Executor] = None):
+        """
+        Inicializar sesión asíncrona.
+        
+        Args:
+            quiz_data: Datos del quiz
+            session_id: ID único de la sesión
+            loop: Event loop que ejecuta la sesión
+            max_participants: Capacidad de la sesión
+            compiled_quiz: Quiz ya compilado
+            executor: Pool que procesa el buzón
+        """
+        super().__init__(quiz_data, session_id, max_participants=max_participants,
+                         compiled_quiz=compiled_quiz, executor=executor)
+        self.loop = loop or asyncio.get_event_loop()
+        self.phase_task: Optional[Future] = None
+        self.phase_deadline = None
+    
+    async def _call_async(self, kind: str, command: Optional[Callable], *args) -> Any:
+        """Encolar un mensaje y esperar su resultado sin bloquear el loop."""
+        future = self._enqueue(kind, command, args)
+        self.executor.submit(self._drain)
+        return await asyncio.wrap_future(future, loop=self.loop)
+    
+    async def start_quiz(self) -> bool:
+        """Iniciar el quiz (corrutina)."""
+        return await self._call_async('command', self._start_quiz)
+    
+    async def submit_answer(self, participant_id: str, answer: Any) -> bool:
+        """Enviar respuesta de un participante (corrutina)."""
+        return await self._call_async('answer', None, participant_id, answer)
+    
+    async def next_question(self) -> bool:
+        """Avanzar a la siguiente pregunta (corrutina)."""
+        return await self._call_async('command', self._next_question)
+    
+    async def pause_quiz(self):
+        """Pausar el quiz (corrutina)."""
+        await self._call_async('command', self._pause_quiz)
+    
+    async def resume_quiz(self):
+        """Reanudar el quiz (corrutina)."""
+        await self._call_async('command', self._resume_quiz)
+    
+    def _schedule_phase(self, delay: float, callback: Callable, *args):
+        """
+        Programar el plazo de la fase actual como tarea del loop.
+        
+        Se invoca desde el hilo que procesa el buzón, que no es el del loop,
+        por lo que la tarea se crea con run_coroutine_threadsafe.
+        """
+        self._cancel_phase_timer()
+        self.phase_deadline = self.loop.time() + delay
+        self.phase_task = asyncio.run_coroutine_threadsafe(
+            self._run_phase(delay, self.phase_seq, callback, args), self.loop
+        )
+    
+    async def _run_phase(self, delay: float, phase_seq: int, callback: Callable, args: tuple):
+        """Esperar el plazo de la fase y entregar su expiración al buzón."""
+        await asyncio.sleep(delay)
+        self._post(self._expire_phase, phase_seq, callback, *args)
+    
+    def _cancel_phase_timer(self) -> float:
+        """Cancelar la tarea de la fase actual devolviendo el tiempo restante."""
+        self.phase_seq += 1
+        task = self.phase_task
+        if task is None:
+            return 0.0
+        
+        remaining = max(0.0, self.phase_deadline - self.loop.time())
+        self.phase_task = None
+        task.cancel()  # El futuro propaga la cancelación a la tarea dentro del loop
+        return remaining
+
+
 class QuizManager:
     """Gestor global de sesiones de quiz."""
     
-    def __init__(self):
-        """Inicializar gestor de quizzes."""
+    ENGINES = ('thread', 'async')
+    
+    def __init__(self, scheduler: Optional[TimerScheduler] = None, engine: str = 'thread',
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 max_participants: Optional[int] = None,
+                 code_filter: Optional[Callable[[str], bool]] = None,
+                 on_session_end: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Inicializar gestor de quizzes.
+        
+        Args:
+            scheduler: Planificador compartido por todas las sesiones
+                       (por defecto el del proceso)
+            engine: Motor de sesiones: 'thread' (QuizSession) o 'async' (AsyncQuizSession)
+            loop: Event loop para el motor 'async'; si no se indica se arranca uno propio
+            max_participants: Capacidad por defecto de las sesiones (app_config.json)
+            code_filter: Solo se generan códigos que cumplan el filtro (por
+                         ejemplo, los que pertenecen a este worker)
+            on_session_end: Callback con los resultados finales de cada sesión
+                            finalizada (p. ej. para guardarlos en el historial)
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor de sesiones no válido: {engine}")
+        
         self.active_sessions = {}  # {session_id: QuizSession}
+        self.participant_sessions = {}  # {participant_id: session_id}
+        self.socket_participants = {}  # {socket_sid: participant_id}
         self.session_history = []
+        self.scheduler = scheduler or get_default_scheduler()
+        self.engine = engine
+        self.loop = loop
+        self.max_participants = max_participants
+        self.code_filter = code_filter
+        self.on_session_end = on_session_end
+        
+        if self.engine == 'async' and self.loop is None:
+            self.loop = self._start_event_loop()
         
         logger.info("Gestor de quizzes inicializado")
     
@@ -619,19 +1291,22 @@ class QuizManager:
         # Generar código aleatorio
         code = ''.join(random.choice(chars) for _ in range(length))
         
-        # Asegurar que sea único
-        while code in self.active_sessions:
+        # Asegurar que sea único (y que cumpla el filtro de códigos)
+        while code in self.active_sessions or (self.code_filter and not self.code_filter(code)):
             code = ''.join(random.choice(chars) for _ in range(length))
             
         return code
     
-    def create_session(self, quiz_data: Dict[str, Any], session_id: Optional[str] = None) -> str:
+    def create_session(self, quiz_data: Dict[str, Any], session_id: Optional[str] = None,
+                       max_participants: Optional[int] = None) -> str:
         """
         Crear nueva sesión de quiz.
         
         Args:
             quiz_data: Datos del quiz
             session_id: ID opcional para la sesión
+            max_participants: Capacidad de esta sesión (tiene prioridad sobre la
+                              del quiz y la del gestor)
             
         Returns:
             ID de la sesión creada
@@ -643,9 +1318,24 @@ class QuizManager:
         if session_id in self.active_sessions:
             raise ValueError(f"Sesión ya existe: {session_id}")
         
-        session = QuizSession(quiz_data, session_id)
+        # Prioridad: sesión > quiz > configuración del gestor
+        capacity = max_participants or quiz_data.get('max_participants') or self.max_participants
+        
+        # Compilar el quiz una sola vez para los caminos calientes de la sesión
+        compiled = compile_quiz(quiz_data)
+        
+        if self.engine == 'async':
+            session = AsyncQuizSession(quiz_data, session_id, loop=self.loop,
+                                       max_participants=capacity, compiled_quiz=compiled)
+        else:
+            session = QuizSession(quiz_data, session_id, scheduler=self.scheduler,
+                                  max_participants=capacity, compiled_quiz=compiled)
         self.active_sessions[session_id] = session
         
+        # Mantener los índices de participantes al día con los eventos de la sesión
+        session.add_event_callback('participant_join', self._on_participant_join)
+        session.add_event_callback('participant_leave', self._on_participant_leave)
+        
         logger.info(f"Sesión creada: {session_id}")
         return session_id
     
@@ -653,25 +1343,126 @@ class QuizManager:
         """Obtener sesión por ID."""
         return self.active_sessions.get(session_id)
     
+    def find_participant_session(self, participant_id: str) -> Optional[QuizSession]:
+        """
+        Obtener la sesión a la que pertenece un participante.
+        
+        Args:
+            participant_id: ID del participante
+            
+        Returns:
+            Sesión activa del participante o None
+        """
+        session_id = self.participant_sessions.get(participant_id)
+        return self.active_sessions.get(session_id) if session_id else None
+    
+    def bind_socket(self, sid: str, participant_id: str):
+        """Asociar un socket conectado a un participante."""
+        self.socket_participants[sid] = participant_id
+    
+    def unbind_socket(self, sid: str) -> Optional[str]:
+        """
+        Desasociar un socket.
+        
+        Returns:
+            ID del participante que usaba el socket o None
+        """
+        return self.socket_participants.pop(sid, None)
+    
+    def get_socket_participant(self, sid: str) -> Optional[str]:
+        """Obtener el participante asociado a un socket."""
+        return self.socket_participants.get(sid)
+    
+    def _on_participant_join(self, session: QuizSession, event: str, data: Dict[str, Any]):
+        """Indexar un participante nuevo."""
+        self.participant_sessions[data['id']] = session.session_id
+    
+    def _on_participant_leave(self, session: QuizSession, event: str, data: Dict[str, Any]):
+        """Liberar el socket de un participante que se fue (sigue indexado para reingresar)."""
+        sid = data.get('socket_id')
+        if sid and self.socket_participants.get(sid) == data['id']:
+            del self.socket_participants[sid]
+    
+    def call_session(self, session: QuizSession, method: str, *args) -> Any:
+        """
+        Invocar una operación de sesión desde código síncrono, sea cual sea el motor.
+        
+        Args:
+            session: Sesión destino
+            method: Nombre del método público (start_quiz, submit_answer, ...)
+            *args: Argumentos del método
+            
+        Returns:
+            Resultado de la operación
+        """
+        result = getattr(session, method)(*args)
+        
+        if asyncio.iscoroutine(result):
+            if session._drain_owner == threading.get_ident():
+                # Llamada desde un callback del propio buzón: se ejecuta en línea
+                result.close()
+                return getattr(QuizSession, method)(session, *args)
+            
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            
+            if running_loop is self.loop:
+                result.close()
+                raise RuntimeError(f"{method} debe esperarse con await dentro del event loop")
+            
+            return asyncio.run_coroutine_threadsafe(result, self.loop).result()
+        
+        return result
+    
+    def _start_event_loop(self) -> asyncio.AbstractEventLoop:
+        """Arrancar un event loop dedicado en un hilo de fondo."""
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True, name="QuizEventLoop").start()
+        return loop
+    
     def end_session(self, session_id: str):
         """Finalizar sesión."""
         if session_id in self.active_sessions:
             session = self.active_sessions[session_id]
             
-            # Guardar en historial
+            # Guardar en historial (resultados y participantes leídos desde el buzón,
+            # después de las respuestas que ya estaban encoladas)
             final_results = session.get_final_results()
+            participants = session.get_participants_info()
             self.session_history.append(final_results)
+            if self.on_session_end:
+                try:
+                    self.on_session_end(final_results)
+                except Exception as e:
+                    logger.error(f"Error al registrar fin de sesión {session_id}: {e}")
             
             # Limpiar sesión
             session.cleanup()
             del self.active_sessions[session_id]
             
+            # Quitar sus participantes y sockets de los índices
+            for participant in participants:
+                participant_id, sid = participant['id'], participant['socket_id']
+                if self.participant_sessions.get(participant_id) == session_id:
+                    del self.participant_sessions[participant_id]
+                if sid and self.socket_participants.get(sid) == participant_id:
+                    del self.socket_participants[sid]
+            
             logger.info(f"Sesión finalizada: {session_id}")
     
     def get_active_sessions(self) -> List[str]:
         """Obtener lista de sesiones activas."""
         return list(self.active_sessions.keys())
     
+    def get_resource_usage(self) -> Dict[str, Dict[str, Any]]:
+        """Obtener el consumo de recursos de cada sesión activa."""
+        return {
+            session_id: session.get_resource_usage()
+            for session_id, session in list(self.active_sessions.items())
+        }
+    
     def cleanup_finished_sessions(self):
         """Limpiar sesiones terminadas."""
         finished_sessions = [
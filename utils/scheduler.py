@@ -0,0 +1,171 @@
+"""
+Planificador de temporizadores compartido para las sesiones de quiz.
+Un único hilo atiende todos los plazos (countdown, preguntas, resultados, ranking)
+de todas las sesiones, en lugar de crear un hilo por temporizador.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TimerHandle:
+    """Referencia a un temporizador programado que permite cancelarlo o reprogramarlo."""
+
+    __slots__ = ('_scheduler', '_seq', 'deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, scheduler: 'TimerScheduler', deadline: float,
+                 callback: Callable, args: tuple):
+        self._scheduler = scheduler
+        self._seq = None
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancelar el temporizador (no tiene efecto si ya se ejecutó)."""
+        self._scheduler._cancel(self)
+
+    def reschedule(self, delay: float):
+        """
+        Reprogramar el temporizador para que expire dentro de `delay` segundos.
+
+        Args:
+            delay: Nuevo retraso en segundos desde ahora
+        """
+        self._scheduler._push(self, time.monotonic() + max(0.0, delay))
+
+    def remaining(self) -> float:
+        """Segundos restantes hasta la expiración (0 si ya expiró o se canceló)."""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def active(self) -> bool:
+        """True si el temporizador sigue pendiente de ejecución."""
+        return not self.cancelled and self._seq is not None
+
+class TimerScheduler:
+    """
+    Planificador basado en un montículo (heap) de plazos.
+
+    Los callbacks se ejecutan en el hilo del planificador, por lo que deben ser
+    breves; el número de hilos es constante sin importar cuántas sesiones existan.
+    """
+
+    def __init__(self, name: str = "QuizScheduler"):
+        """
+        Inicializar planificador.
+
+        Args:
+            name: Nombre del hilo de trabajo
+        """
+        self.name = name
+        self._heap = []  # [(deadline, seq, handle)]
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> TimerHandle:
+        """
+        Programar un callback.
+
+        Args:
+            delay: Retraso en segundos
+            callback: Función a llamar al expirar
+            *args: Argumentos para el callback
+
+        Returns:
+            Handle del temporizador
+        """
+        handle = TimerHandle(self, 0.0, callback, args)
+        self._push(handle, time.monotonic() + max(0.0, delay))
+        return handle
+
+    def _push(self, handle: TimerHandle, deadline: float):
+        """Insertar (o reinsertar) un handle en el montículo."""
+        with self._condition:
+            seq = next(self._counter)
+            handle._seq = seq
+            handle.deadline = deadline
+            handle.cancelled = False
+            heapq.heappush(self._heap, (deadline, seq, handle))
+            self._ensure_running()
+            self._condition.notify()
+
+    def _cancel(self, handle: TimerHandle):
+        """Marcar un handle como cancelado; la entrada se descarta al salir del montículo."""
+        with self._condition:
+            handle.cancelled = True
+            handle._seq = None
+
+    def _ensure_running(self):
+        """Arrancar el hilo de trabajo si no está activo (requiere el lock tomado)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+            self._thread.start()
+
+    def _run(self):
+        """Bucle principal: esperar al siguiente plazo y ejecutar callbacks vencidos."""
+        while True:
+            with self._condition:
+                while self._running:
+                    # Descartar entradas canceladas o reprogramadas
+                    while self._heap and self._heap[0][1] != self._heap[0][2]._seq:
+                        heapq.heappop(self._heap)
+
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+
+                    timeout = self._heap[0][0] - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+
+                if not self._running:
+                    return
+
+                _, _, handle = heapq.heappop(self._heap)
+                handle._seq = None
+
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.error(f"Error en temporizador {getattr(handle.callback, '__name__', handle.callback)}: {e}",
+                             exc_info=True)
+
+    def pending(self) -> int:
+        """Número de temporizadores pendientes (incluye entradas aún no purgadas)."""
+        with self._condition:
+            return sum(1 for _, seq, handle in self._heap if seq == handle._seq)
+
+    def shutdown(self):
+        """Detener el hilo de trabajo descartando los temporizadores pendientes."""
+        with self._condition:
+            self._running = False
+            self._heap.clear()
+            self._condition.notify_all()
+
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def get_default_scheduler() -> TimerScheduler:
+    """Obtener el planificador compartido del proceso."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = TimerScheduler()
+        return _default_scheduler
@@ -0,0 +1,89 @@
+"""
+Estado versionado de una sesión de quiz.
+Cada cambio incrementa un número de secuencia y se guarda como delta con solo
+los campos modificados, de modo que un cliente que se reconecta puede pedir lo
+que cambió desde la última secuencia que recibió en lugar del estado completo.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Deltas recientes que se conservan para reanudar clientes
+DEFAULT_HISTORY = 256
+
+class SessionStateLog:
+    """Registro de estado con secuencia monótona y deltas recientes."""
+
+    def __init__(self, history: int = DEFAULT_HISTORY, **fields):
+        """
+        Inicializar registro.
+
+        Args:
+            history: Número máximo de deltas conservados
+            **fields: Valores iniciales del estado
+        """
+        self.seq = 0
+        self.fields: Dict[str, Any] = dict(fields)
+        self._deltas = deque(maxlen=history)  # [{'seq': n, campo: valor, ...}]
+        self._lock = threading.Lock()
+
+    def record(self, **changes) -> Optional[Dict[str, Any]]:
+        """
+        Registrar cambios de estado.
+
+        Returns:
+            Delta con los campos que realmente cambiaron y su secuencia,
+            o None si ningún valor cambió
+        """
+        with self._lock:
+            changed = {key: value for key, value in changes.items()
+                       if key not in self.fields or self.fields[key] != value}
+            if not changed:
+                return None
+
+            self.seq += 1
+            self.fields.update(changed)
+            delta = dict(changed, seq=self.seq)
+            self._deltas.append(delta)
+            return dict(delta)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Obtener el estado completo con la secuencia actual."""
+        with self._lock:
+            return dict(self.fields, seq=self.seq)
+
+    def deltas_since(self, seq: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtener los deltas posteriores a una secuencia.
+
+        Returns:
+            Lista de deltas (vacía si el cliente está al día) o None si la
+            secuencia ya no está en el historial o no pertenece a este registro
+        """
+        with self._lock:
+            if seq == self.seq:
+                return []
+            if seq < 0 or seq > self.seq:
+                return None
+            if not self._deltas or self._deltas[0]['seq'] > seq + 1:
+                return None
+            return [dict(delta) for delta in self._deltas if delta['seq'] > seq]
+
+    def changes_since(self, seq: int) -> Optional[Dict[str, Any]]:
+        """
+        Combinar en un solo delta los cambios posteriores a una secuencia.
+
+        Returns:
+            Campos cambiados con su valor actual y la secuencia actual, o None
+            si hace falta el estado completo
+        """
+        deltas = self.deltas_since(seq)
+        if deltas is None:
+            return None
+
+        changes: Dict[str, Any] = {}
+        for delta in deltas:
+            changes.update(delta)
+        changes['seq'] = deltas[-1]['seq'] if deltas else seq
+        return changes
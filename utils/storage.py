@@ -0,0 +1,477 @@
+"""
+Backends de almacenamiento de quizzes, sesiones e historial.
+FileManager asigna IDs y fechas, valida y registra; el backend solo guarda y
+consulta. 'json' usa un archivo por quiz y por sesión y el historial en logs
+JSONL mensuales; 'sqlite' guarda todo en una base de datos en modo WAL, con
+índices para listar quizzes por fecha y consultar el historial por quiz.
+
+Migración del árbol data/ a SQLite:
+    python -m utils.storage migrate
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+from utils.json_cache import JSONFileCache, freeze, get_default_cache
+from utils.quiz_catalog import QuizCatalog, SORT_FIELDS
+from utils.history_log import HistoryLog
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = ('json', 'sqlite')
+DEFAULT_STORAGE_BACKEND = 'json'
+
+# Archivo de la base de datos dentro de data/
+SQLITE_FILE = 'quiz_platform.db'
+
+class StorageBackend(ABC):
+    """
+    Interfaz de los backends de almacenamiento.
+
+    Los registros llegan ya completos (con ID y fechas) y se devuelven de
+    solo lectura, como los cargadores de FileManager. Un backend que no
+    implementa todos los métodos abstractos falla al instanciarse.
+    """
+
+    name = ''
+
+    @abstractmethod
+    def save_quiz(self, quiz_data: Dict[str, Any]):
+        """Guardar (o reemplazar) un quiz."""
+
+    @abstractmethod
+    def load_quiz(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Cargar un quiz (None si no existe)."""
+
+    @abstractmethod
+    def delete_quiz(self, quiz_id: str) -> bool:
+        """Eliminar un quiz (False si no existía)."""
+
+    @abstractmethod
+    def list_quizzes(self, sort_by: str = 'updated_at', descending: bool = True,
+                     offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Listar metadatos de quizzes ordenados y paginados."""
+
+    @abstractmethod
+    def count_quizzes(self) -> int:
+        """Número total de quizzes."""
+
+    @abstractmethod
+    def iter_quizzes(self) -> Iterator[Dict[str, Any]]:
+        """Recorrer los quizzes completos (para migraciones)."""
+
+    @abstractmethod
+    def save_session(self, session_data: Dict[str, Any]):
+        """Guardar (o reemplazar) una sesión."""
+
+    @abstractmethod
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Cargar una sesión (None si no existe)."""
+
+    @abstractmethod
+    def iter_sessions(self) -> Iterator[Dict[str, Any]]:
+        """Recorrer las sesiones (para migraciones)."""
+
+    @abstractmethod
+    def append_history(self, record: Dict[str, Any]):
+        """Agregar un registro al historial."""
+
+    @abstractmethod
+    def load_history(self, limit: int, quiz_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Registros más recientes primero, opcionalmente de un solo quiz."""
+
+    @abstractmethod
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """Recorrer el historial del más antiguo al más reciente (para migraciones)."""
+
+    def write_batch(self, sessions: List[Dict[str, Any]], history: List[Dict[str, Any]]):
+        """Escribir un lote de sesiones y registros de historial (escritor diferido)."""
+        for session_data in sessions:
+            self.save_session(session_data)
+        for record in history:
+            self.append_history(record)
+
+    def close(self):
+        """Liberar recursos del backend."""
+
+class JSONFileStorage(StorageBackend):
+    """Almacenamiento en archivos JSON bajo data/."""
+
+    name = 'json'
+
+    def __init__(self, data_path: Path, cache: Optional[JSONFileCache] = None):
+        """
+        Inicializar backend.
+
+        Args:
+            data_path: Carpeta data/
+            cache: Caché de archivos JSON (por defecto, la compartida del proceso)
+        """
+        self.data_path = Path(data_path)
+        self.quizzes_path = self.data_path / 'quizzes'
+        self.sessions_path = self.data_path / 'sessions'
+        self.history_path = self.data_path / 'history'
+        self.cache = cache or get_default_cache()
+        for directory in (self.quizzes_path, self.sessions_path, self.history_path):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # Índice de metadatos para listar sin abrir cada quiz
+        self.catalog = QuizCatalog(self.quizzes_path, self.data_path / 'quiz_catalog.json')
+
+        # Historial en un log JSONL por mes
+        self.history_log = HistoryLog(self.history_path)
+
+    def _write(self, file_path: Path, data: Dict[str, Any]):
+        """Escribir un registro como JSON legible de forma atómica (temporal + fsync + rename)."""
+        temp_file = file_path.with_name(f".{file_path.name}.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, file_path)
+        self.cache.invalidate(file_path)
+
+    def save_quiz(self, quiz_data: Dict[str, Any]):
+        self._write(self.quizzes_path / f"{quiz_data['id']}.json", quiz_data)
+        self.catalog.update(quiz_data)
+
+    def load_quiz(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        quiz_file = self.quizzes_path / f"{quiz_id}.json"
+        if not quiz_file.exists():
+            return None
+        return self.cache.load(quiz_file)
+
+    def delete_quiz(self, quiz_id: str) -> bool:
+        quiz_file = self.quizzes_path / f"{quiz_id}.json"
+        if not quiz_file.exists():
+            return False
+        quiz_file.unlink()
+        self.cache.invalidate(quiz_file)
+        self.catalog.remove(quiz_id)
+        return True
+
+    def list_quizzes(self, sort_by: str = 'updated_at', descending: bool = True,
+                     offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.catalog.list(sort_by, descending, offset, limit)
+
+    def count_quizzes(self) -> int:
+        return self.catalog.count()
+
+    def iter_quizzes(self) -> Iterator[Dict[str, Any]]:
+        for quiz_file in sorted(self.quizzes_path.glob("*.json")):
+            try:
+                yield self.cache.load(quiz_file)
+            except Exception as e:
+                logger.error(f"Error al leer quiz {quiz_file}: {e}")
+
+    def save_session(self, session_data: Dict[str, Any]):
+        self._write(self.sessions_path / f"{session_data['id']}.json", session_data)
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session_file = self.sessions_path / f"{session_id}.json"
+        if not session_file.exists():
+            return None
+        return self.cache.load(session_file)
+
+    def iter_sessions(self) -> Iterator[Dict[str, Any]]:
+        for session_file in sorted(self.sessions_path.glob("*.json")):
+            try:
+                with open(session_file, 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except Exception as e:
+                logger.error(f"Error al leer sesión {session_file}: {e}")
+
+    @staticmethod
+    def _history_month(record: Dict[str, Any]) -> str:
+        """Mes (AAAA-MM) del log donde va un registro."""
+        return (record.get('timestamp') or datetime.now().isoformat())[:7]
+
+    def append_history(self, record: Dict[str, Any]):
+        # Organizar por fecha (año-mes): una línea en el log del mes
+        self.history_log.append(self._history_month(record), record)
+
+    def write_batch(self, sessions: List[Dict[str, Any]], history: List[Dict[str, Any]]):
+        for session_data in sessions:
+            self.save_session(session_data)
+
+        months: Dict[str, List[Dict[str, Any]]] = {}
+        for record in history:
+            months.setdefault(self._history_month(record), []).append(record)
+        for month, records in months.items():
+            self.history_log.append_many(month, records, sync=True)
+
+    def load_history(self, limit: int, quiz_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if quiz_id is None:
+            return self.history_log.read_latest(limit)
+        return self.history_log.read_latest(limit, lambda record: record.get('quiz_id') == quiz_id)
+
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        for month in reversed(self.history_log.months()):
+            yield from self.history_log.read_month(month)
+
+# Columnas de ordenación del listado de quizzes
+_SORT_COLUMNS = {
+    'updated_at': 'updated_at',
+    'created_at': 'created_at',
+    'title': 'title COLLATE NOCASE',
+    'question_count': 'question_count'
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quizzes (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    question_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quizzes_updated_at ON quizzes (updated_at);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    quiz_id TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE,
+    quiz_id TEXT,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp, seq);
+CREATE INDEX IF NOT EXISTS idx_history_quiz ON history (quiz_id, timestamp, seq);
+"""
+
+# Sentencias fijas: sqlite3 reutiliza la sentencia preparada de cada una
+_SAVE_QUIZ = ("INSERT OR REPLACE INTO quizzes "
+              "(id, title, description, question_count, created_at, updated_at, data) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_LOAD_QUIZ = "SELECT data FROM quizzes WHERE id = ?"
+_DELETE_QUIZ = "DELETE FROM quizzes WHERE id = ?"
+_COUNT_QUIZZES = "SELECT COUNT(*) FROM quizzes"
+_SAVE_SESSION = "INSERT OR REPLACE INTO sessions (id, quiz_id, updated_at, data) VALUES (?, ?, ?, ?)"
+_LOAD_SESSION = "SELECT data FROM sessions WHERE id = ?"
+_APPEND_HISTORY = "INSERT OR IGNORE INTO history (id, quiz_id, timestamp, data) VALUES (?, ?, ?, ?)"
+_LATEST_HISTORY = "SELECT data FROM history ORDER BY timestamp DESC, seq DESC LIMIT ?"
+_LATEST_QUIZ_HISTORY = ("SELECT data FROM history WHERE quiz_id = ? "
+                        "ORDER BY timestamp DESC, seq DESC LIMIT ?")
+
+class SQLiteStorage(StorageBackend):
+    """Almacenamiento en una base de datos SQLite (modo WAL)."""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: Path):
+        """
+        Inicializar backend.
+
+        Args:
+            db_path: Archivo de la base de datos
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()  # Una conexión por hilo
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @staticmethod
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+    def _load(self, sql: str, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(sql, (key,)).fetchone()
+        return freeze(json.loads(row[0])) if row else None
+
+    def save_quiz(self, quiz_data: Dict[str, Any]):
+        with self._connection() as connection:
+            connection.execute(_SAVE_QUIZ, (
+                quiz_data['id'],
+                quiz_data['title'],
+                quiz_data.get('description', ''),
+                len(quiz_data.get('questions', [])),
+                quiz_data.get('created_at'),
+                quiz_data.get('updated_at'),
+                self._dumps(quiz_data)
+            ))
+
+    def load_quiz(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        return self._load(_LOAD_QUIZ, quiz_id)
+
+    def delete_quiz(self, quiz_id: str) -> bool:
+        with self._connection() as connection:
+            return connection.execute(_DELETE_QUIZ, (quiz_id,)).rowcount > 0
+
+    def list_quizzes(self, sort_by: str = 'updated_at', descending: bool = True,
+                     offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Campo de ordenación no válido: {sort_by}")
+
+        # La columna sale de una lista cerrada; los valores van como parámetros
+        sql = ("SELECT id, title, description, question_count, created_at, updated_at "
+               f"FROM quizzes ORDER BY {_SORT_COLUMNS[sort_by]} {'DESC' if descending else 'ASC'} "
+               "LIMIT ? OFFSET ?")
+        rows = self._connection().execute(sql, (-1 if limit is None else limit, offset))
+        return [{
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'question_count': row[3],
+            'created_at': row[4],
+            'updated_at': row[5]
+        } for row in rows]
+
+    def count_quizzes(self) -> int:
+        return self._connection().execute(_COUNT_QUIZZES).fetchone()[0]
+
+    def iter_quizzes(self) -> Iterator[Dict[str, Any]]:
+        for (data,) in self._connection().execute("SELECT data FROM quizzes ORDER BY id"):
+            yield freeze(json.loads(data))
+
+    def save_session(self, session_data: Dict[str, Any]):
+        with self._connection() as connection:
+            connection.execute(_SAVE_SESSION, (
+                session_data['id'],
+                session_data.get('quiz_id'),
+                session_data.get('updated_at'),
+                self._dumps(session_data)
+            ))
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._load(_LOAD_SESSION, session_id)
+
+    def iter_sessions(self) -> Iterator[Dict[str, Any]]:
+        for (data,) in self._connection().execute("SELECT data FROM sessions ORDER BY id"):
+            yield freeze(json.loads(data))
+
+    def append_history(self, record: Dict[str, Any]):
+        with self._connection() as connection:
+            connection.execute(_APPEND_HISTORY, (
+                record.get('id'),
+                record.get('quiz_id'),
+                record.get('timestamp'),
+                self._dumps(record)
+            ))
+
+    def load_history(self, limit: int, quiz_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if quiz_id is None:
+            rows = self._connection().execute(_LATEST_HISTORY, (limit,))
+        else:
+            rows = self._connection().execute(_LATEST_QUIZ_HISTORY, (quiz_id, limit))
+        return [json.loads(data) for (data,) in rows]
+
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        for (data,) in self._connection().execute("SELECT data FROM history ORDER BY seq"):
+            yield json.loads(data)
+
+    def write_batch(self, sessions: List[Dict[str, Any]], history: List[Dict[str, Any]]):
+        # Un lote por transacción
+        with self._connection() as connection:
+            connection.executemany(_SAVE_SESSION, [
+                (s['id'], s.get('quiz_id'), s.get('updated_at'), self._dumps(s)) for s in sessions
+            ])
+            connection.executemany(_APPEND_HISTORY, [
+                (r.get('id'), r.get('quiz_id'), r.get('timestamp'), self._dumps(r)) for r in history
+            ])
+
+    def close(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+def create_storage(backend: str, data_path: Path,
+                   cache: Optional[JSONFileCache] = None) -> StorageBackend:
+    """
+    Crear el backend de almacenamiento configurado.
+
+    Args:
+        backend: 'json' o 'sqlite'
+        data_path: Carpeta data/
+        cache: Caché de archivos JSON del backend 'json'
+
+    Returns:
+        Backend de almacenamiento
+    """
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Backend de almacenamiento no válido: {backend}")
+    if backend == 'sqlite':
+        return SQLiteStorage(Path(data_path) / SQLITE_FILE)
+    return JSONFileStorage(data_path, cache)
+
+def migrate_storage(source: StorageBackend, target: StorageBackend) -> Dict[str, int]:
+    """
+    Copiar quizzes, sesiones e historial de un backend a otro.
+
+    Se puede repetir sin duplicar: quizzes y sesiones se reemplazan por ID y
+    los registros de historial ya copiados se omiten.
+
+    Returns:
+        Número de quizzes, sesiones y registros de historial copiados
+    """
+    counts = {'quizzes': 0, 'sessions': 0, 'history': 0}
+
+    for quiz_data in source.iter_quizzes():
+        target.save_quiz(quiz_data)
+        counts['quizzes'] += 1
+    for session_data in source.iter_sessions():
+        target.save_session(session_data)
+        counts['sessions'] += 1
+    for record in source.iter_history():
+        target.append_history(record)
+        counts['history'] += 1
+
+    logger.info(f"Migración {source.name} -> {target.name}: {counts}")
+    return counts
+
+def main():
+    """Migrar el árbol data/ de archivos JSON a SQLite."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Herramientas de almacenamiento de la plataforma")
+    parser.add_argument('command', choices=['migrate'], help="migrate: copiar data/ (JSON) a SQLite")
+    parser.add_argument('--data', default=str(Path(__file__).parent.parent / 'data'),
+                        help="Carpeta data/ de origen")
+    args = parser.parse_args()
+
+    data_path = Path(args.data)
+    source = JSONFileStorage(data_path, JSONFileCache())
+    target = SQLiteStorage(data_path / SQLITE_FILE)
+    try:
+        counts = migrate_storage(source, target)
+    finally:
+        target.close()
+
+    print(f"✓ Migrados {counts['quizzes']} quizzes, {counts['sessions']} sesiones y "
+          f"{counts['history']} registros de historial a {data_path / SQLITE_FILE}")
+    print("  Para usarlo, configura \"storage_backend\": \"sqlite\" en app_config.json")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -3,35 +3,65 @@ Aplicación web Flask para la plataforma de quizzes.
 Servidor que permite a los participantes unirse y participar en quizzes.
 """
 
+if __name__ == '__main__':
+    # eventlet/gevent deben parchear la biblioteca estándar antes de importar Flask
+    from web.async_modes import configured_async_mode, patch_for_async_mode
+    patch_for_async_mode(configured_async_mode())
+
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 import logging
 from typing import Optional, Dict, Any
 import time
+from urllib.parse import urlparse
 
 from utils.file_manager import FileManager
 from utils.network_utils import NetworkUtils
 from utils.quiz_logic import QuizManager, QuizState
+from web.broadcast import SharedBroadcaster, EventCoalescer, OutboundBackpressure
+from web.cluster import ClusterConfig, run_cluster
+from web.async_modes import configured_async_mode, configured_transports
 
 logger = logging.getLogger(__name__)
 
 # Instancias globales
-quiz_manager = QuizManager()
 file_manager = FileManager()
+app_config = file_manager.load_config('app_config')
+network_settings = file_manager.load_network_config()
+cluster = ClusterConfig.from_network_config(network_settings)
+server_async_mode = configured_async_mode(network_settings)
+server_transports = configured_transports(network_settings)
+
+def record_session_history(final_results: Dict[str, Any]):
+    """Guardar en el historial los resultados de una sesión finalizada (en segundo plano)."""
+    file_manager.save_history_record(dict(final_results, event_type='quiz_completed'))
+
+quiz_manager = QuizManager(
+    engine=app_config.get('session_engine', 'thread'),
+    max_participants=app_config.get('max_participants'),
+    # Con varios workers cada uno solo crea sesiones cuyo código le pertenece
+    code_filter=cluster.owns if cluster.enabled else None,
+    on_session_end=record_session_history
+)
 socketio = None
+broadcaster = None
+notifier = None
+backpressure = None
 
-def create_app(config: Optional[Dict] = None) -> Flask:
+def create_app(config: Optional[Dict] = None, async_mode: Optional[str] = None) -> Flask:
     """
     Crear y configurar la aplicación Flask.
     
     Args:
         config: Configuración opcional de la aplicación
+        async_mode: Modo asíncrono de SocketIO (por defecto 'async_mode' de
+                    network_config.json)
         
     Returns:
         Aplicación Flask configurada
     """
-    global socketio
+    global socketio, broadcaster, notifier, backpressure
     
     # Configurar rutas de archivos estáticos
     import os
@@ -73,10 +103,21 @@ def create_app(config: Optional[Dict] = None) -> Flask:
     # Inicializar SocketIO
     socketio = SocketIO(
         app,
+        async_mode=async_mode or server_async_mode,
+        transports=server_transports,
         cors_allowed_origins="*",
         logger=False,
-        engineio_logger=False
+        engineio_logger=False,
+        **cluster.socketio_options()
     )
+    broadcaster = SharedBroadcaster(socketio)
+    notifier = EventCoalescer(flush_notifications, app_config.get('notify_coalesce_ms', 250))
+    backpressure = OutboundBackpressure(
+        socketio.server,
+        max_pending=app_config.get('outbound_max_pending', 64),
+        max_age=app_config.get('outbound_max_age', 10),
+        evict_after=app_config.get('slow_client_evict', 30)
+    ).install()
     
     # Registrar rutas
     register_routes(app)
@@ -88,24 +129,42 @@ def create_app(config: Optional[Dict] = None) -> Flask:
 def register_routes(app: Flask):
     """Registrar rutas HTTP de la aplicación."""
     
+    @app.context_processor
+    def inject_socket_options():
+        """Opciones de conexión que los clientes pasan a io()."""
+        return {'socket_options': {'transports': server_transports}}
+    
     @app.route('/')
     def index():
         """Página principal para unirse a quiz."""
-        # Verificar si hay sesión activa
+        # Verificar si hay sesión activa (con varios workers puede estar en otro)
         active_sessions = quiz_manager.get_active_sessions()
         
-        if not active_sessions:
+        if not active_sessions and not cluster.enabled:
             return render_template('no_quiz.html')
         
-        # Por simplicidad, usar la primera sesión activa
-        session_id = active_sessions[0]
-        session = quiz_manager.get_session(session_id)
+        # Sesión indicada por código (/?code=ABC123 o /s/ABC123); sin código
+        # solo se preselecciona si hay una única sesión activa
+        session_code = request.args.get('code')
+        owner_url = get_owner_url(session_code)
+        if owner_url:
+            return redirect(f"{owner_url}/s/{session_code.strip().upper()}")
+        
+        session = resolve_session_code(session_code)
+        if not session:
+            # El participante ingresa el código en el formulario
+            return render_template('index.html', session_id=None, quiz_title=None, can_join=True)
         
         return render_template('index.html', 
-                             session_id=session_id,
+                             session_id=session.session_id,
                              quiz_title=session.quiz_data.get('title', 'Quiz'),
                              can_join=session.state == QuizState.WAITING)
     
+    @app.route('/s/<session_code>')
+    def session_link(session_code: str):
+        """Enlace directo a una sesión por su código."""
+        return redirect(url_for('index', code=session_code))
+    
     @app.route('/join', methods=['POST'])
     def join_quiz():
         """Endpoint para unirse a un quiz."""
@@ -129,24 +188,32 @@ def register_routes(app: Flask):
                     logger.info(f"Nombre encontrado en clave '{key}': {name}")
                     break
         
-        # Si todavía no hay nombre, usar uno por defecto
-        if not name:
-            # Obtener sesión activa para contar participantes
-            active_sessions = quiz_manager.get_active_sessions()
-            if active_sessions:
-                session = quiz_manager.get_session(active_sessions[0])
-                name = f"Jugador {len(session.participants) + 1}"
-            else:
-                name = "Jugador Nuevo"
-            logger.info(f"Usando nombre por defecto: {name}")
+        # Obtener la sesión por su código
+        session_code = data.get('session_id') or data.get('sessionId')
         
-        # Obtener sesión activa
-        active_sessions = quiz_manager.get_active_sessions()
-        if not active_sessions:
+        # La sesión se atiende en otro worker: el cliente debe unirse allí
+        owner_url = get_owner_url(session_code)
+        if owner_url:
+            return jsonify({
+                'success': False,
+                'error': 'La sesión se atiende en otro servidor',
+                'redirect_url': f"{owner_url}/s/{session_code.strip().upper()}"
+            }), 409
+        
+        if not quiz_manager.get_active_sessions():
             return jsonify({'error': 'No hay quiz activo'}), 404
         
-        session_id = active_sessions[0]
-        session = quiz_manager.get_session(session_id)
+        session = resolve_session_code(session_code)
+        if not session:
+            if session_code:
+                return jsonify({'success': False, 'error': 'Código de sesión no válido'}), 404
+            return jsonify({'success': False, 'error': 'Código de sesión requerido'}), 400
+        session_id = session.session_id
+        
+        # Si todavía no hay nombre, usar uno por defecto
+        if not name:
+            name = f"Jugador {len(session.participants) + 1}"
+            logger.info(f"Usando nombre por defecto: {name}")
         
         # Generar ID único para participante
         import uuid
@@ -175,13 +242,9 @@ def register_routes(app: Flask):
                 logger.warning(f"No hay sesiones activas al intentar acceder al lobby con participant_id={participant_id}")
                 return redirect(url_for('index'))
             
-            session = quiz_manager.get_session(active_sessions[0])
+            # Buscar la sesión del participante en el índice del gestor
+            session = get_participant_session(participant_id)
             if not session:
-                logger.warning(f"No se encontró la sesión para el lobby con participant_id={participant_id}")
-                return redirect(url_for('index'))
-                
-            # Verificar si el participante existe en la sesión    
-            if participant_id not in session.participants:
                 logger.warning(f"Participante {participant_id} no encontrado en la sesión")
                 
                 # Intentar recuperar el participante del localStorage si está configurado en el cliente
@@ -199,7 +262,7 @@ def register_routes(app: Flask):
             
             return render_template('lobby.html',
                                 participant_id=participant_id,
-                                participant_name=participant['name'],
+                                participant_name=participant.name,
                                 session_id=session.session_id,
                                 quiz_title=quiz_title)
                                 
@@ -221,14 +284,8 @@ def register_routes(app: Flask):
                 return redirect(url_for('index'))
             
             # Buscar en qué sesión está este participante
-            session = None
-            session_id = None
-            for sess_id in active_sessions:
-                curr_session = quiz_manager.get_session(sess_id)
-                if curr_session and participant_id in curr_session.participants:
-                    session = curr_session
-                    session_id = sess_id
-                    break
+            session = get_participant_session(participant_id)
+            session_id = session.session_id if session else None
                     
             # Si no se encontró el participante en ninguna sesión
             if not session:
@@ -248,11 +305,11 @@ def register_routes(app: Flask):
             # Contar el número total de preguntas
             question_count = 0
             if hasattr(session, 'quiz_data') and isinstance(session.quiz_data, dict):
-                question_count = len(session.quiz_data.get('questions', []))
+                question_count = session.compiled.question_count
             
             return render_template('quiz.html',
                                participant_id=participant_id,
-                               participant_name=participant['name'],
+                               participant_name=participant.name,
                                session_id=session_id,
                                quiz_title=quiz_title,
                                question_count=question_count)
@@ -275,13 +332,13 @@ def register_routes(app: Flask):
             })
         
         # Devolver la primera sesión activa
-        session = active_sessions[0]
+        session = quiz_manager.get_session(active_sessions[0])
         return jsonify({
             'active_session': {
                 'session_id': session.session_id,
                 'state': session.state.value,
                 'current_question': session.current_question_index,
-                'total_questions': len(session.quiz_data.get('questions', [])),
+                'total_questions': session.compiled.question_count,
                 'participants_count': len(session.participants),
                 'quiz_title': session.quiz_data.get('title', 'Quiz'),
                 'time_per_question': session.quiz_data.get('question_time_limit', 30)
@@ -299,7 +356,7 @@ def register_routes(app: Flask):
             'session_id': session_id,
             'state': session.state.value,
             'current_question': session.current_question_index,
-            'total_questions': len(session.quiz_data.get('questions', [])),
+            'total_questions': session.compiled.question_count,
             'participants_count': len(session.participants),
             'quiz_title': session.quiz_data.get('title', 'Quiz')
         })
@@ -330,6 +387,40 @@ def register_routes(app: Flask):
             logger.error(f"Error al crear sesión desde admin: {e}")
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/sessions')
+    def api_sessions():
+        """Sesiones activas con su consumo de recursos y tráfico por sala."""
+        sessions = []
+        for session_id, usage in quiz_manager.get_resource_usage().items():
+            session = quiz_manager.get_session(session_id)
+            if not session:
+                continue
+            if broadcaster:
+                usage['broadcast'] = broadcaster.get_room_stats(session_id)
+                usage['admin_broadcast'] = broadcaster.get_room_stats(f"admin_{session_id}")
+            sessions.append({
+                'session_id': session_id,
+                'quiz_title': session.quiz_data.get('title', 'Quiz'),
+                'state': session.state.value,
+                'resources': usage
+            })
+        
+        return jsonify({'sessions': sessions})
+    
+    @app.route('/api/broadcast/stats')
+    def api_broadcast_stats():
+        """Contadores de bytes codificados vs enviados por evento difundido."""
+        return jsonify({
+            'events': broadcaster.get_stats() if broadcaster else {},
+            'outbound': backpressure.get_stats() if backpressure else {}
+        })
+    
+    @app.route('/api/cache/stats')
+    def api_cache_stats():
+        """Aciertos y fallos de la caché de archivos JSON y estado de la cola de escritura."""
+        return jsonify(dict(file_manager.cache.get_stats(),
+                            write_behind=file_manager.writer.get_stats()))
+    
     @app.route('/api/status')
     def api_status():
         """Endpoint para verificar el estado del servidor para el frontend."""
@@ -386,6 +477,12 @@ def register_socketio_events(socketio: SocketIO):
     def handle_disconnect():
         """Cliente desconectado via WebSocket."""
         logger.debug(f"Cliente desconectado: {request.sid}")
+        
+        participant_id = quiz_manager.unbind_socket(request.sid)
+        session = get_participant_session(participant_id)
+        if session:
+            # Si era su socket actual deja de contar como pendiente de responder y sale del ranking
+            quiz_manager.call_session(session, 'release_participant_socket', participant_id, request.sid)
     
     @socketio.on('join_session')
     def handle_join_session(data):
@@ -422,7 +519,7 @@ def register_socketio_events(socketio: SocketIO):
             emit('error', {'message': 'Sesión no válida'})
             return
             
-        if participant_id not in session.participants:
+        if get_participant_session(participant_id, session_id) is not session:
             logger.warning(f"Intento de conexión de participante no registrado: {participant_id}")
             emit('error', {'message': 'Participante no válido'})
             return
@@ -430,33 +527,39 @@ def register_socketio_events(socketio: SocketIO):
         # Unir al room de la sesión
         join_room(session_id)
         
-        # Registrar el sid para este participante
-        session.participants[participant_id]['socket_id'] = request.sid
+        # Registrar el sid para este participante (liberando el socket anterior)
+        previous_sid = quiz_manager.call_session(session, 'set_participant_socket', participant_id, request.sid)
+        if previous_sid:
+            quiz_manager.unbind_socket(previous_sid)
+        quiz_manager.bind_socket(request.sid, participant_id)
         
-        # Enviar estado actual
-        emit('session_state', {
-            'state': session.state.value,
-            'current_question': session.current_question_index,
-            'total_questions': len(session.quiz_data.get('questions', []))
-        })
+        # Reconexión: enviar solo lo que cambió desde la última secuencia recibida
+        since_seq = data.get('seq')
+        if isinstance(since_seq, int) and not isinstance(since_seq, bool):
+            sync = session.get_state_sync(participant_id, since_seq)
+            emit('state_sync', sync)
+            resend_question = sync['full'] or 'question_index' in sync
+        else:
+            # Enviar estado actual
+            emit('session_state', {
+                'state': session.state.value,
+                'current_question': session.current_question_index,
+                'total_questions': session.compiled.question_count,
+                'seq': session.state_log.seq
+            })
+            resend_question = True
         
         # Si la sesión está en progreso, enviar la pregunta actual
-        if session.state in [QuizState.QUESTION, QuizState.COLLECTING] and session.current_question_index >= 0:
+        if (resend_question and session.state in [QuizState.QUESTION, QuizState.COLLECTING]
+                and session.current_question_index >= 0):
             try:
-                current_question = session.quiz_data['questions'][session.current_question_index]
+                payload = session.compiled.payloads[session.current_question_index]
                 
-                # Calcular tiempo restante
-                elapsed_time = time.time() - session.question_start_time
-                time_limit = session.settings.get('question_time_limit', 30)
-                remaining_time = max(1, time_limit - int(elapsed_time))
+                # Tiempo restante según el cronograma de la sesión
+                remaining_time = max(1, int(session.get_remaining_time()))
                 
                 # Enviar pregunta actual
-                emit('question_started', {
-                    'question_index': session.current_question_index,
-                    'question': current_question['question'],
-                    'options': current_question['options'],
-                    'time_limit': remaining_time
-                })
+                emit('question_started', dict(payload, time_limit=remaining_time))
                 logger.info(f"Pregunta actual enviada a participante que se une en curso: {participant_id}")
             except Exception as e:
                 logger.error(f"Error enviando pregunta actual a participante nuevo: {e}")
@@ -474,21 +577,29 @@ def register_socketio_events(socketio: SocketIO):
             emit('error', {'message': 'Datos faltantes'})
             return
         
-        session = quiz_manager.get_session(session_id)
+        session = get_participant_session(participant_id, session_id)
         if not session:
             emit('error', {'message': 'Sesión no encontrada'})
             return
         
+        # Solo índices de las opciones de la pregunta actual
+        question_index = session.current_question_index
+        option_counts = session.compiled.option_counts
+        if (0 <= question_index < len(option_counts) and option_counts[question_index]
+                and not (type(answer) is int and 0 <= answer < option_counts[question_index])):
+            emit('answer_submitted', {'success': False, 'message': 'Respuesta no válida'})
+            return
+        
         # Enviar respuesta
-        success = session.submit_answer(participant_id, answer)
+        success = quiz_manager.call_session(session, 'submit_answer', participant_id, answer)
         
         if success:
             emit('answer_submitted', {'success': True})
-            # Notificar a admin que se recibió respuesta
-            socketio.emit('participant_answered', {
+            # Notificar a admin que se recibió respuesta (en lote)
+            notifier.add(session_id, 'answer', {
                 'participant_id': participant_id,
-                'participant_name': session.participants[participant_id]['name']
-            }, room=f"admin_{session_id}")
+                'participant_name': session.participants[participant_id].name
+            })
         else:
             emit('answer_submitted', {'success': False, 'message': 'Respuesta no aceptada'})
     
@@ -505,12 +616,15 @@ def register_socketio_events(socketio: SocketIO):
         join_room(f"admin_{session_id}")
         
         session = quiz_manager.get_session(session_id)
-        if session:
+        owner_url = get_owner_url(session_id)
+        if owner_url:
+            emit('error', {'message': 'La sesión se atiende en otro servidor', 'redirect_url': owner_url})
+        elif session:
             # Enviar estado completo al admin
             emit('admin_session_state', {
                 'state': session.state.value,
                 'current_question': session.current_question_index,
-                'participants': list(session.participants.values()),
+                'participants': session.get_participants_info(),
                 'quiz_data': session.quiz_data
             })
         
@@ -526,33 +640,26 @@ def register_socketio_events(socketio: SocketIO):
             emit('error', {'message': 'Datos faltantes'})
             return
         
-        session = quiz_manager.get_session(session_id)
-        if not session:
+        if not quiz_manager.get_session(session_id):
             emit('error', {'message': 'Sesión no encontrada'})
             return
         
-        # Verificar si el participante está registrado
-        if participant_id not in session.participants:
+        # Verificar si el participante está registrado en esa sesión
+        session = get_participant_session(participant_id, session_id)
+        if not session:
             emit('error', {'message': 'Participante no válido'})
             return
         
         # Si la sesión está en una pregunta, enviar la pregunta actual
         if session.state in [QuizState.QUESTION, QuizState.COLLECTING] and session.current_question_index >= 0:
             try:
-                current_question = session.quiz_data['questions'][session.current_question_index]
+                payload = session.compiled.payloads[session.current_question_index]
                 
-                # Calcular tiempo restante
-                elapsed_time = time.time() - session.question_start_time
-                time_limit = session.settings.get('question_time_limit', 30)
-                remaining_time = max(1, time_limit - int(elapsed_time))
+                # Tiempo restante según el cronograma de la sesión
+                remaining_time = max(1, int(session.get_remaining_time()))
                 
                 # Enviar datos de la pregunta sin la respuesta correcta
-                emit('question_started', {
-                    'question_index': session.current_question_index,
-                    'question': current_question['question'],
-                    'options': current_question['options'],
-                    'time_limit': remaining_time
-                })
+                emit('question_started', dict(payload, time_limit=remaining_time))
                 
                 logger.info(f"Pregunta actual enviada a participante {participant_id} por solicitud")
             except Exception as e:
@@ -569,6 +676,25 @@ def register_socketio_events(socketio: SocketIO):
                 'message': 'Mostrando resultados de la pregunta'
             })
 
+    @socketio.on('prefetch_questions')
+    def handle_prefetch_questions(data):
+        """Enviar las próximas preguntas para que el cliente las precargue."""
+        session_id = data.get('session_id')
+        participant_id = data.get('participant_id')
+        
+        session = get_participant_session(participant_id, session_id)
+        if not session:
+            emit('error', {'message': 'Sesión o participante no válido'})
+            return
+        
+        count = data.get('count', 1)
+        if not isinstance(count, int):
+            count = 1
+        
+        emit('upcoming_questions', {
+            'questions': session.get_upcoming_questions(min(count, 3))
+        })
+
     @socketio.on('admin_start_game')
     def handle_admin_start_game(data):
         """Administrador inicia el juego después de que los participantes están en el lobby."""
@@ -578,13 +704,19 @@ def register_socketio_events(socketio: SocketIO):
             emit('error', {'message': 'ID de sesión requerido'})
             return
         
+        # Con varios workers la sesión solo existe en su worker propietario
+        owner_url = get_owner_url(session_id)
+        if owner_url:
+            emit('error', {'message': 'La sesión se atiende en otro servidor', 'redirect_url': owner_url})
+            return
+        
         session = quiz_manager.get_session(session_id)
         if not session:
             emit('error', {'message': 'Sesión no encontrada'})
             return
         
         # Iniciar el quiz
-        success = session.start_quiz()
+        success = quiz_manager.call_session(session, 'start_quiz')
         
         if success:
             logger.info(f"Administrador inició el juego para la sesión: {session_id}")
@@ -606,28 +738,24 @@ def setup_session_callbacks(session_id: str):
     
     def on_state_change(session_obj, event, data):
         """Callback para cambios de estado."""
-        socketio.emit('state_change', {
-            'state': session_obj.state.value,
-            'data': data
-        }, room=session_id)
-        
-        # Notificar también a admin
-        socketio.emit('admin_state_change', {
+        # Mismo payload para participantes y admin: se serializa una sola vez
+        broadcaster.broadcast({
             'state': session_obj.state.value,
-            'data': data
-        }, room=f"admin_{session_id}")
+            'data': {
+                'old_state': data['old_state'].value,
+                'new_state': data['new_state'].value
+            }
+        }, [('state_change', session_id), ('admin_state_change', f"admin_{session_id}")])
+    
+    def on_state_delta(session_obj, event, data):
+        """Callback para deltas del estado versionado."""
+        broadcaster.broadcast(data, [('state_delta', session_id),
+                                     ('admin_state_delta', f"admin_{session_id}")])
     
     def on_question_started(session_obj, event, data):
         """Callback para inicio de pregunta."""
-        question_data = data['question']
-        
-        # Enviar pregunta a participantes (sin respuesta correcta)
-        participant_data = {
-            'question_index': data['question_index'],
-            'question': question_data['question'],
-            'options': question_data['options'],
-            'time_limit': data['time_limit']
-        }
+        # Enviar pregunta a participantes (payload precompilado, sin respuesta correcta)
+        participant_data = dict(data['payload'], time_limit=data['time_limit'])
         
         socketio.emit('question_started', participant_data, room=session_id)
         
@@ -636,25 +764,41 @@ def setup_session_callbacks(session_id: str):
     
     def on_question_results(session_obj, event, data):
         """Callback para resultados de pregunta."""
-        socketio.emit('question_results', data, room=session_id)
-        socketio.emit('admin_question_results', data, room=f"admin_{session_id}")
+        if app_config.get('results_fanout', 'personal') == 'full':
+            broadcaster.broadcast(data, [('question_results', session_id),
+                                         ('admin_question_results', f"admin_{session_id}")])
+            return
+        
+        # Admin recibe la tabla completa; cada participante solo los agregados,
+        # su propia fila y su posición
+        broadcaster.broadcast(data, [('admin_question_results', f"admin_{session_id}")])
+        
+        shared = {key: value for key, value in data.items() if key != 'participant_results'}
+        rows = {row['participant_id']: row for row in data['participant_results']}
+        personal = []
+        for participant in session_obj.participants.values():
+            if not participant.socket_id:
+                continue
+            row = rows.get(participant.id)
+            personal.append((participant.socket_id, {
+                'participant_results': [row] if row else [],
+                'rank': session_obj.get_participant_rank(participant.id)
+            }))
+        
+        broadcaster.personalize('question_results', shared, personal, room=session_id)
     
     def on_quiz_finished(session_obj, event, data):
         """Callback para final del quiz."""
-        socketio.emit('quiz_finished', data, room=session_id)
-        socketio.emit('admin_quiz_finished', data, room=f"admin_{session_id}")
+        broadcaster.broadcast(data, [('quiz_finished', session_id),
+                                     ('admin_quiz_finished', f"admin_{session_id}")])
     
     def on_participant_join(session_obj, event, data):
         """Callback para nuevo participante."""
-        socketio.emit('participant_joined', {
-            'name': data['name'],
-            'participant_count': len(session_obj.participants)
-        }, room=session_id)
-        
-        socketio.emit('admin_participant_joined', data, room=f"admin_{session_id}")
+        notifier.add(session_id, 'join', data)
     
     # Registrar callbacks
     session.add_event_callback('state_change', on_state_change)
+    session.add_event_callback('state_delta', on_state_delta)
     session.add_event_callback('question_started', on_question_started)
     session.add_event_callback('question_results', on_question_results)
     session.add_event_callback('quiz_finished', on_quiz_finished)
@@ -671,13 +815,110 @@ def start_quiz_session(quiz_data: Dict[str, Any]) -> str:
         
     Returns:
         ID de la sesión creada
+        
+    Raises:
+        RuntimeError: Si el servidor funciona con varios workers (la sesión
+                      se crearía en un proceso que no atiende HTTP)
     """
+    if cluster.enabled:
+        raise RuntimeError("Con varios workers las sesiones se crean en su worker "
+                           "(POST /api/admin/start_session); inicia el servidor embebido "
+                           "con run_server(embedded=True)")
+    
     session_id = quiz_manager.create_session(quiz_data)
     setup_session_callbacks(session_id)
     
     logger.info(f"Sesión de quiz iniciada desde admin: {session_id}")
     return session_id
 
+def resolve_session_code(session_code: Optional[str]):
+    """
+    Obtener la sesión correspondiente a un código ingresado por el participante.
+    
+    Args:
+        session_code: Código de sesión (sin distinguir mayúsculas); si no se
+                      indica solo se resuelve cuando hay una única sesión activa
+        
+    Returns:
+        Sesión o None
+    """
+    if session_code:
+        return quiz_manager.get_session(str(session_code).strip().upper())
+    
+    active_sessions = quiz_manager.get_active_sessions()
+    return quiz_manager.get_session(active_sessions[0]) if len(active_sessions) == 1 else None
+
+def get_owner_url(session_code: Optional[str]) -> Optional[str]:
+    """
+    Obtener la URL del worker propietario de una sesión atendida por otro proceso.
+    
+    Args:
+        session_code: Código de sesión
+        
+    Returns:
+        URL base del worker propietario o None si la sesión es de este proceso
+    """
+    if not session_code or not cluster.enabled:
+        return None
+    return cluster.owner_base_url(str(session_code).strip(), urlparse(request.host_url).hostname)
+
+def get_participant_session(participant_id: Optional[str], session_id: Optional[str] = None):
+    """
+    Obtener la sesión de un participante mediante el índice del gestor.
+    
+    Args:
+        participant_id: ID del participante
+        session_id: ID de sesión indicado por el cliente (si se indica debe coincidir)
+        
+    Returns:
+        Sesión del participante o None
+    """
+    session = quiz_manager.find_participant_session(participant_id) if participant_id else None
+    if session and session_id and session.session_id != session_id:
+        return None
+    return session
+
+def flush_notifications(session_id: str, kind: str, items: list):
+    """
+    Emitir un lote de notificaciones acumuladas de una sesión.
+    
+    Los administradores reciben el lote (admin_participants_joined,
+    participants_answered) y, para los clientes existentes, también los
+    eventos individuales admin_participant_joined y participant_answered.
+    
+    Args:
+        session_id: ID de la sesión
+        kind: 'join' o 'answer'
+        items: Eventos acumulados en la ventana
+    """
+    session = quiz_manager.get_session(session_id)
+    if not session:
+        return
+    
+    if kind == 'join':
+        names = [item['name'] for item in items]
+        shown = ', '.join(names[:5]) + (f" y {len(names) - 5} más" if len(names) > 5 else "")
+        socketio.emit('participant_joined', {
+            'name': shown,
+            'names': names,
+            'count': len(names),
+            'participant_count': len(session.participants)
+        }, room=session_id)
+        socketio.emit('admin_participants_joined', {
+            'count': len(items),
+            'participants': items,
+            'participant_count': len(session.participants)
+        }, room=f"admin_{session_id}")
+        for item in items:
+            socketio.emit('admin_participant_joined', item, room=f"admin_{session_id}")
+    elif kind == 'answer':
+        socketio.emit('participants_answered', {
+            'count': len(items),
+            'participants': items
+        }, room=f"admin_{session_id}")
+        for item in items:
+            socketio.emit('participant_answered', item, room=f"admin_{session_id}")
+
 def stop_quiz_session(session_id: str):
     """
     Detener sesión de quiz (llamada desde admin).
@@ -693,6 +934,9 @@ def stop_quiz_session(session_id: str):
         }, room=session_id)
         
         quiz_manager.end_session(session_id)
+        notifier.discard(session_id)
+        broadcaster.forget_room(session_id)
+        broadcaster.forget_room(f"admin_{session_id}")
         logger.info(f"Sesión de quiz detenida desde admin: {session_id}")
 
 def get_session_info(session_id: str) -> Optional[Dict[str, Any]]:
@@ -714,8 +958,8 @@ def get_session_info(session_id: str) -> Optional[Dict[str, Any]]:
         'state': session.state.value,
         'quiz_title': session.quiz_data.get('title', 'Quiz'),
         'current_question': session.current_question_index,
-        'total_questions': len(session.quiz_data.get('questions', [])),
-        'participants': list(session.participants.values()),
+        'total_questions': session.compiled.question_count,
+        'participants': session.get_participants_info(),
         'stats': session.stats
     }
 
@@ -724,7 +968,7 @@ def get_app():
     """Obtener instancia de la aplicación Flask."""
     return create_app()
 
-def run_server(host=None, port=None, debug=True):
+def run_server(host=None, port=None, debug=True, async_mode=None, embedded=False):
     """
     Iniciar el servidor Flask con la configuración de red.
     
@@ -732,8 +976,16 @@ def run_server(host=None, port=None, debug=True):
         host: Host opcional (sobreescribe la configuración)
         port: Puerto opcional (sobreescribe la configuración)
         debug: Modo debug
+        async_mode: Modo asíncrono opcional (sobreescribe la configuración)
+        embedded: Servidor embebido en la aplicación de escritorio, que crea
+                  las sesiones en este proceso: se ignora 'workers'
     """
-    app = create_app()
+    if embedded and cluster.enabled:
+        logger.warning(f"'workers' = {cluster.workers} no aplica al servidor embebido del admin "
+                       "de escritorio; se usa un solo proceso (python -m web.app para varios workers)")
+        cluster.disable()
+    
+    app = create_app(async_mode=async_mode)
     
     try:
         network_config = file_manager.load_network_config()
@@ -746,12 +998,28 @@ def run_server(host=None, port=None, debug=True):
         server_host = host or '0.0.0.0'
         server_port = port or 5000
     
+    # Varios workers: este proceso solo supervisa; cada worker escucha en port + i
+    if cluster.enabled:
+        if not cluster.is_worker:
+            return run_cluster(cluster, debug=debug)
+        server_port = (port or cluster.port) + cluster.worker_id
+        logger.info(f"Worker {cluster.worker_id}/{cluster.workers} en puerto {server_port}")
+    
+    logger.info(f"Servidor SocketIO en modo {socketio.async_mode}")
     socketio.run(app, 
                 host=server_host, 
                 port=server_port, 
                 debug=debug,
+                use_reloader=debug and not cluster.enabled,
                 allow_unsafe_werkzeug=True)  # Necesario para permitir conexiones externas en modo debug
 
 if __name__ == '__main__':
-    # Para desarrollo directo
-    run_server(debug=True)
+    # Para desarrollo directo (los workers lanzados por el supervisor indican --debug)
+    import argparse
+    parser = argparse.ArgumentParser(description="Servidor web de la plataforma de quizzes")
+    parser.add_argument('--debug', action=argparse.BooleanOptionalAction, default=None,
+                        help="Modo debug (por defecto activo salvo en los workers)")
+    parser.add_argument('--port', type=int, default=None, help="Puerto (sobreescribe la configuración)")
+    args = parser.parse_args()
+    
+    run_server(port=args.port, debug=args.debug if args.debug is not None else not cluster.is_worker)
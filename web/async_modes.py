@@ -0,0 +1,109 @@
+"""
+Selección del modo asíncrono y de los transportes del servidor SocketIO.
+El modo se configura con 'async_mode' en network_config.json (o la variable
+de entorno QUIZ_ASYNC_MODE). eventlet y gevent requieren parchear la
+biblioteca estándar antes de importar Flask, por eso este módulo no depende
+del resto de la aplicación.
+
+La política de transporte ('transport_policy' o QUIZ_TRANSPORT_POLICY)
+decide si los clientes empiezan con long-polling y luego cambian a WebSocket
+('polling') o se conectan directamente por WebSocket ('websocket').
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+DEFAULT_ASYNC_MODE = 'threading'
+
+# Transportes por política, en el orden en que los prueba el cliente
+TRANSPORT_POLICIES = {
+    'polling': ['polling', 'websocket'],
+    'websocket': ['websocket']
+}
+DEFAULT_TRANSPORT_POLICY = 'polling'
+
+# Variables de entorno que tienen prioridad sobre network_config.json
+ASYNC_MODE_ENV = 'QUIZ_ASYNC_MODE'
+TRANSPORT_POLICY_ENV = 'QUIZ_TRANSPORT_POLICY'
+
+NETWORK_CONFIG_FILE = Path(__file__).parent.parent / 'data' / 'config' / 'network_config.json'
+
+def _configured_value(key: str, env: str, default: str,
+                      network_config: Optional[dict] = None) -> str:
+    """Leer una opción del entorno o, si no está, de network_config.json."""
+    value = os.environ.get(env)
+    if not value:
+        if network_config is None:
+            try:
+                with open(NETWORK_CONFIG_FILE, 'r', encoding='utf-8') as f:
+                    network_config = json.load(f)
+            except (OSError, ValueError):
+                network_config = {}
+        value = network_config.get(key) or default
+    return value
+
+def configured_async_mode(network_config: Optional[dict] = None) -> str:
+    """
+    Obtener el modo asíncrono configurado.
+
+    Args:
+        network_config: Configuración de red (si no se indica se lee del archivo)
+
+    Returns:
+        Modo válido; si el configurado no es válido o su biblioteca no está
+        instalada se usa 'threading'
+    """
+    mode = _configured_value('async_mode', ASYNC_MODE_ENV, DEFAULT_ASYNC_MODE, network_config)
+
+    if mode not in SUPPORTED_ASYNC_MODES:
+        logger.warning(f"Modo asíncrono no soportado: {mode}. Usando {DEFAULT_ASYNC_MODE}")
+        return DEFAULT_ASYNC_MODE
+
+    if mode != 'threading':
+        try:
+            __import__(mode)
+        except ImportError:
+            logger.warning(f"{mode} no está instalado. Usando {DEFAULT_ASYNC_MODE}")
+            return DEFAULT_ASYNC_MODE
+
+    return mode
+
+def configured_transports(network_config: Optional[dict] = None) -> List[str]:
+    """
+    Obtener los transportes de la política configurada.
+
+    Args:
+        network_config: Configuración de red (si no se indica se lee del archivo)
+
+    Returns:
+        Lista de transportes para el servidor y los clientes; si la política
+        no es válida se usa 'polling'
+    """
+    policy = _configured_value('transport_policy', TRANSPORT_POLICY_ENV,
+                               DEFAULT_TRANSPORT_POLICY, network_config)
+    if policy not in TRANSPORT_POLICIES:
+        logger.warning(f"Política de transporte no soportada: {policy}. "
+                       f"Usando {DEFAULT_TRANSPORT_POLICY}")
+        policy = DEFAULT_TRANSPORT_POLICY
+    return list(TRANSPORT_POLICIES[policy])
+
+def patch_for_async_mode(mode: str):
+    """
+    Parchear la biblioteca estándar para eventlet o gevent.
+
+    Debe llamarse al inicio del proceso, antes de importar Flask o SocketIO,
+    para que los hilos, sockets y temporizadores de las sesiones cooperen
+    con el servidor.
+    """
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
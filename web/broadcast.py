@@ -0,0 +1,446 @@
+"""
+Difusión de eventos de SocketIO serializando cada payload una sola vez.
+Un mismo evento suele enviarse a la sala de participantes y a la sala de
+administración; aquí el JSON del payload se genera una vez y el paquete ya
+codificado se reparte a todos los sockets de cada sala.
+
+También limita la cola de salida de cada socket, para que un cliente lento no
+acumule mensajes sin límite en la memoria del servidor.
+"""
+
+import re
+import json
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from engineio import packet as eio_packet
+from socketio import packet as sio_packet
+from socketio.manager import Manager
+
+from utils.scheduler import TimerScheduler, get_default_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Eventos cuyo último valor reemplaza a los anteriores aún no enviados
+SUPERSEDED_EVENTS = ('state_change', 'admin_state_change', 'session_state', 'admin_session_state')
+
+# Nombre del evento en un paquete de SocketIO codificado: 2[/ns,][id]["evento",...
+_EVENT_NAME = re.compile(r'^2(?:/[^,]*,)?\d*\["((?:[^"\\]|\\.)*)"')
+
+class SharedBroadcaster:
+    """Difusor de eventos con payload codificado una única vez."""
+
+    def __init__(self, socketio, namespace: str = '/'):
+        """
+        Inicializar difusor.
+
+        Args:
+            socketio: Instancia de Flask-SocketIO
+            namespace: Namespace de SocketIO
+        """
+        self.socketio = socketio
+        self.namespace = namespace
+        self.stats: Dict[str, Dict[str, int]] = {}  # {evento: contadores}
+        self.room_stats: Dict[str, Dict[str, int]] = {}  # {sala: contadores}
+        self._stats_lock = threading.Lock()
+
+    def broadcast(self, data: Any, targets: List[Tuple[str, str]]):
+        """
+        Enviar el mismo payload a varias salas.
+
+        Args:
+            data: Payload del evento (serializable a JSON)
+            targets: Lista de tuplas (evento, sala)
+        """
+        server = self.socketio.server
+
+        # Solo se comparte el paquete con el gestor en memoria; con colas de
+        # mensajes externas cada emit debe pasar por el gestor correspondiente
+        if type(server.manager) is not Manager or server.packet_class is not sio_packet.Packet:
+            self._fallback(data, targets)
+            return
+
+        try:
+            data_json = server.packet_class.json.dumps(data, separators=(',', ':'))
+        except (TypeError, ValueError):
+            # Payloads con datos binarios u objetos no serializables
+            self._fallback(data, targets)
+            return
+
+        namespace_prefix = '' if self.namespace == '/' else self.namespace + ','
+        payload_bytes = len(data_json)  # Se contabiliza solo en el primer destino
+
+        for event, room in targets:
+            encoded = (f"{sio_packet.EVENT}{namespace_prefix}["
+                       f"{json.dumps(event)},{data_json}]")
+            eio_pkt = eio_packet.Packet(eio_packet.MESSAGE, encoded)
+
+            recipients = 0
+            for _, eio_sid in list(server.manager.get_participants(self.namespace, room)):
+                server._send_eio_packet(eio_sid, eio_pkt)
+                recipients += 1
+
+            framing_bytes = len(encoded) - len(data_json)
+            self._record(event, payload_bytes + framing_bytes, len(encoded) * recipients,
+                         recipients, room)
+            payload_bytes = 0
+
+    def personalize(self, event: str, shared: Dict[str, Any],
+                    personal: List[Tuple[str, Dict[str, Any]]], room: Optional[str] = None):
+        """
+        Enviar un evento con una parte común y otra propia de cada socket.
+
+        La parte común se serializa una sola vez y a cada destinatario solo se
+        le agregan sus propias claves, de modo que el tráfico crece linealmente
+        con el número de sockets.
+
+        Args:
+            event: Nombre del evento
+            shared: Claves comunes a todos los destinatarios
+            personal: Lista de tuplas (sid, claves propias del destinatario)
+            room: Sala a la que se atribuye el tráfico en las estadísticas
+        """
+        server = self.socketio.server
+
+        if type(server.manager) is not Manager or server.packet_class is not sio_packet.Packet:
+            self._fallback_personal(event, shared, personal, room)
+            return
+
+        dumps = server.packet_class.json.dumps
+        try:
+            shared_json = dumps(shared, separators=(',', ':'))
+        except (TypeError, ValueError):
+            self._fallback_personal(event, shared, personal, room)
+            return
+
+        namespace_prefix = '' if self.namespace == '/' else self.namespace + ','
+        head = f"{sio_packet.EVENT}{namespace_prefix}[{json.dumps(event)},{shared_json[:-1]}"
+        separator = ',' if shared else ''
+        bytes_encoded = len(head)
+        bytes_sent = 0
+        recipients = 0
+
+        for sid, extra in personal:
+            eio_sid = server.manager.eio_sid_from_sid(sid, self.namespace)
+            if eio_sid is None:
+                continue  # Socket ya desconectado
+
+            extra_json = dumps(extra, separators=(',', ':'))[1:-1] if extra else ''
+            encoded = f"{head}{separator if extra_json else ''}{extra_json}}}]"
+            server._send_eio_packet(eio_sid, eio_packet.Packet(eio_packet.MESSAGE, encoded))
+
+            bytes_encoded += len(extra_json)
+            bytes_sent += len(encoded)
+            recipients += 1
+
+        self._record(event, bytes_encoded, bytes_sent, recipients, room)
+
+    def _fallback_personal(self, event: str, shared: Dict[str, Any],
+                           personal: List[Tuple[str, Dict[str, Any]]], room: Optional[str]):
+        """Emitir el evento personalizado socket por socket por la vía estándar."""
+        for sid, extra in personal:
+            self.socketio.emit(event, dict(shared, **extra), to=sid)
+        self._record(event, 0, 0, len(personal), room)
+
+    def _fallback(self, data: Any, targets: List[Tuple[str, str]]):
+        """Emitir por la vía estándar de SocketIO (una codificación por sala)."""
+        for event, room in targets:
+            self.socketio.emit(event, data, room=room)
+            self._record(event, 0, 0, 0, room)
+
+    def _record(self, event: str, bytes_encoded: int, bytes_sent: int, recipients: int,
+                room: Optional[str] = None):
+        """Acumular contadores del evento y de la sala."""
+        with self._stats_lock:
+            stats = self.stats.setdefault(event, {
+                'emits': 0,
+                'bytes_encoded': 0,
+                'bytes_sent': 0,
+                'recipients': 0
+            })
+            stats['emits'] += 1
+            stats['bytes_encoded'] += bytes_encoded
+            stats['bytes_sent'] += bytes_sent
+            stats['recipients'] += recipients
+
+            if room is not None:
+                room_stats = self.room_stats.setdefault(room, {
+                    'emits': 0,
+                    'bytes_sent': 0,
+                    'recipients': 0
+                })
+                room_stats['emits'] += 1
+                room_stats['bytes_sent'] += bytes_sent
+                room_stats['recipients'] += recipients
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Obtener una copia de los contadores por evento."""
+        with self._stats_lock:
+            return {event: dict(stats) for event, stats in self.stats.items()}
+
+    def get_room_stats(self, room: str) -> Dict[str, int]:
+        """Obtener los contadores de una sala."""
+        with self._stats_lock:
+            return dict(self.room_stats.get(room, {'emits': 0, 'bytes_sent': 0, 'recipients': 0}))
+
+    def forget_room(self, room: str):
+        """Descartar los contadores de una sala que ya no existe."""
+        with self._stats_lock:
+            self.room_stats.pop(room, None)
+
+class EventCoalescer:
+    """
+    Acumulador de notificaciones frecuentes por sesión.
+
+    Los eventos de un mismo tipo que llegan dentro de la ventana se entregan
+    juntos al callback de vaciado, de modo que el número de mensajes depende
+    del tiempo transcurrido y no de la cantidad de participantes.
+    """
+
+    def __init__(self, flush_callback: Callable[[str, str, List[Any]], None],
+                 interval_ms: float, scheduler: Optional[TimerScheduler] = None):
+        """
+        Inicializar acumulador.
+
+        Args:
+            flush_callback: Función (sesión, tipo, elementos) que emite el lote
+            interval_ms: Ventana de acumulación en milisegundos (0 = sin acumular)
+            scheduler: Planificador de temporizadores (por defecto, el compartido)
+        """
+        self.flush_callback = flush_callback
+        self.interval = max(0.0, interval_ms) / 1000
+        self.scheduler = scheduler or get_default_scheduler()
+        self._pending: Dict[Tuple[str, str], List[Any]] = {}  # {(sesión, tipo): elementos}
+        self._lock = threading.Lock()
+
+    def add(self, session_id: str, kind: str, item: Any):
+        """
+        Registrar un evento para el próximo lote.
+
+        Args:
+            session_id: ID de la sesión
+            kind: Tipo de notificación
+            item: Datos del evento
+        """
+        if not self.interval:
+            self.flush_callback(session_id, kind, [item])
+            return
+
+        key = (session_id, kind)
+        with self._lock:
+            items = self._pending.get(key)
+            if items is not None:
+                items.append(item)
+                return
+            self._pending[key] = [item]
+
+        # El primer evento de la ventana programa el vaciado
+        self.scheduler.schedule(self.interval, self._flush, key)
+
+    def discard(self, session_id: str):
+        """Descartar los lotes pendientes de una sesión."""
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == session_id]:
+                del self._pending[key]
+
+    def _flush(self, key: Tuple[str, str]):
+        """Entregar el lote acumulado de una clave."""
+        with self._lock:
+            items = self._pending.pop(key, None)
+        if items:
+            self.flush_callback(key[0], key[1], items)
+
+class OutboundBackpressure:
+    """
+    Control de la cola de salida de cada socket.
+
+    Mientras la cola de Engine.IO de un socket está por debajo del límite,
+    los eventos se envían directamente. Si el cliente no la vacía (mala red,
+    long-polling lento), los eventos siguientes esperan en una cola propia y
+    acotada. Solo se descartan eventos de SUPERSEDED_EVENTS (un evento nuevo
+    reemplaza a los pendientes del mismo nombre, y al superar el tamaño o la
+    edad máxima se descarta el más antiguo de ellos); los demás eventos
+    (question_started, question_results...) llevan estado que ningún evento
+    posterior repite y nunca se descartan. Si la cola se llena sin eventos
+    descartables, o el socket sigue atascado tras `evict_after` segundos, se
+    desconecta: al reconectar recupera el estado con state_sync.
+    """
+
+    def __init__(self, server, max_queued: int = 16, max_pending: int = 64,
+                 max_age: float = 10.0, evict_after: float = 30.0,
+                 superseded=SUPERSEDED_EVENTS, interval: float = 0.1,
+                 scheduler: Optional[TimerScheduler] = None):
+        """
+        Inicializar control.
+
+        Args:
+            server: Servidor de python-socketio (socketio.server)
+            max_queued: Paquetes en la cola de Engine.IO a partir de los cuales se retiene
+            max_pending: Eventos retenidos por socket antes de descartar o desconectar
+            max_age: Segundos tras los que un evento reemplazable retenido se descarta
+            evict_after: Segundos con eventos retenidos tras los que se desconecta el socket
+            superseded: Eventos que reemplazan a los pendientes del mismo nombre
+            interval: Periodo en segundos para reintentar el envío de los retenidos
+            scheduler: Planificador de temporizadores (por defecto, el compartido)
+        """
+        self.server = server
+        self.max_queued = max_queued
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.evict_after = evict_after
+        self.superseded = frozenset(superseded)
+        self.interval = interval
+        self.scheduler = scheduler or get_default_scheduler()
+        self.stats = {'sent': 0, 'held': 0, 'coalesced': 0, 'dropped': 0,
+                      'expired': 0, 'evicted': 0}
+        self._pending: Dict[str, deque] = {}  # {eio_sid: deque[(hora, evento, paquete)]}
+        self._backlog_since: Dict[str, float] = {}  # {eio_sid: hora en que empezó a retener}
+        self._pump_scheduled = False
+        self._lock = threading.Lock()
+        self._send = None
+
+    def install(self):
+        """Interponer el control en todos los envíos del servidor."""
+        self._send = self.server._send_eio_packet
+        self.server._send_eio_packet = self.send
+        return self
+
+    def _queue_size(self, eio_sid: str) -> Optional[int]:
+        """Paquetes en la cola de Engine.IO del socket (None si ya no existe)."""
+        socket = self.server.eio.sockets.get(eio_sid)
+        if socket is None:
+            return None
+        return socket.queue.qsize()
+
+    def send(self, eio_sid: str, eio_pkt):
+        """Enviar un paquete a un socket respetando su cola de salida."""
+        data = eio_pkt.data
+        match = _EVENT_NAME.match(data) if isinstance(data, str) else None
+        if match is None:
+            # Paquetes de control (conexión, desconexión, binarios): sin retener
+            self._send(eio_sid, eio_pkt)
+            return
+
+        schedule = evict = False
+        with self._lock:
+            pending = self._pending.get(eio_sid)
+            if pending is None:
+                size = self._queue_size(eio_sid)
+                if size is None or size < self.max_queued:
+                    self.stats['sent'] += 1
+                else:
+                    pending = self._pending[eio_sid] = deque()
+                    self._backlog_since[eio_sid] = time.monotonic()
+
+            if pending is not None:
+                if self._hold(pending, match.group(1), eio_pkt):
+                    schedule = not self._pump_scheduled
+                    self._pump_scheduled = True
+                else:
+                    # Cola llena de eventos que no se pueden descartar
+                    self.stats['dropped'] += len(pending)
+                    self.stats['evicted'] += 1
+                    self._forget(eio_sid)
+                    evict = True
+
+        if pending is None:
+            self._send(eio_sid, eio_pkt)
+        elif evict:
+            logger.warning(f"Desconectando cliente lento {eio_sid}: cola de salida llena")
+            self.server.eio.disconnect(eio_sid)
+        elif schedule:
+            self.scheduler.schedule(self.interval, self._pump)
+
+    def _hold(self, pending: deque, event: str, eio_pkt) -> bool:
+        """
+        Retener un evento en la cola propia del socket.
+
+        Returns:
+            False si la cola supera el máximo sin eventos descartables
+        """
+        self.stats['held'] += 1
+        if event in self.superseded:
+            kept = [entry for entry in pending if entry[1] != event]
+            self.stats['coalesced'] += len(pending) - len(kept)
+            if len(kept) != len(pending):
+                pending.clear()
+                pending.extend(kept)
+
+        pending.append((time.monotonic(), event, eio_pkt))
+        while len(pending) > self.max_pending:
+            oldest = next((entry for entry in pending if entry[1] in self.superseded), None)
+            if oldest is None:
+                return False
+            pending.remove(oldest)
+            self.stats['dropped'] += 1
+        return True
+
+    def _pump(self):
+        """Reintentar el envío de los eventos retenidos."""
+        now = time.monotonic()
+        ready: List[Tuple[str, Any]] = []
+        evict: List[str] = []
+        drained: List[str] = []
+
+        with self._lock:
+            for eio_sid in list(self._pending):
+                pending = self._pending[eio_sid]
+                size = self._queue_size(eio_sid)
+                if size is None:
+                    self._forget(eio_sid)  # Socket desconectado
+                    continue
+
+                if pending and now - pending[0][0] > self.max_age:
+                    # Solo caducan los eventos reemplazables
+                    kept = [entry for entry in pending
+                            if entry[1] not in self.superseded or now - entry[0] <= self.max_age]
+                    self.stats['expired'] += len(pending) - len(kept)
+                    pending.clear()
+                    pending.extend(kept)
+
+                if pending and size < self.max_queued:
+                    # El cliente avanza: el plazo de desconexión vuelve a empezar
+                    self._backlog_since[eio_sid] = now
+                while pending and size < self.max_queued:
+                    ready.append((eio_sid, pending.popleft()[2]))
+                    self.stats['sent'] += 1
+                    size += 1
+
+                if not pending:
+                    drained.append(eio_sid)
+                elif now - self._backlog_since[eio_sid] > self.evict_after:
+                    self.stats['dropped'] += len(pending)
+                    self.stats['evicted'] += 1
+                    self._forget(eio_sid)
+                    evict.append(eio_sid)
+
+        for eio_sid, eio_pkt in ready:
+            self._send(eio_sid, eio_pkt)
+        for eio_sid in evict:
+            logger.warning(f"Desconectando cliente lento {eio_sid}")
+            self.server.eio.disconnect(eio_sid)
+
+        with self._lock:
+            # Un socket vaciado sigue retenido hasta escribir sus paquetes: un
+            # send concurrente se encola detrás en lugar de adelantarlos
+            for eio_sid in drained:
+                if not self._pending.get(eio_sid):
+                    self._forget(eio_sid)
+            self._pump_scheduled = bool(self._pending)
+
+        if self._pump_scheduled:
+            self.scheduler.schedule(self.interval, self._pump)
+
+    def _forget(self, eio_sid: str):
+        """Descartar el estado de un socket (requiere el lock)."""
+        self._pending.pop(eio_sid, None)
+        self._backlog_since.pop(eio_sid, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener contadores de envíos retenidos, reemplazados y descartados."""
+        with self._lock:
+            return dict(self.stats, sockets_backlogged=len(self._pending),
+                        events_pending=sum(len(p) for p in self._pending.values()))
@@ -0,0 +1,420 @@
+"""
+Despliegue del servidor web en varios procesos worker.
+Cada sesión de quiz pertenece a un único worker (según su código), los
+participantes se redirigen a ese worker y las emisiones a salas se comparten
+entre procesos a través de un bus de mensajes: Redis/Kombu mediante la URL de
+Flask-SocketIO o, sin servicios externos, un bus local sobre un socket TCP.
+Los mensajes del bus local son JSON firmados con HMAC-SHA256 con un secreto
+que el supervisor genera al arrancar y pasa a cada worker por el entorno; el
+broker y los workers descartan las tramas sin firma válida.
+
+Alcance: las sesiones quedan fijadas a su worker propietario; su estado no se
+comparte ni se replica entre procesos. Una sesión se crea en el worker que
+recibe POST /api/admin/start_session (solo genera códigos propios) y el admin
+web debe conectarse a ese worker. La aplicación de escritorio crea sesiones
+en su propio proceso, por lo que su servidor embebido ignora 'workers'.
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import zlib
+import queue
+import socket
+import hashlib
+import secrets
+import struct
+import logging
+import threading
+import subprocess
+import socketserver
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from socketio.pubsub_manager import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+# Variable de entorno con el índice del worker en el proceso hijo
+WORKER_ENV = 'QUIZ_WORKER_ID'
+
+# Variable de entorno con el secreto compartido del bus local
+BUS_SECRET_ENV = 'QUIZ_BUS_SECRET'
+
+# Esquema de URL del bus local (sin servicios externos)
+LOCAL_BUS_SCHEME = 'local'
+
+# Tamaño máximo de un mensaje del bus local
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+_FRAME_HEADER = struct.Struct('!I')
+_MAC_SIZE = hashlib.sha256().digest_size
+
+def sign_frame(secret: bytes, payload: bytes) -> bytes:
+    """Anteponer la firma HMAC-SHA256 a un mensaje."""
+    return hmac.new(secret, payload, hashlib.sha256).digest() + payload
+
+def handshake_response(secret: bytes, nonce: bytes) -> bytes:
+    """Respuesta al desafío de conexión del broker."""
+    return hmac.new(secret, b'handshake:' + nonce, hashlib.sha256).digest()
+
+def verify_frame(secret: bytes, frame: bytes) -> Optional[bytes]:
+    """Obtener el mensaje de una trama firmada (None si la firma no es válida)."""
+    mac, payload = frame[:_MAC_SIZE], frame[_MAC_SIZE:]
+    if len(mac) != _MAC_SIZE or not hmac.compare_digest(
+            mac, hmac.new(secret, payload, hashlib.sha256).digest()):
+        return None
+    return payload
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    """Enviar un mensaje con prefijo de longitud."""
+    sock.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Leer exactamente `size` bytes (None si se cerró la conexión)."""
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def _recv_frame(sock: socket.socket) -> Optional[bytes]:
+    """Leer un mensaje con prefijo de longitud."""
+    header = _recv_exact(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None
+    size = _FRAME_HEADER.unpack(header)[0]
+    if size > MAX_FRAME_SIZE:
+        return None  # Trama no válida: se trata como conexión cerrada
+    return _recv_exact(sock, size)
+
+def parse_local_bus_url(url: str) -> Tuple[str, int]:
+    """Obtener (host, puerto) de una URL local://host:puerto."""
+    parsed = urlparse(url)
+    return parsed.hostname or '127.0.0.1', parsed.port or 5600
+
+class LocalBusBroker:
+    """
+    Repetidor de mensajes entre workers de un mismo equipo.
+
+    Cada mensaje publicado por un worker se reenvía al resto. Solo se
+    reenvían tramas firmadas con el secreto compartido; una conexión que
+    envía una trama sin firma válida se cierra sin recibir nada.
+    """
+
+    def __init__(self, secret: bytes, host: str = '127.0.0.1', port: int = 5600):
+        """
+        Inicializar broker.
+
+        Args:
+            secret: Secreto compartido con los workers
+            host: Interfaz de escucha
+            port: Puerto de escucha
+        """
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        """Arrancar el broker en un hilo de fondo."""
+        broker = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                broker._serve(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True,
+                         name="LocalBusBroker").start()
+        logger.info(f"Bus local escuchando en {self.host}:{self.port}")
+
+    def stop(self):
+        """Detener el broker."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _serve(self, conn: socket.socket):
+        """Reenviar los mensajes de un worker al resto."""
+        # Desafío: solo quien conoce el secreto recibe y publica mensajes
+        nonce = secrets.token_bytes(16)
+        try:
+            _send_frame(conn, nonce)
+            reply = _recv_frame(conn)
+        except OSError:
+            return
+        if reply is None or not hmac.compare_digest(reply, handshake_response(self.secret, nonce)):
+            logger.warning("Conexión al bus local rechazada: secreto no válido")
+            return
+
+        with self._lock:
+            self._clients.append(conn)
+        try:
+            while True:
+                payload = _recv_frame(conn)
+                if payload is None:
+                    break
+                if verify_frame(self.secret, payload) is None:
+                    logger.warning("Trama del bus local con firma no válida, conexión cerrada")
+                    break
+                with self._lock:
+                    targets = [client for client in self._clients if client is not conn]
+                for client in targets:
+                    try:
+                        _send_frame(client, payload)
+                    except OSError:
+                        pass  # El worker se desconectó; su hilo lo retira
+        finally:
+            with self._lock:
+                self._clients.remove(conn)
+
+class LocalBusManager(PubSubManager):
+    """
+    Gestor de clientes de SocketIO que comparte emisiones por el bus local.
+
+    Las publicaciones se encolan y las escribe un hilo propio, de modo que
+    emitir nunca bloquea (tampoco el hub de eventlet); la escucha usa sockets
+    compatibles con el modo asíncrono del servidor. Los mensajes viajan como
+    JSON firmado y se entregan ya decodificados, de modo que PubSubManager
+    nunca los deserializa con pickle.
+    """
+
+    name = 'localbus'
+
+    def __init__(self, url: str = 'local://127.0.0.1:5600', channel: str = 'socketio',
+                 write_only: bool = False, logger=None, secret: Optional[bytes] = None):
+        """
+        Inicializar gestor.
+
+        Args:
+            url: URL del broker (local://host:puerto)
+            channel: Canal de SocketIO (se ignora: el bus tiene un único canal)
+            write_only: Solo publicar, sin escuchar
+            logger: Logger de SocketIO
+            secret: Secreto compartido del bus
+        """
+        if not secret:
+            raise ValueError("El bus local requiere un secreto compartido")
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.address = parse_local_bus_url(url)
+        self.secret = secret
+        self._outbox: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self, socket_module=socket, sleep=time.sleep):
+        """Conectar al broker y responder a su desafío, reintentando mientras arranca."""
+        for attempt in range(50):
+            try:
+                sock = socket_module.create_connection(self.address)
+            except OSError:
+                sleep(0.1)
+                continue
+            try:
+                nonce = _recv_frame(sock)
+                if nonce is not None:
+                    _send_frame(sock, handshake_response(self.secret, nonce))
+                    return sock
+            except OSError:
+                pass
+            sock.close()
+            sleep(0.1)
+        raise ConnectionError(f"No se pudo conectar al bus local en {self.address}")
+
+    def _publish(self, data: Dict[str, Any]):
+        """Encolar un mensaje para los demás workers."""
+        # El servidor solo inicializa el gestor con la primera conexión, pero
+        # un worker sin sockets propios también publica (p. ej. desde la API)
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True,
+                                                    name="LocalBusWriter")
+                    self._writer.start()
+        try:
+            payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logger.error(f"Mensaje no serializable para el bus local ({data.get('method')}): {e}")
+            return
+        self._outbox.put(sign_frame(self.secret, payload))
+
+    def _write_loop(self):
+        """Enviar al broker los mensajes encolados."""
+        sock = self._connect()
+        while True:
+            payload = self._outbox.get()
+            try:
+                _send_frame(sock, payload)
+            except OSError:
+                logger.error("Bus local no disponible, reintentando publicación")
+                sock = self._connect()
+                _send_frame(sock, payload)
+
+    def _socket_module(self):
+        """Módulo de sockets compatible con el modo asíncrono del servidor."""
+        async_mode = getattr(self.server, 'async_mode', 'threading')
+        if async_mode == 'eventlet':
+            from eventlet.green import socket as green_socket
+            return green_socket
+        if async_mode == 'gevent':
+            from gevent import socket as green_socket
+            return green_socket
+        return socket
+
+    def _listen(self):
+        """Producir los mensajes publicados por los demás workers."""
+        socket_module = self._socket_module()
+        sock = self._connect(socket_module, self.server.sleep)
+        while True:
+            frame = _recv_frame(sock)
+            if frame is None:
+                logger.error("Conexión con el bus local perdida, reconectando")
+                sock = self._connect(socket_module, self.server.sleep)
+                continue
+            payload = verify_frame(self.secret, frame)
+            if payload is None:
+                logger.warning("Mensaje del bus local con firma no válida descartado")
+                continue
+            try:
+                yield json.loads(payload)
+            except ValueError:
+                logger.warning("Mensaje del bus local no válido descartado")
+
+class ClusterConfig:
+    """Configuración de workers leída de network_config.json."""
+
+    def __init__(self, workers: int = 1, worker_id: int = 0, port: int = 5000,
+                 message_queue: Optional[str] = None, bus_secret: Optional[bytes] = None):
+        """
+        Inicializar configuración.
+
+        Args:
+            workers: Número de procesos worker
+            worker_id: Índice de este proceso (0 en modo de un solo proceso)
+            port: Puerto del worker 0; el worker i escucha en port + i
+            message_queue: URL del bus (redis://, amqp://, local://...)
+            bus_secret: Secreto del bus local (lo genera el supervisor)
+        """
+        self.workers = max(1, int(workers))
+        self.worker_id = worker_id
+        self.port = port
+        self.message_queue = message_queue
+        self.bus_secret = bus_secret
+        if self.workers > 1 and not self.message_queue:
+            self.message_queue = f'{LOCAL_BUS_SCHEME}://127.0.0.1:{port + 600}'
+
+    @classmethod
+    def from_network_config(cls, network_config: Dict[str, Any]) -> 'ClusterConfig':
+        """Crear configuración a partir de network_config.json y el entorno del proceso."""
+        return cls(
+            workers=network_config.get('workers', 1),
+            worker_id=int(os.environ.get(WORKER_ENV, 0)),
+            port=network_config.get('port', 5000),
+            message_queue=network_config.get('message_queue'),
+            bus_secret=bytes.fromhex(os.environ[BUS_SECRET_ENV]) if BUS_SECRET_ENV in os.environ else None
+        )
+
+    def disable(self):
+        """Pasar al modo de un solo proceso (servidor embebido en la aplicación de escritorio)."""
+        self.workers = 1
+        self.worker_id = 0
+        self.message_queue = None
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si hay varios workers."""
+        return self.workers > 1
+
+    @property
+    def is_worker(self) -> bool:
+        """Indica si este proceso fue lanzado como worker por el supervisor."""
+        return WORKER_ENV in os.environ
+
+    @property
+    def worker_port(self) -> int:
+        """Puerto de este worker."""
+        return self.port + self.worker_id
+
+    def owner_of(self, session_code: str) -> int:
+        """Obtener el worker propietario de una sesión (estable entre procesos)."""
+        return zlib.crc32(session_code.upper().encode('utf-8')) % self.workers
+
+    def owns(self, session_code: str) -> bool:
+        """Indica si la sesión pertenece a este worker."""
+        return self.owner_of(session_code) == self.worker_id
+
+    def owner_base_url(self, session_code: str, host: str) -> Optional[str]:
+        """
+        Obtener la URL base del worker propietario de una sesión ajena.
+
+        Args:
+            session_code: Código de sesión
+            host: Nombre de host usado por el cliente (sin puerto)
+
+        Returns:
+            URL base o None si la sesión pertenece a este worker
+        """
+        if not self.enabled or self.owns(session_code):
+            return None
+        return f"http://{host}:{self.port + self.owner_of(session_code)}"
+
+    def socketio_options(self) -> Dict[str, Any]:
+        """Argumentos de SocketIO para compartir emisiones entre workers."""
+        if not self.enabled:
+            return {}
+        if urlparse(self.message_queue).scheme == LOCAL_BUS_SCHEME:
+            return {'client_manager': LocalBusManager(self.message_queue, secret=self.bus_secret)}
+        return {'message_queue': self.message_queue}
+
+def run_cluster(cluster: ClusterConfig, debug: bool = False) -> int:
+    """
+    Lanzar y supervisar los procesos worker.
+
+    Args:
+        cluster: Configuración de workers
+        debug: Modo debug de cada worker
+
+    Returns:
+        Código de salida
+    """
+    broker = None
+    secret = cluster.bus_secret or secrets.token_bytes(32)
+    if urlparse(cluster.message_queue).scheme == LOCAL_BUS_SCHEME:
+        broker = LocalBusBroker(secret, *parse_local_bus_url(cluster.message_queue))
+        broker.start()
+
+    project_root = Path(__file__).parent.parent
+    processes = []
+    for worker_id in range(cluster.workers):
+        env = dict(os.environ, **{WORKER_ENV: str(worker_id), BUS_SECRET_ENV: secret.hex()})
+        command = [sys.executable, '-m', 'web.app'] + (['--debug'] if debug else [])
+        processes.append(subprocess.Popen(command, cwd=str(project_root), env=env))
+        logger.info(f"Worker {worker_id} iniciado en puerto {cluster.port + worker_id}")
+
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        logger.error("Un worker terminó; deteniendo el resto")
+    except KeyboardInterrupt:
+        logger.info("Deteniendo workers")
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+        if broker:
+            broker.stop()
+
+    return max((process.returncode or 0) for process in processes)